@@ -20,9 +20,32 @@ class NautobotChatopsAtsuConfig(NautobotAppConfig):
     required_settings = []
     min_version = "2.0.0"
     max_version = "2.9999"
-    default_settings = {}
+    default_settings = {
+        "max_table_rows": 500,
+        "tree_depth": 3,
+        "menu_cache_timeout": 3600,
+        "conversation_timeout": 300,
+        "background_threshold": 50000,
+        "background_queue": "default",
+        "coalesce_timeout": 10,
+        "render_cache_timeout": 900,
+        "send_concurrency": 1,
+        "api_url": None,
+        "api_token": None,
+        "api_timeout": 10,
+        "api_retries": 3,
+    }
     caching_config = {}
     docs_view_name = "plugins:nautobot_chatops_atsu:docs"
 
+    def ready(self):
+        """Connect signal handlers and register Celery tasks once all apps have been loaded."""
+        super().ready()
+        # registers run_in_background with Celery, as workers serving only the background queue import nothing else
+        from . import background  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
+        from .signals import connect_signals  # pylint: disable=import-outside-toplevel
+
+        connect_signals()
+
 
 config = NautobotChatopsAtsuConfig  # pylint:disable=invalid-name
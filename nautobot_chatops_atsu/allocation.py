@@ -0,0 +1,37 @@
+"""Free address space within a Prefix.
+
+Child Prefixes are read in a single query ordered by network, and the free subnets are found in one linear sweep
+over their integer ranges, so the cost depends on the number of children rather than on the number of candidate
+subnets.
+"""
+
+from itertools import islice
+from typing import List
+
+from nautobot.ipam.models import Prefix
+
+from .intervals import ADDRESS_BITS, address_to_int, int_to_address, iter_free_blocks
+
+# Number of free subnets listed when no count is given, and the most that may be requested.
+DEFAULT_SUBNET_COUNT = 10
+MAX_SUBNET_COUNT = 1000
+
+
+def get_available_subnets(parent: Prefix, prefix_length: int, count: int) -> List[str]:
+    """Return up to ``count`` free subnets of ``prefix_length`` within ``parent``, lowest first, as CIDRs.
+
+    A subnet is free if it overlaps none of the parent's child Prefixes.
+    """
+    bits = ADDRESS_BITS[parent.ip_version]
+    if not parent.prefix_length <= prefix_length <= bits:
+        raise ValueError(f"Prefix length must be between {parent.prefix_length} and {bits}")
+
+    children = Prefix.objects.filter(parent=parent).order_by("network").values_list("network", "broadcast")
+    occupied = ((address_to_int(network), address_to_int(broadcast)) for network, broadcast in children.iterator())
+    blocks = iter_free_blocks(
+        address_to_int(str(parent.network)),
+        address_to_int(str(parent.broadcast)),
+        occupied,
+        2 ** (bits - prefix_length),
+    )
+    return [f"{int_to_address(first, parent.ip_version)}/{prefix_length}" for first, _ in islice(blocks, count)]
@@ -0,0 +1,103 @@
+"""A local stand-in for the API behind atsu, for tests and benchmarks.
+
+The server runs in a background thread on a free local port and serves JSON documents from a dict, with an ETag
+on each response and ``304 Not Modified`` for requests whose ``If-None-Match`` matches it. Failures can be queued
+to exercise retries, and requests and connections are counted to check that connections are kept alive.
+"""
+
+import hashlib
+import json
+import threading
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class StubAPIServer:
+    """Serve JSON documents over HTTP/1.1 with keep-alive from a background thread, as a context manager."""
+
+    def __init__(self, documents: Optional[Dict[str, Any]] = None) -> None:
+        """Create a server serving ``documents``, keyed by path."""
+        self.documents: Dict[str, Any] = dict(documents or {})
+        self.requests = 0
+        self.connections = 0
+        self.not_modified = 0
+        self.failures: Deque[Tuple[int, Optional[str]]] = deque()
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, status: int, count: int = 1, retry_after: Optional[str] = None) -> None:
+        """Respond to the next ``count`` requests with an error status, and optionally a Retry-After header."""
+        with self.lock:
+            self.failures.extend([(status, retry_after)] * count)
+
+    def __enter__(self) -> "StubAPIServer":
+        """Start serving."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop serving and close the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _handler_class(self):
+        """Return a request handler class bound to this server."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Handle the requests of one connection."""
+
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                """Do not log requests to stderr."""
+
+            def _respond(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Serve a document, a queued failure, or 304 Not Modified if the client has the current one."""
+                with stub.lock:
+                    stub.requests += 1
+                    failure = stub.failures.popleft() if stub.failures else None
+                    document = stub.documents.get(self.path.split("?")[0], _MISSING)
+                if failure:
+                    status, retry_after = failure
+                    self._respond(status, headers={"Retry-After": retry_after} if retry_after else None)
+                    return
+                if document is _MISSING:
+                    self._respond(HTTPStatus.NOT_FOUND)
+                    return
+                body = json.dumps(document).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with stub.lock:
+                        stub.not_modified += 1
+                    self._respond(HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+                    return
+                self._respond(HTTPStatus.OK, body, {"Content-Type": "application/json", "ETag": etag})
+
+        return Handler
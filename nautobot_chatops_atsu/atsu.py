@@ -1,16 +1,152 @@
 """All interactions with API behind atsu.
 
 This class is usually a wrapper of an existing SDK, or a raw implementation of it to have reusable code in the worker.py.
+
+Each worker process shares a single client, returned by ``get_atsu_client()``, whose HTTP session keeps connections
+to the API alive between commands. Requests time out after the ``api_timeout`` setting, failed idempotent requests
+are retried with jittered exponential backoff, and JSON responses carrying an ETag are cached so that unchanged
+resources are revalidated (``304 Not Modified``) rather than downloaded again.
 """
 
+import hashlib
 import logging
+import os
+import random
+import time
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
+from .cache import CACHE_KEY_PREFIX
 
 logger = logging.getLogger("nautobot")
 
+# Number of connections kept alive per API host.
+POOL_SIZE = 10
+
+# Base delay in seconds of the exponential backoff between retries.
+RETRY_BACKOFF = 0.5
+
+# Longest delay in seconds between retries, including any Retry-After delay requested by the API.
+MAX_RETRY_DELAY = 30.0
+
+# Responses that are worth retrying, as the API may well succeed on a later attempt.
+RETRY_STATUSES = frozenset(
+    {
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
 
-class NautobotChatopsAtsu:  # pylint: disable=too-few-public-methods
+# Methods that are safe to send again after a failure.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class NautobotChatopsAtsu:
     """Representation and methods for interacting with the API behind atsu."""
 
-    def __init__(self):
-        """Initialization of atsu class."""
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        timeout: float = 10.0,
+        retries: int = 3,
+    ):
+        """Initialization of atsu class, with a session pooling connections to ``base_url``."""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/json"
+        if token:
+            self.session.headers["Authorization"] = f"Token {token}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Return the delay before a retry, with full jitter, but no shorter than any Retry-After requested."""
+        delay = random.uniform(0, RETRY_BACKOFF * 2**attempt)  # noqa: S311
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        try:
+            delay = max(delay, float(retry_after or 0))
+        except ValueError:
+            pass
+        return min(delay, MAX_RETRY_DELAY)
+
+    def url(self, path: str) -> str:
+        """Return the URL of an API path."""
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request to the API, retrying idempotent requests on connection errors and retryable statuses."""
+        url = self.url(path)
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if method.upper() in IDEMPOTENT_METHODS else 0
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+            delay = self._retry_delay(attempt, response)
+            logger.debug("Retrying %s %s in %.2fs (attempt %d)", method, url, delay, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+
+    def _etag_key(self, path: str, params: Optional[Dict[str, Any]]) -> str:
+        """Return the cache key of the ETag and body of a GET response."""
+        request = requests.Request("GET", self.url(path), params=params).prepare()
+        digest = hashlib.sha256(f"{request.url}\0{self.session.headers.get('Authorization')}".encode()).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:api:{digest}"
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Return the decoded JSON body of a GET request, revalidating a previously cached body by its ETag.
+
+        Raises:
+            requests.HTTPError: if the API responds with an error status
+        """
+        key = self._etag_key(path, params)
+        cached: Optional[Tuple[str, Any]] = cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.request("GET", path, params=params, headers=headers)
+        if cached and response.status_code == HTTPStatus.NOT_MODIFIED:
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            cache.set(key, (etag, body))
+        return body
+
+
+# The client of each process, keyed by process ID.
+_clients: Dict[int, NautobotChatopsAtsu] = {}
+
+
+def get_atsu_client() -> Optional[NautobotChatopsAtsu]:
+    """Return the client shared by the current process, or None if the ``api_url`` setting is not configured.
+
+    The client is created on first use in each process, so that worker processes forked after it was created in
+    their parent do not share its connections.
+    """
+    config = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]
+    if not config["api_url"]:
+        return None
+    pid = os.getpid()
+    if pid not in _clients:
+        _clients.clear()
+        _clients[pid] = NautobotChatopsAtsu(
+            config["api_url"], token=config["api_token"], timeout=config["api_timeout"], retries=config["api_retries"]
+        )
+    return _clients[pid]
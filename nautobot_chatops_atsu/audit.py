@@ -0,0 +1,99 @@
+"""Detection of overlapping and duplicate Prefixes.
+
+IP networks never partially overlap: any two are either disjoint or one contains the other. Prefixes sorted by
+network and prefix length can therefore be swept with a stack holding the chain of Prefixes that contain the
+current one, which finds every overlap from a single ordered query in O(n log n) time instead of comparing pairs.
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from django.db.models.query import QuerySet
+from nautobot.ipam.constants import PREFIX_ALLOWED_CHILD_TYPES
+from nautobot.ipam.models import Prefix
+
+from .intervals import address_to_int
+
+# Number of rows fetched per round trip when streaming Prefixes.
+AUDIT_CHUNK_SIZE = 5000
+
+
+class PrefixRow(NamedTuple):
+    """The fields of a Prefix needed to detect overlaps."""
+
+    namespace: str
+    ip_version: int
+    first: int
+    last: int
+    prefix_length: int
+    type: str
+    cidr: str
+
+
+class Overlap(NamedTuple):
+    """A Prefix overlapping ``other``, which contains (or duplicates) it."""
+
+    prefix: PrefixRow
+    other: PrefixRow
+    finding: str
+
+
+def iter_prefix_rows(prefixes: QuerySet[Prefix]) -> Iterator[PrefixRow]:
+    """Stream the Prefixes of a queryset in sweep order, by IP version, network, prefix length and namespace."""
+    rows = prefixes.order_by("ip_version", "network", "prefix_length", "namespace__name").values_list(
+        "namespace__name", "ip_version", "network", "broadcast", "prefix_length", "type"
+    )
+    for namespace, ip_version, network, broadcast, prefix_length, prefix_type in rows.iterator(
+        chunk_size=AUDIT_CHUNK_SIZE
+    ):
+        yield PrefixRow(
+            namespace,
+            ip_version,
+            address_to_int(network),
+            address_to_int(broadcast),
+            prefix_length,
+            prefix_type,
+            f"{network}/{prefix_length}",
+        )
+
+
+def _describe(row: PrefixRow, other: PrefixRow) -> Optional[str]:
+    """Return the finding for a Prefix contained in ``other``, or None if the nesting is expected."""
+    if other.namespace != row.namespace:
+        if (other.first, other.prefix_length) == (row.first, row.prefix_length):
+            return "Duplicate in another namespace"
+        return "Overlaps a prefix in another namespace"
+    if row.type not in PREFIX_ALLOWED_CHILD_TYPES.get(other.type, ()):
+        return f"{row.type.title()} nested in a {other.type}"
+    return None
+
+
+def iter_overlaps(rows: Iterable[PrefixRow], across_namespaces: bool = True) -> Iterator[Overlap]:
+    """Yield the overlaps among Prefixes given in sweep order.
+
+    Each Prefix is compared with its closest containing Prefix in the same namespace, which is reported if the
+    nesting is not allowed for their types (e.g. a network within a network), and, if ``across_namespaces``, with
+    its closest containing or duplicate Prefix in any other namespace. Duplicates within a namespace cannot exist.
+    """
+    stack: List[PrefixRow] = []
+    for row in rows:
+        while stack and (stack[-1].ip_version != row.ip_version or stack[-1].last < row.first):
+            stack.pop()
+        parent: Optional[PrefixRow] = None
+        other: Optional[PrefixRow] = None
+        for ancestor in reversed(stack):
+            if ancestor.namespace == row.namespace:
+                parent = parent or ancestor
+            elif other is None:
+                other = ancestor
+            if parent is not None and (other is not None or not across_namespaces):
+                break
+        for container in (other if across_namespaces else None, parent):
+            finding = container and _describe(row, container)
+            if finding:
+                yield Overlap(row, container, finding)
+        stack.append(row)
+
+
+def find_overlaps(prefixes: QuerySet[Prefix], across_namespaces: bool = True) -> Iterator[Overlap]:
+    """Stream the overlaps among the Prefixes of a queryset, from a single ordered query."""
+    return iter_overlaps(iter_prefix_rows(prefixes), across_namespaces)
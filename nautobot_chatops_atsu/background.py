@@ -0,0 +1,77 @@
+"""Background execution of expensive atsu commands.
+
+Chat commands run in the Celery worker that also answers every other chat interaction, so a command streaming a
+very large result would hold up the commands queued behind it. Commands whose result is estimated to exceed the
+``background_threshold`` setting are therefore re-enqueued to the Celery queue named by the ``background_queue``
+setting, which can be served by dedicated workers. The user is acknowledged straight away, long running steps
+report their progress, and the command is logged with its final status once it completes in the background.
+"""
+
+import importlib
+import time
+from typing import Iterable, Iterator, Optional, Sequence, TypeVar
+
+from django.conf import settings
+from nautobot.core.celery import nautobot_task
+
+from .buffering import flush_output, handle_buffered_subcommands, unwrap_dispatcher
+
+T = TypeVar("T")
+
+# Context key marking a command that already runs in the background, so that it is not enqueued again.
+BACKGROUND_CONTEXT_KEY = "atsu_background"
+
+# Seconds between progress messages of long running steps.
+PROGRESS_INTERVAL = 30
+
+
+@nautobot_task
+def run_in_background(
+    subcommand: str, params: Sequence[Optional[str]], dispatcher_module: str, dispatcher_name: str, context: dict
+):
+    """Run an atsu subcommand, logging it with its final status as any other command."""
+    dispatcher_class = getattr(importlib.import_module(dispatcher_module), dispatcher_name)
+    return handle_buffered_subcommands(
+        "atsu",
+        subcommand,
+        params=params,
+        dispatcher_class=dispatcher_class,
+        context={**context, BACKGROUND_CONTEXT_KEY: True},
+    )
+
+
+def offload_command(dispatcher, subcommand: str, params: Sequence[Optional[str]], estimated_rows: int) -> bool:
+    """Enqueue a subcommand to run in the background if its result is estimated to be too large to run inline.
+
+    Returns:
+        bool: True if the command was enqueued, in which case the caller should return False so that it is only
+        logged once it completes
+    """
+    config = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]
+    threshold = config["background_threshold"]
+    if threshold is None or estimated_rows <= threshold or dispatcher.context.get(BACKGROUND_CONTEXT_KEY):
+        return False
+
+    dispatcher_class = type(unwrap_dispatcher(dispatcher))
+    run_in_background.apply_async(
+        args=(subcommand, list(params), dispatcher_class.__module__, dispatcher_class.__name__, dispatcher.context),
+        queue=config["background_queue"],
+    )
+    dispatcher.send_markdown(
+        f"**About {estimated_rows} rows to go through, so I'm working on it in the background. "
+        "I'll post the result here when it's ready.**"
+    )
+    return True
+
+
+def iter_with_progress(
+    items: Iterable[T], dispatcher, message: str, interval: float = PROGRESS_INTERVAL
+) -> Iterator[T]:
+    """Yield items, sending ``message`` formatted with the number of items so far every ``interval`` seconds."""
+    deadline = time.monotonic() + interval
+    for count, item in enumerate(items):
+        if time.monotonic() >= deadline:
+            dispatcher.send_markdown(message.format(count=count))
+            flush_output(dispatcher)
+            deadline = time.monotonic() + interval
+        yield item
@@ -0,0 +1,474 @@
+"""Benchmarks comparing the app's in-memory algorithms with the equivalent ORM queries.
+
+Benchmarks run against the Prefixes already in the database, so that results reflect a real deployment. Run them
+with ``nautobot-server atsu_benchmark``, or ``invoke benchmark``. The ``commands`` benchmark instead runs atsu
+commands against a dataset it generates with ``generate_ipam_data()`` and rolls back afterwards.
+
+Results can be saved as JSON and compared with a baseline saved earlier, in which case any regression beyond a
+tolerance fails the run.
+"""
+
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import netaddr
+import requests
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import RIR, VLAN, VRF, Namespace, Prefix
+from nautobot.tenancy.models import Tenant
+
+from .allocation import get_available_subnets
+from .api_stub import StubAPIServer
+from .atsu import NautobotChatopsAtsu
+from .audit import PrefixRow, iter_overlaps
+from .buffering import DEFAULT_MESSAGE_SIZE_LIMIT, BufferedDispatcher
+from .cache import bump_model_version
+from .export import export_file, export_filename
+from .helpers import (
+    PREFIX_TABLE_COLUMNS,
+    Mock_Dispatcher,
+    iter_markdown_table_chunks,
+    send_export,
+)
+from .intervals import ADDRESS_BITS, address_to_int, int_to_address
+from .lookup import build_prefix_index, resolve_addresses
+from .signals import CACHED_MODELS
+from .synthetic import RIR_NAMES, ROLE_NAMES, STATUS_WEIGHTS, generate_ipam_data
+
+
+class BenchmarkResult(NamedTuple):
+    """The time taken by ``calls`` calls of one implementation, and what commands measure beyond that.
+
+    ``queries`` is the number of SQL queries, ``rows`` the number of table rows rendered, ``bytes_sent`` the size of
+    the chat output and ``peak_memory`` the peak of memory allocated by Python, in bytes.
+    """
+
+    name: str
+    calls: int
+    seconds: float
+    queries: Optional[int] = None
+    rows: Optional[int] = None
+    bytes_sent: Optional[int] = None
+    peak_memory: Optional[int] = None
+
+    @property
+    def per_call(self) -> float:
+        """Return the mean time per call, in seconds."""
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+def time_calls(name: str, function: Callable, arguments: Sequence[tuple]) -> BenchmarkResult:
+    """Call a function once per argument tuple and return the total time taken."""
+    start = time.perf_counter()
+    for args in arguments:
+        function(*args)
+    return BenchmarkResult(name, len(arguments), time.perf_counter() - start)
+
+
+def sample_addresses(count: int, seed: int = 0) -> List[str]:
+    """Return random addresses, each within a randomly selected Prefix."""
+    rng = random.Random(seed)  # noqa: S311
+    rows = Prefix.objects.order_by("?").values_list("network", "broadcast", "ip_version")[:count]
+    return [
+        int_to_address(rng.randint(address_to_int(network), address_to_int(broadcast)), ip_version)
+        for network, broadcast, ip_version in rows
+    ]
+
+
+def _orm_lookup(address: str) -> Dict[str, List[str]]:
+    """Look up the Prefixes containing an address with a database query, as ``lookup_address()`` does in memory."""
+    matches: Dict[str, List[str]] = {}
+    rows = Prefix.objects.net_contains_or_equals(address).order_by("prefix_length").values_list("pk", "namespace_id")
+    for pk, namespace_id in rows:
+        matches.setdefault(str(namespace_id), []).append(str(pk))
+    return matches
+
+
+def benchmark_lookup(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Compare longest-prefix-match lookups in the radix index with ``net_contains_or_equals`` queries."""
+    addresses = sample_addresses(sample_size, seed)
+    results = [time_calls("lookup: build index", build_prefix_index, [()])]
+    index = build_prefix_index()
+    parsed = [(int(ip), ip.version) for ip in map(netaddr.IPAddress, addresses)]
+    results.append(time_calls("lookup: radix index", index.lookup, parsed))
+    results.append(time_calls("lookup: ORM net_contains_or_equals", _orm_lookup, [(address,) for address in addresses]))
+    return results
+
+
+def benchmark_bulk_lookup(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Compare resolving a batch of addresses with sorted ranges and binary search to one query per address."""
+    addresses = [netaddr.IPAddress(address) for address in sample_addresses(sample_size, seed)]
+    return [
+        time_calls("bulk-lookup: sorted ranges", resolve_addresses, [(Prefix.objects.all(), addresses)]),
+        time_calls("bulk-lookup: ORM per address", _orm_lookup, [(str(address),) for address in addresses]),
+    ]
+
+
+def _nautobot_available_subnets(parent: Prefix, prefix_length: int, count: int) -> List[str]:
+    """Find free subnets with ``Prefix.get_available_prefixes()``, as ``get_available_subnets()`` does."""
+    subnets = []
+    for cidr in parent.get_available_prefixes().iter_cidrs():
+        if cidr.prefixlen <= prefix_length:
+            subnets.extend(str(subnet) for _, subnet in zip(range(count - len(subnets)), cidr.subnet(prefix_length)))
+        if len(subnets) >= count:
+            break
+    return subnets
+
+
+def benchmark_available_subnets(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:  # pylint: disable=unused-argument
+    """Compare the free subnet sweep with Nautobot's ``get_available_prefixes()`` on the Prefix with most children."""
+    parent = Prefix.objects.annotate(child_count=Count("children")).order_by("-child_count").first()
+    if parent is None:
+        return []
+    prefix_length = min(parent.prefix_length + 8, ADDRESS_BITS[parent.ip_version])
+    arguments = [(parent, prefix_length, 10)] * max(1, sample_size // 100)
+    return [
+        time_calls("available-subnets: sweep", get_available_subnets, arguments),
+        time_calls("available-subnets: get_available_prefixes", _nautobot_available_subnets, arguments),
+    ]
+
+
+# Number of Prefixes in the synthetic dataset of the audit-overlaps benchmark.
+SYNTHETIC_PREFIX_COUNT = 500_000
+
+
+def synthetic_prefix_rows(count: int, seed: int = 0, namespaces: int = 4) -> List[PrefixRow]:
+    """Return random IPv4 Prefixes spread over several namespaces, without touching the database."""
+    rng = random.Random(seed)  # noqa: S311
+    types = ("container", "network", "pool")
+    rows = []
+    for _ in range(count):
+        prefix_length = rng.randint(8, 30)
+        size = 2 ** (32 - prefix_length)
+        first = rng.randrange(0, 2**32, size)
+        rows.append(
+            PrefixRow(
+                f"namespace-{rng.randrange(namespaces)}",
+                4,
+                first,
+                first + size - 1,
+                prefix_length,
+                rng.choice(types),
+                f"{int_to_address(first, 4)}/{prefix_length}",
+            )
+        )
+    return rows
+
+
+def _sweep_overlaps(rows: List[PrefixRow]) -> int:
+    """Sort synthetic Prefixes as the database would and count their overlaps with ``iter_overlaps()``."""
+    ordered = sorted(rows, key=lambda row: (row.ip_version, row.first, row.prefix_length))
+    return sum(1 for _ in iter_overlaps(ordered))
+
+
+def _pairwise_overlaps(rows: List[PrefixRow]) -> int:
+    """Count overlapping pairs of Prefixes by comparing every pair, as per-Prefix containment queries would."""
+    return sum(
+        1
+        for index, row in enumerate(rows)
+        for other in rows[index + 1 :]
+        if row.ip_version == other.ip_version and row.first <= other.last and other.first <= row.last
+    )
+
+
+def benchmark_audit_overlaps(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Compare the overlap sort-sweep over a synthetic dataset with pairwise comparison of a sample of it."""
+    rows = synthetic_prefix_rows(SYNTHETIC_PREFIX_COUNT, seed)
+    return [
+        time_calls(f"audit-overlaps: sort-sweep ({len(rows)} prefixes)", _sweep_overlaps, [(rows,)]),
+        time_calls(f"audit-overlaps: pairwise ({sample_size} prefixes)", _pairwise_overlaps, [(rows[:sample_size],)]),
+    ]
+
+
+# Number of rows in the synthetic dataset of the export benchmark.
+SYNTHETIC_EXPORT_ROWS = 200_000
+
+
+def synthetic_table_rows(count: int, seed: int = 0) -> Iterator[List[str]]:
+    """Yield random IPv4 Prefix table rows, as ``iter_table_rows()`` renders them, without touching the database."""
+    rng = random.Random(seed)  # noqa: S311
+    for index in range(count):
+        prefix_length = rng.randint(8, 30)
+        first = rng.randrange(0, 2**32, 2 ** (32 - prefix_length))
+        yield [f"{int_to_address(first, 4)}/{prefix_length}", "Active", "", f"namespace-{index % 4}"]
+
+
+def _export_synthetic_rows(count: int, seed: int, export_format: str) -> int:
+    """Export synthetic rows to a compressed file and upload it to a mock dispatcher."""
+    headers = [column.header for column in PREFIX_TABLE_COLUMNS]
+    rows = synthetic_table_rows(count, seed)
+    with export_file(rows, headers, export_format, export_filename("prefixes", export_format)) as (path, exported):
+        Mock_Dispatcher().send_image(path)
+    return exported
+
+
+def _send_synthetic_table(count: int, seed: int) -> int:
+    """Send synthetic rows as markdown table messages to a mock dispatcher, as chat output would."""
+    dispatcher = Mock_Dispatcher()
+    headers = [column.header for column in PREFIX_TABLE_COLUMNS]
+    for markdown in iter_markdown_table_chunks(headers, synthetic_table_rows(count, seed), DEFAULT_MESSAGE_SIZE_LIMIT):
+        dispatcher.send_markdown(markdown)
+    return len(dispatcher.sent_markdowns)
+
+
+def benchmark_export(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:  # pylint: disable=unused-argument
+    """Compare exporting a synthetic dataset as gzip CSV and JSON with sending it as markdown tables.
+
+    Exports of the Prefixes in the database, streamed with ``QuerySet.iterator()``, are timed as well. Uploads go to
+    ``Mock_Dispatcher``, so the results measure rendering and compression rather than the chat platform.
+    """
+    count = SYNTHETIC_EXPORT_ROWS
+    results = [
+        time_calls(f"export: csv.gz ({count} rows)", _export_synthetic_rows, [(count, seed, "csv")]),
+        time_calls(f"export: json.gz ({count} rows)", _export_synthetic_rows, [(count, seed, "json")]),
+        time_calls(f"export: markdown messages ({count} rows)", _send_synthetic_table, [(count, seed)]),
+    ]
+    prefixes = Prefix.objects.all()
+    filename = export_filename("prefixes", "csv")
+    results.append(
+        time_calls(
+            f"export: database csv.gz ({prefixes.count()} rows)",
+            send_export,
+            [(Mock_Dispatcher(), prefixes, PREFIX_TABLE_COLUMNS, "csv", filename)],
+        )
+    )
+    return results
+
+
+# Rows in the table of the dispatch benchmark, a typical filtered get-prefixes result.
+DISPATCH_TABLE_ROWS = 20
+
+# Simulated round trip time of a chat platform API call, in seconds.
+SIMULATED_API_LATENCY = 0.05
+
+
+class _LatencyDispatcher(Mock_Dispatcher):
+    """Mock dispatcher that takes ``SIMULATED_API_LATENCY`` per message, as a chat platform API call would."""
+
+    def send_markdown(self, markdown: str) -> None:
+        time.sleep(SIMULATED_API_LATENCY)
+        super().send_markdown(markdown)
+
+    def send_blocks(self, blocks) -> None:
+        time.sleep(SIMULATED_API_LATENCY)
+        super().send_blocks(blocks)
+
+
+def _send_prefixes_output(dispatcher, seed: int) -> None:
+    """Send the messages of a get-prefixes response with a table of synthetic rows, as ``get_prefixes()`` does."""
+    dispatcher.send_markdown("Command /atsu get-prefixes received with filter type 'status' and filter value 'active'")
+    dispatcher.send_blocks(
+        dispatcher.command_response_header("atsu", "get-prefixes", [("Filter type", "status")], "Prefixes list", None)
+    )
+    dispatcher.send_markdown("**Showing prefixes filtered by 'status active'**")
+    headers = [column.header for column in PREFIX_TABLE_COLUMNS]
+    rows = synthetic_table_rows(DISPATCH_TABLE_ROWS, seed)
+    for markdown in iter_markdown_table_chunks(headers, rows, DEFAULT_MESSAGE_SIZE_LIMIT):
+        dispatcher.send_markdown(markdown)
+
+
+def _send_buffered_prefixes_output(dispatcher, seed: int) -> None:
+    """Send the messages of a get-prefixes response through a ``BufferedDispatcher``."""
+    buffered = BufferedDispatcher(dispatcher)
+    _send_prefixes_output(buffered, seed)
+    buffered.flush()
+
+
+def benchmark_dispatch(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Compare sending a get-prefixes response message by message with sending it through ``BufferedDispatcher``.
+
+    Each platform API call is simulated by a ``SIMULATED_API_LATENCY`` delay, and the number of API calls is
+    included in the result names. Only ``sample_size // 100`` responses are sent, as each takes a few round trips.
+    """
+    results = []
+    for label, send in (("direct", _send_prefixes_output), ("buffered", _send_buffered_prefixes_output)):
+        dispatchers = [_LatencyDispatcher() for _ in range(max(sample_size // 100, 1))]
+        result = time_calls(label, send, [(dispatcher, seed) for dispatcher in dispatchers])
+        api_calls = len(dispatchers[0].sent_markdowns) + len(dispatchers[0].sent_blocks)
+        results.append(result._replace(name=f"dispatch: {label} ({api_calls} API calls per response)"))
+    return results
+
+
+# Path and size of the document served by the stand-in API of the api benchmark.
+API_BENCHMARK_PATH = "/prefixes/"
+API_BENCHMARK_ROWS = 1000
+
+
+def _unpooled_get_json(url: str) -> dict:
+    """Fetch a JSON document on a new connection, without revalidation, as a client without a session would."""
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def benchmark_api(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Compare fetching a document from a local stand-in API with a new connection per request to the shared client.
+
+    The shared client keeps its connection alive and revalidates the unchanged document by its ETag. Only
+    ``sample_size // 10`` requests are sent per implementation, as each is a real HTTP round trip.
+    """
+    fields = ("prefix", "status", "role", "namespace")
+    document = {"results": [dict(zip(fields, row)) for row in synthetic_table_rows(API_BENCHMARK_ROWS, seed)]}
+    calls = max(sample_size // 10, 1)
+    with StubAPIServer({API_BENCHMARK_PATH: document}) as server:
+        client = NautobotChatopsAtsu(server.url)
+        return [
+            time_calls(
+                "api: new connection per request", _unpooled_get_json, [(server.url + API_BENCHMARK_PATH,)] * calls
+            ),
+            time_calls("api: shared client", client.get_json, [(API_BENCHMARK_PATH,)] * calls),
+        ]
+
+
+# Filter types run by the commands benchmark.
+COMMAND_BENCHMARK_FILTERS = ("all", "status", "role", "namespace", "vlan", "tenant", "rir", "vrf", "parent", "type")
+
+
+def benchmark_filter_values(label: str) -> Dict[str, str]:
+    """Return a value matching some of the Prefixes generated by ``generate_ipam_data()`` with ``label``.
+
+    Returns:
+        dict: a value for each filter type of ``COMMAND_BENCHMARK_FILTERS``, the first generated object it filters by
+    """
+    generated = {"name__startswith": f"{label}-"}
+    values = {
+        "status": Status.objects.filter(name=next(iter(STATUS_WEIGHTS))),
+        "role": Role.objects.filter(name=ROLE_NAMES[0]),
+        "rir": RIR.objects.filter(name=RIR_NAMES[0]),
+        "namespace": Namespace.objects.filter(**generated),
+        "vrf": VRF.objects.filter(**generated),
+        "vlan": VLAN.objects.filter(**generated),
+        "tenant": Tenant.objects.filter(**generated),
+    }
+    pks = {key: str(queryset.order_by("name").values_list("pk", flat=True).first()) for key, queryset in values.items()}
+    parent = Prefix.objects.filter(namespace__name__startswith=f"{label}-", prefix_length=16).order_by("network")
+    pks["parent"] = str(parent.values_list("pk", flat=True).first())
+    return {"all": "", "type": PrefixTypeChoices.TYPE_NETWORK, **pks}
+
+
+def _rendered_rows(markdowns: Sequence[str]) -> int:
+    """Return the number of table rows, without headers, in markdown messages."""
+    rows = 0
+    for markdown in markdowns:
+        table_lines = [line for line in markdown.splitlines() if line.startswith("|")]
+        rows += max(len(table_lines) - 2, 0)
+    return rows
+
+
+def _bytes_sent(dispatcher: Mock_Dispatcher) -> int:
+    """Return the size of everything sent to a mock dispatcher, with blocks and prompts serialized as JSON."""
+    sent: List[Any] = [*dispatcher.sent_markdowns, *dispatcher.errors, *dispatcher.warnings]
+    size = sum(len(text.encode()) for text in sent) + sum(len(content) for _, content in dispatcher.uploads)
+    return size + len(json.dumps([dispatcher.sent_blocks, dispatcher.prompts], default=str).encode())
+
+
+def _measure_command(name: str, command: Callable, user, *args: Optional[str]) -> BenchmarkResult:
+    """Run an atsu command once with a mock dispatcher and measure it.
+
+    Memory is traced with ``tracemalloc`` while the command runs, which slows it down, so the wall time is only
+    comparable with that of other results measured the same way.
+    """
+    dispatcher = Mock_Dispatcher({"user": user, "channel_id": f"atsu-benchmark-{uuid.uuid4()}"})
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            command(dispatcher, *args)
+            seconds = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(
+        name,
+        1,
+        seconds,
+        queries=len(queries),
+        rows=_rendered_rows(dispatcher.sent_markdowns),
+        bytes_sent=_bytes_sent(dispatcher),
+        peak_memory=peak_memory,
+    )
+
+
+def benchmark_commands(sample_size: int = 1000, seed: int = 0) -> List[BenchmarkResult]:
+    """Run get-prefixes with every filter type against ``sample_size`` Prefixes from ``generate_ipam_data()``.
+
+    The dataset is created in a transaction that is rolled back afterwards, after which the cache versions of every
+    cached model are bumped, so that nothing computed from the dataset is read again.
+    """
+    from .worker import get_prefixes  # pylint: disable=import-outside-toplevel
+
+    label = f"atsu-benchmark-{uuid.uuid4().hex[:8]}"
+    results = []
+    try:
+        with transaction.atomic():
+            generate_ipam_data(sample_size, seed=seed, label=label)
+            values = benchmark_filter_values(label)
+            user = get_user_model().objects.create(username=label, is_superuser=True)
+            for filter_type in COMMAND_BENCHMARK_FILTERS:
+                results.append(
+                    _measure_command(
+                        f"commands: get-prefixes {filter_type}",
+                        get_prefixes,
+                        user,
+                        filter_type,
+                        values[filter_type] or None,
+                    )
+                )
+            transaction.set_rollback(True)
+    finally:
+        for model in CACHED_MODELS:
+            bump_model_version(model)
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[..., List[BenchmarkResult]]] = {
+    "lookup": benchmark_lookup,
+    "bulk-lookup": benchmark_bulk_lookup,
+    "available-subnets": benchmark_available_subnets,
+    "audit-overlaps": benchmark_audit_overlaps,
+    "export": benchmark_export,
+    "dispatch": benchmark_dispatch,
+    "api": benchmark_api,
+    "commands": benchmark_commands,
+}
+
+
+def result_to_dict(result: BenchmarkResult) -> Dict[str, Any]:
+    """Return a benchmark result as a JSON serializable dict, without the metrics it does not measure."""
+    values = {key: value for key, value in result._asdict().items() if value is not None}
+    values["per_call"] = result.per_call
+    return values
+
+
+def compare_to_baseline(
+    results: Sequence[Dict[str, Any]], baseline: Sequence[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Return a description of each regression of results from a baseline, in the format of ``result_to_dict()``.
+
+    Timings, bytes sent and peak memory regress when they exceed the baseline by more than ``tolerance`` (a
+    fraction of the baseline); query counts regress when they grow at all, and rendered rows when they change.
+    Results without a baseline, and baselines without results, are ignored.
+    """
+    baselines = {entry["name"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        expected = baselines.get(result["name"])
+        if expected is None:
+            continue
+        for metric in ("per_call", "bytes_sent", "peak_memory"):
+            if metric in result and metric in expected and result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{result['name']}: {metric} {result[metric]:.6g} > baseline {expected[metric]:.6g}")
+        if result.get("queries", 0) > expected.get("queries", result.get("queries", 0)):
+            regressions.append(f"{result['name']}: {result['queries']} queries > baseline {expected['queries']}")
+        if result.get("rows") != expected.get("rows"):
+            regressions.append(f"{result['name']}: {result.get('rows')} rows != baseline {expected.get('rows')}")
+    return regressions
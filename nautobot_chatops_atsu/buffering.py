@@ -0,0 +1,134 @@
+"""Buffering of chat output per command.
+
+Every message a command sends is an HTTP round trip to the chat platform, and a typical command sends several small
+ones in a row: the command echo, the response header and a title ahead of the table itself. Commands are therefore
+run with their dispatcher wrapped in ``BufferedDispatcher``, which holds messages back and merges consecutive
+markdown messages (and consecutive blocks) into as few platform messages as fit in the platform's size limit. The
+buffer is flushed when the command completes, before anything else is sent (such as a prompt, an error or a file
+upload), and at explicit flush points such as progress messages.
+
+Markdown and blocks are not merged with each other, as chat platforms limit the size of text in blocks far more
+than that of plain messages.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from nautobot_chatops.workers import handle_subcommands
+
+# Maximum characters per chat message, per dispatcher platform_slug.
+MESSAGE_SIZE_LIMITS: Dict[str, int] = {
+    "mattermost": 16383,
+    "slack": 4000,
+    "webex": 7439,
+    "microsoft_teams": 28000,
+}
+DEFAULT_MESSAGE_SIZE_LIMIT = 4000
+
+# Maximum number of blocks merged into one message; Slack rejects messages with more than 50.
+MAX_MERGED_BLOCKS = 50
+
+# Dispatcher methods that send to the chat platform directly, and so must send any buffered output first.
+SENDING_METHOD_PREFIXES = ("send_", "prompt_", "ask_", "multi_input_")
+
+# Separator between merged markdown messages, so that tables and paragraphs still render separately.
+MARKDOWN_SEPARATOR = "\n\n"
+
+
+def message_size_limit(dispatcher) -> int:
+    """Return the maximum message size supported by the dispatcher's chat platform."""
+    return MESSAGE_SIZE_LIMITS.get(getattr(dispatcher, "platform_slug", None), DEFAULT_MESSAGE_SIZE_LIMIT)
+
+
+class BufferedDispatcher:
+    """Wrap a dispatcher, merging the consecutive messages sent through it into as few platform messages as fit.
+
+    Attributes and methods that are not buffered are passed through to the wrapped ``dispatcher``.
+    """
+
+    def __init__(self, dispatcher) -> None:
+        """Wrap a dispatcher."""
+        self.dispatcher = dispatcher
+        self.max_size = message_size_limit(dispatcher)
+        self._markdown: List[str] = []
+        self._blocks: List[Any] = []
+        self._ephemeral: Optional[bool] = None
+
+    def __getattr__(self, name: str) -> Any:
+        """Return an attribute of the wrapped dispatcher, flushing the buffer before any method that sends."""
+        attribute = getattr(self.dispatcher, name)
+        if not callable(attribute) or not name.startswith(SENDING_METHOD_PREFIXES):
+            return attribute
+
+        def send(*args, **kwargs):
+            self.flush()
+            return attribute(*args, **kwargs)
+
+        return send
+
+    def send_markdown(self, message: str, ephemeral: Optional[bool] = None) -> None:
+        """Buffer a markdown message, sending the buffer first if the message does not fit in it."""
+        size = sum(len(markdown) + len(MARKDOWN_SEPARATOR) for markdown in self._markdown) + len(message)
+        if self._blocks or ephemeral != self._ephemeral or size > self.max_size:
+            self.flush()
+        self._markdown.append(message)
+        self._ephemeral = ephemeral
+
+    def send_blocks(self, blocks: List[Any], ephemeral: Optional[bool] = None, **kwargs) -> None:
+        """Buffer blocks, unless they are sent with options (such as a modal dialog) that are not merged."""
+        if (
+            kwargs
+            or self._markdown
+            or ephemeral != self._ephemeral
+            or len(self._blocks) + len(blocks) > MAX_MERGED_BLOCKS
+        ):
+            self.flush()
+        if kwargs:
+            self._send(self.dispatcher.send_blocks, blocks, ephemeral, **kwargs)
+            return
+        self._blocks.extend(blocks)
+        self._ephemeral = ephemeral
+
+    def flush(self) -> None:
+        """Send the buffered output."""
+        markdown, blocks = self._markdown, self._blocks
+        self._markdown, self._blocks = [], []
+        if markdown:
+            self._send(self.dispatcher.send_markdown, MARKDOWN_SEPARATOR.join(markdown), self._ephemeral)
+        if blocks:
+            self._send(self.dispatcher.send_blocks, blocks, self._ephemeral)
+
+    @staticmethod
+    def _send(method, content: Any, ephemeral: Optional[bool], **kwargs) -> None:
+        """Send content, passing ``ephemeral`` only if it was given, as some dispatchers do not take it."""
+        if ephemeral is not None:
+            kwargs["ephemeral"] = ephemeral
+        method(content, **kwargs)
+
+
+def flush_output(dispatcher) -> None:
+    """Send the output buffered by a dispatcher, if it buffers output."""
+    if isinstance(dispatcher, BufferedDispatcher):
+        dispatcher.flush()
+
+
+def unwrap_dispatcher(dispatcher):
+    """Return the dispatcher wrapped by a ``BufferedDispatcher``, or the dispatcher itself."""
+    return dispatcher.dispatcher if isinstance(dispatcher, BufferedDispatcher) else dispatcher
+
+
+def handle_buffered_subcommands(command: str, subcommand: str, params=(), dispatcher_class=None, context=None):
+    """Run a subcommand with ``handle_subcommands()``, buffering its output until it completes."""
+    dispatchers: List[BufferedDispatcher] = []
+
+    def buffered_dispatcher(context=None) -> BufferedDispatcher:
+        dispatcher = BufferedDispatcher(dispatcher_class(context=context))
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    try:
+        return handle_subcommands(
+            command, subcommand, params=params, dispatcher_class=buffered_dispatcher, context=context
+        )
+    finally:
+        for dispatcher in dispatchers:
+            dispatcher.flush()
@@ -0,0 +1,73 @@
+"""Versioned caching shared by atsu commands.
+
+Cached values are never deleted explicitly. Instead every cache key embeds a version counter for each model the
+value was computed from, and the app's signal handlers bump a model's counter whenever one of its instances is
+saved or deleted. Stale entries are then simply never read again and age out of the cache on their own.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Type
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models import Model
+
+CACHE_KEY_PREFIX = "nautobot_chatops_atsu"
+
+
+def _seed_version() -> int:
+    """Return a clock based initial version counter.
+
+    Microseconds are used rather than nanoseconds so that counters stay below 2**53 and are returned exactly by
+    cache backends that increment through Lua scripts, where numbers are doubles.
+    """
+    return time.time_ns() // 1000
+
+
+def _version_key(model: Type[Model]) -> str:
+    """Return the cache key holding the version counter of a model."""
+    return f"{CACHE_KEY_PREFIX}:version:{model._meta.label_lower}"
+
+
+def get_model_versions(models: Iterable[Type[Model]]) -> Dict[str, int]:
+    """Return the current version counter of each model, keyed by model label, in a single cache round trip."""
+    keys = {_version_key(model): model._meta.label_lower for model in models}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        # Seed missing (or evicted) counters with a clock value so they never collide with a previous version.
+        cache.add(key, _seed_version(), timeout=None)
+        versions[key] = cache.get(key)
+    return {label: versions[key] for key, label in keys.items()}
+
+
+def bump_model_version(model: Type[Model]) -> Optional[int]:
+    """Invalidate every cached value that was computed from the given model.
+
+    Returns the new version counter, or None if the counter was missing and had to be seeded.
+    """
+    key = _version_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed_version(), timeout=None)
+        return None
+
+
+def make_cache_key(name: str, *parts: Any, models: Iterable[Type[Model]] = ()) -> str:
+    """Build a cache key from a name, arbitrary key parts and the current versions of the given models."""
+    versions = get_model_versions(models)
+    tokens = [CACHE_KEY_PREFIX, name, *(str(part) for part in parts)]
+    tokens.extend(f"{label}.{version}" for label, version in sorted(versions.items()))
+    return ":".join(tokens)
+
+
+def get_or_compute(
+    name: str,
+    compute: Callable[[], Any],
+    *parts: Any,
+    models: Iterable[Type[Model]] = (),
+    timeout: Optional[int] = DEFAULT_TIMEOUT,
+) -> Any:
+    """Return the cached value for a key, computing and storing it on a miss."""
+    key = make_cache_key(name, *parts, models=models)
+    return cache.get_or_set(key, compute, timeout=timeout)
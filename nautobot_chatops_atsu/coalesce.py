@@ -0,0 +1,76 @@
+"""Single-flight coalescing of identical concurrent atsu queries.
+
+During an incident many users tend to run the same command within seconds of each other. Rather than having
+each of them query the database and render the same output, the first request takes a lock in the cache (an
+atomic ``add``) and stores its rendered output under a result key, while identical requests arriving meanwhile
+wait for that result instead of computing it again. The first request does no extra work beyond taking the lock
+and storing its result.
+
+Requests are identified by the SQL of their queryset, in which both the filters and the permission constraints
+of the user appear, so only requests that would return the very same rows share a result.
+"""
+
+import hashlib
+import time
+from typing import Any, Callable, Iterable, Type, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.db.models.query import QuerySet
+
+from .cache import make_cache_key
+
+T = TypeVar("T")
+
+# Longest time in seconds that a request waits for an identical in-flight request before computing on its own.
+SINGLE_FLIGHT_WAIT = 30
+
+# Seconds between checks for the result of an in-flight request.
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+def queryset_fingerprint(queryset: QuerySet) -> str:
+    """Return a digest of the SQL statement and parameters of a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    return hashlib.sha256(f"{sql}\0{params!r}".encode()).hexdigest()
+
+
+def single_flight(
+    name: str,
+    compute: Callable[[], T],
+    *parts: Any,
+    models: Iterable[Type[Model]] = (),
+    wait: float = SINGLE_FLIGHT_WAIT,
+) -> T:
+    """Return the value computed by ``compute``, sharing a single computation among identical concurrent calls.
+
+    Calls are identical when ``name``, ``parts`` and the versions of ``models`` match. The value is kept for the
+    ``coalesce_timeout`` setting after it is computed, and must be serializable by the cache backend.
+    """
+    key = make_cache_key("flight", name, *parts, models=models)
+    result_key, lock_key = f"{key}:result", f"{key}:lock"
+    value = cache.get(result_key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    if cache.add(lock_key, True, timeout=wait):
+        try:
+            value = compute()
+            cache.set(result_key, value, settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["coalesce_timeout"])
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        found = cache.get_many([result_key, lock_key])
+        if result_key in found:
+            return found[result_key]
+        if lock_key not in found:
+            # the in-flight request failed, or its result already expired
+            break
+    return compute()
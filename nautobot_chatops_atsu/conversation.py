@@ -0,0 +1,52 @@
+"""State carried across the steps of multi-step atsu commands.
+
+Every menu selection or text reply re-enters a worker function from scratch, with nothing but the command
+arguments to go on. Results of earlier steps that would otherwise be recomputed, such as filter values resolved
+from names or the fact that a filter matched Prefixes, are kept per user and channel in the Django cache for a
+short time (the ``conversation_timeout`` setting) and read back by the next step with a single cache round trip.
+
+The state is a hint, never the source of truth: every step still runs its queries restricted to the user's
+permissions, and entries simply expire if the conversation is abandoned.
+"""
+
+import copy
+import weakref
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import CACHE_KEY_PREFIX
+
+
+class Conversation:
+    """The state of a user's commands in a channel."""
+
+    def __init__(self, user_pk: Any, channel: Any):
+        """Load the state of a conversation from the cache."""
+        self.key = f"{CACHE_KEY_PREFIX}:conversation:{user_pk}:{channel}"
+        self.state: Dict[str, Any] = cache.get(self.key) or {}
+        self._saved = copy.deepcopy(self.state)
+
+    def setdefault(self, name: str, default: Any) -> Any:
+        """Return an entry of the state, adding it with a default value if it is missing."""
+        return self.state.setdefault(name, default)
+
+    def save(self) -> None:
+        """Store the state for the next step, if it changed."""
+        if self.state == self._saved:
+            return
+        cache.set(self.key, self.state, settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["conversation_timeout"])
+        self._saved = copy.deepcopy(self.state)
+
+
+# Conversations are loaded once per dispatcher, i.e. once per step of a command.
+_conversations: "weakref.WeakKeyDictionary[Any, Conversation]" = weakref.WeakKeyDictionary()
+
+
+def get_conversation(dispatcher) -> Conversation:
+    """Return the conversation of the dispatcher's user and channel."""
+    if dispatcher not in _conversations:
+        user_pk = getattr(dispatcher.user, "pk", None)
+        _conversations[dispatcher] = Conversation(user_pk, dispatcher.context.get("channel_id"))
+    return _conversations[dispatcher]
@@ -0,0 +1,109 @@
+"""Concurrent delivery of output split over many messages.
+
+A large table is sent as many messages, and sending them one after the other costs one platform round trip each.
+With the ``send_concurrency`` setting above 1, the messages of a table are instead sent by that many threads at
+once. Messages may then reach the channel out of order, so each one is labelled with its sequence number. Sends
+rejected by rate limiting (HTTP 429) are retried after the delay given by their ``Retry-After`` header.
+
+Threads are used rather than an asyncio event loop: messages are rendered from querysets as they are sent, and
+Django does not allow database queries from a thread running an event loop. Only the sends run in the pool;
+rendering stays in the calling thread, at most ``send_concurrency`` messages ahead of the sends.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from http import HTTPStatus
+from itertools import chain
+from typing import Callable, Iterable, Optional, Set
+
+from django.conf import settings
+
+from .buffering import flush_output, message_size_limit, unwrap_dispatcher
+
+# Label prepended to each message sent concurrently, so that messages arriving out of order can be told apart.
+SEQUENCE_LABEL = "_Part {number}_\n"
+
+# Characters reserved in each message for its label, enough for a million messages.
+SEQUENCE_LABEL_SIZE = len(SEQUENCE_LABEL.format(number=10**6))
+
+# Number of times a rate limited send is retried before giving up.
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Seconds to wait before retrying a rate limited send that gives no valid Retry-After header.
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def send_concurrency() -> int:
+    """Return the number of messages sent at once, from the ``send_concurrency`` setting."""
+    return max(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["send_concurrency"] or 1, 1)
+
+
+def message_budget(dispatcher) -> int:
+    """Return the size available to the content of each message, leaving room for sequence labels if needed."""
+    size = message_size_limit(dispatcher)
+    return size - SEQUENCE_LABEL_SIZE if send_concurrency() > 1 else size
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Return the delay requested by a rate limiting (HTTP 429) error, or None for any other error.
+
+    Errors of the ``requests`` and Slack clients carry the HTTP response as their ``response`` attribute.
+    """
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != HTTPStatus.TOO_MANY_REQUESTS:
+        return None
+    try:
+        return max(float((getattr(response, "headers", None) or {}).get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def _send_with_retries(send: Callable[[str], None], message: str) -> None:
+    """Send a message, retrying it after the requested delay as long as it is rate limited."""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            send(message)
+            return
+        except Exception as error:  # pylint: disable=broad-except
+            delay = retry_after(error)
+            if delay is None or attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            time.sleep(delay)
+
+
+def send_concurrently(send: Callable[[str], None], messages: Iterable[str], concurrency: int) -> int:
+    """Send messages with up to ``concurrency`` sends at once, each labelled with its sequence number.
+
+    Messages are consumed from ``messages`` as sends complete, so at most ``concurrency`` of them are held at once.
+    The first error other than rate limiting is raised once the sends in progress have completed.
+
+    Returns:
+        int: the number of messages sent
+    """
+    count = 0
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="atsu-send") as executor:
+        for count, message in enumerate(messages, 1):
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(_send_with_retries, send, SEQUENCE_LABEL.format(number=count) + message))
+        for future in pending:
+            future.result()
+    return count
+
+
+def send_markdown_messages(dispatcher, messages: Iterable[str]) -> None:
+    """Send markdown messages, concurrently if the ``send_concurrency`` setting allows and there are several."""
+    concurrency = send_concurrency()
+    iterator = iter(messages)
+    first = next(iterator, None)
+    second = next(iterator, None) if concurrency > 1 else None
+    if second is None:
+        for markdown in chain(() if first is None else (first,), iterator):
+            dispatcher.send_markdown(markdown)
+        return
+
+    flush_output(dispatcher)
+    send_concurrently(unwrap_dispatcher(dispatcher).send_markdown, chain((first, second), iterator), concurrency)
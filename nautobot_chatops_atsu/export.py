@@ -0,0 +1,84 @@
+"""Export of full command results as compressed file attachments.
+
+Results too large to read in chat can be exported with ``--export csv`` or ``--export json``. Rows are streamed
+from ``QuerySet.iterator()`` through a gzip writer into a temporary file, which is uploaded as a single attachment
+and deleted afterwards. Only one chunk of rows is held in memory at a time, so memory use does not grow with the
+size of the result.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+EXPORT_FORMATS = ("csv", "json")
+EXPORT_OPTION = "--export"
+
+# Number of rows fetched from the database per round trip when exporting.
+EXPORT_CHUNK_SIZE = 2000
+
+
+def parse_export_option(args: Iterable[Optional[str]]) -> Tuple[Optional[str], List[Optional[str]]]:
+    """Split an ``--export <format>`` (or ``--export=<format>``) option from command arguments.
+
+    Raises:
+        ValueError: if the format is missing or not supported
+    """
+    export_format = None
+    remaining: List[Optional[str]] = []
+    arguments = iter(args)
+    for arg in arguments:
+        option, separator, value = (arg or "").partition("=")
+        if option != EXPORT_OPTION:
+            remaining.append(arg)
+            continue
+        export_format = (value if separator else next(arguments, None) or "").lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}, not \"{export_format}\"")
+    return export_format, remaining
+
+
+def export_filename(name: str, export_format: str) -> str:
+    """Return the attachment file name of an export."""
+    # MS Teams silently fails to upload files with ":" in their names, so the timestamp has none.
+    return f"{name}_{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}.{export_format}.gz"
+
+
+def write_export(rows: Iterable[Sequence[str]], headers: Sequence[str], export_format: str, stream: BinaryIO) -> int:
+    """Write rows to a binary stream as gzip compressed CSV or JSON, and return the number of rows written.
+
+    JSON exports are an array of objects keyed by header, written one row at a time.
+    """
+    count = 0
+    with gzip.GzipFile(fileobj=stream, mode="wb") as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        if export_format == "csv":
+            writer = csv.writer(text)
+            writer.writerow(headers)
+            for count, row in enumerate(rows, 1):
+                writer.writerow(row)
+        else:
+            text.write("[")
+            for count, row in enumerate(rows, 1):
+                text.write(("," if count > 1 else "") + "\n" + json.dumps(dict(zip(headers, row))))
+            text.write("\n]\n")
+        text.flush()
+        text.detach()
+    return count
+
+
+@contextmanager
+def export_file(
+    rows: Iterable[Sequence[str]], headers: Sequence[str], export_format: str, filename: str
+) -> Iterator[Tuple[str, int]]:
+    """Write rows to a temporary compressed file, yielding its path and the number of rows, and delete it on exit."""
+    with tempfile.TemporaryDirectory(prefix="atsu-export-") as directory:
+        path = os.path.join(directory, filename)
+        with open(path, "wb") as stream:
+            count = write_export(rows, headers, export_format, stream)
+        yield path, count
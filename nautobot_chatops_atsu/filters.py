@@ -0,0 +1,215 @@
+"""Prefix filters of atsu commands.
+
+Filters are ``(filter_type, value)`` pairs, given either as the ``filter_type`` and ``filter_value`` arguments of a
+command or as repeated ``type=value`` arguments. All pairs are folded into a single ``Q`` object, so related
+objects are matched by key within the Prefix query itself rather than fetched one by one beforehand.
+
+Values may be primary keys, as posted back by menus, or human readable values typed by the user (names, VLAN IDs or
+CIDRs). The latter are resolved with indexed exact matches first and prefix matches second, so that commands can
+be completed without a menu round trip; values matching several objects raise ``AmbiguousFilterValue`` with the
+candidates to offer instead.
+"""
+
+import shlex
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import netaddr
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.query import QuerySet
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import RIR, VLAN, VRF, Namespace, Prefix, VRFPrefixAssignment
+from nautobot.tenancy.models import Tenant
+
+from .menus import PREFIX_FILTER_CHOICES
+from .permissions import restrict
+
+PrefixFilter = Tuple[str, str]
+
+# Prefix foreign keys matched by the primary key given as filter value, per filter type.
+PREFIX_FILTER_FIELDS: Dict[str, str] = {
+    "status": "status",
+    "role": "role",
+    "namespace": "namespace",
+    "vlan": "vlan",
+    "tenant": "tenant",
+    "rir": "rir",
+    "parent": "parent",
+}
+
+
+# Largest number of candidates offered when a filter value matches several objects.
+MAX_CANDIDATES = 10
+
+
+class AmbiguousFilterValue(ValueError):
+    """A filter value that matches several objects."""
+
+    def __init__(self, filter_type: str, value: str, candidates: List[Tuple[str, str]], truncated: bool = False):
+        """Record the ``(label, pk)`` candidates matching a filter value, and whether more match than those."""
+        super().__init__(f'Several {filter_type} match "{value}"')
+        self.filter_type = filter_type
+        self.value = value
+        self.candidates = candidates
+        self.truncated = truncated
+
+
+def _by_name(queryset: Callable[[], QuerySet], field: str = "name") -> Callable[[str], List[QuerySet]]:
+    """Return a resolver matching a field exactly, then as a prefix, then as a case insensitive prefix."""
+    return lambda value: [
+        queryset().filter(**{field: value}),
+        queryset().filter(**{f"{field}__startswith": value}),
+        queryset().filter(**{f"{field}__istartswith": value}),
+    ]
+
+
+def _resolve_vlan(value: str) -> List[QuerySet]:
+    vlans = [VLAN.objects.filter(vid=int(value))] if value.isdigit() else []
+    return vlans + _by_name(VLAN.objects.all)(value)
+
+
+def _resolve_prefix(value: str) -> List[QuerySet]:
+    try:
+        network = netaddr.IPNetwork(value)
+    except (netaddr.AddrFormatError, ValueError):
+        return []
+    return [
+        Prefix.objects.filter(network=str(network.network), prefix_length=network.prefixlen).select_related("namespace")
+    ]
+
+
+# Querysets tried in turn to resolve a human readable value, and the candidate label of a match, per filter type.
+FILTER_VALUE_RESOLVERS: Dict[str, Tuple[Callable[[str], List[QuerySet]], Callable[[Any], str]]] = {
+    "status": (_by_name(PREFIX_FILTER_CHOICES["status"].queryset), str),
+    "role": (_by_name(PREFIX_FILTER_CHOICES["role"].queryset), str),
+    "namespace": (_by_name(Namespace.objects.all), str),
+    "vlan": (_resolve_vlan, lambda vlan: f"{vlan.name} ({vlan.vid})"),
+    "tenant": (_by_name(Tenant.objects.all), str),
+    "rir": (_by_name(RIR.objects.all), str),
+    "vrf": (_by_name(lambda: VRF.objects.select_related("namespace")), lambda vrf: f"{vrf.name} ({vrf.namespace})"),
+    "parent": (_resolve_prefix, lambda prefix: f"{prefix.cidr_str} ({prefix.namespace})"),
+}
+
+
+def _is_pk(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def resolve_filter_value(filter_type: str, value: str, user=None) -> str:
+    """Return the primary key (or, for the type filter, the choice value) identified by a filter value.
+
+    If ``user`` is given, only the objects the user may view are considered.
+
+    Raises:
+        AmbiguousFilterValue: if the value matches several objects
+        ValueError: if the value matches nothing
+    """
+    if filter_type == "type":
+        for choice_value, label in PrefixTypeChoices:
+            if value.lower() in (choice_value, label.lower()):
+                return choice_value
+        raise ValueError(f'type "{value}" not found')
+    if filter_type not in FILTER_VALUE_RESOLVERS or _is_pk(value):
+        return value
+
+    resolvers, label = FILTER_VALUE_RESOLVERS[filter_type]
+    for queryset in resolvers(value):
+        matches = list((queryset if user is None else restrict(queryset, user))[: MAX_CANDIDATES + 1])
+        if len(matches) == 1:
+            return str(matches[0].pk)
+        if matches:
+            candidates = [(label(match), str(match.pk)) for match in matches[:MAX_CANDIDATES]]
+            raise AmbiguousFilterValue(filter_type, value, candidates, len(matches) > MAX_CANDIDATES)
+    raise ValueError(f'{filter_type} "{value}" not found')
+
+
+def resolve_filters(
+    filters: Iterable[PrefixFilter], resolved: Optional[Dict[str, str]] = None, user=None
+) -> List[PrefixFilter]:
+    """Resolve the human readable values of filters into primary keys, among the objects ``user`` may view.
+
+    Values found in ``resolved``, keyed by ``type=value``, are reused without a query, and newly resolved values
+    are added to it.
+    """
+    resolved = {} if resolved is None else resolved
+    result = []
+    for filter_type, value in filters:
+        key = f"{filter_type}={value}"
+        if key not in resolved:
+            resolved[key] = resolve_filter_value(filter_type, value, user)
+        result.append((filter_type, resolved[key]))
+    return result
+
+
+def parse_filter_args(args: Iterable[Optional[str]]) -> Tuple[List[PrefixFilter], List[str]]:
+    """Split command arguments into ``type=value`` filters and the remaining arguments."""
+    filters: List[PrefixFilter] = []
+    remaining: List[str] = []
+    for arg in args:
+        if not arg:
+            continue
+        filter_type, separator, value = arg.partition("=")
+        if separator:
+            filters.append((filter_type.strip().lower(), value.strip()))
+        else:
+            remaining.append(arg)
+    return filters, remaining
+
+
+def _validate_pks(filter_type: str, values: Sequence[str]) -> None:
+    """Raise ValueError unless every value is a valid primary key."""
+    for value in values:
+        try:
+            uuid.UUID(value)
+        except ValueError as error:
+            raise ValueError(f'{filter_type} "{value}" not found') from error
+
+
+def build_prefix_filter(filters: Iterable[PrefixFilter], prefixes: Optional[QuerySet[Prefix]] = None) -> Q:
+    """Fold filters into a single ``Q`` object.
+
+    Different filter types must all match, while repeated values of the same filter type match any of them. If
+    ``prefixes`` is given, parent filters only match parents within it, such as the Prefixes a user may view.
+
+    Raises:
+        ValueError: if a filter type is not supported or a value is not valid for its filter type
+    """
+    grouped: Dict[str, List[str]] = {}
+    for filter_type, value in filters:
+        grouped.setdefault(filter_type, []).append(value)
+
+    query = Q()
+    # sorted, so that the same filters given in any order produce the same SQL
+    for filter_type, values in sorted((filter_type, sorted(set(values))) for filter_type, values in grouped.items()):
+        if filter_type == "type":
+            for value in values:
+                if value not in PrefixTypeChoices.values():
+                    raise ValueError(f'type "{value}" not found')
+            query &= Q(type__in=values)
+        elif filter_type == "vrf":
+            _validate_pks(filter_type, values)
+            # A semi-join, so that Prefixes assigned to several of the VRFs are not repeated.
+            query &= Q(Exists(VRFPrefixAssignment.objects.filter(prefix=OuterRef("pk"), vrf__in=values)))
+        elif filter_type == "parent" and prefixes is not None:
+            _validate_pks(filter_type, values)
+            query &= Q(parent__in=prefixes.filter(pk__in=values).values("pk"))
+        elif filter_type in PREFIX_FILTER_FIELDS:
+            _validate_pks(filter_type, values)
+            query &= Q(**{f"{PREFIX_FILTER_FIELDS[filter_type]}__in": values})
+        else:
+            raise ValueError(f"{filter_type} not supported")
+    return query
+
+
+def filter_prefixes(prefixes: QuerySet[Prefix], filters: Iterable[PrefixFilter]) -> QuerySet[Prefix]:
+    """Return the Prefixes of a queryset matching every filter, as a single query."""
+    return prefixes.filter(build_prefix_filter(filters, prefixes))
+
+
+def format_filters(filters: Iterable[PrefixFilter]) -> str:
+    """Render filters as ``type=value`` command arguments."""
+    return " ".join(shlex.quote(f"{filter_type}={value}") for filter_type, value in filters)
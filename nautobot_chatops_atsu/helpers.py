@@ -1,37 +1,386 @@
 """Helper functions for worker."""
 
-from typing import Any, Dict, List, Tuple
+import json
+import os
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
 from django.db.models.query import QuerySet
-from nautobot.ipam.models import Prefix
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import VRF, Namespace, Prefix, VRFPrefixAssignment
 
+from .audit import Overlap
+from .background import iter_with_progress
+from .coalesce import queryset_fingerprint, single_flight
+from .delivery import message_budget, send_markdown_messages
+from .export import EXPORT_CHUNK_SIZE, export_file
+from .lookup import resolve_addresses
+from .rendered import get_rendered, rendered_key, set_rendered
+from .tree import PrefixTreeNode, iter_tree_lines
+from .utilization import get_prefix_utilization
 
-def send_prefix_table(
-    dispatcher,
-    prefixes: QuerySet[Prefix],
-    filter_type: str
-) -> None:
-    """Send a table of Prefix records."""
-    dispatcher.send_markdown(f"**Showing prefixes filtered by '{filter_type}'**")
 
-    headers = ["Prefix", "Status", "Role", "Namespace"]
-    rows: list[list[str]] = []
-    for prefix in prefixes:
-        rows.append([
-            prefix.cidr_str,
-            prefix.status.name,
-            prefix.role.name if prefix.role else "",
-            prefix.namespace.name,
-        ])
+def _render_value(value: Any) -> str:
+    """Render a single field value as table cell text."""
+    return "" if value is None else str(value)
+
+
+def _render_cidr(network: str, prefix_length: int) -> str:
+    """Render a network address and prefix length as CIDR text."""
+    return f"{network}/{prefix_length}"
+
+
+class TableColumn(NamedTuple):
+    """A column of a chat table and the ORM field paths it is rendered from.
+
+    Each entry in ``fields`` is a Django lookup path such as ``"status__name"``; ``render`` is called with one
+    value per field and returns the cell text.
+    """
+
+    header: str
+    fields: Tuple[str, ...]
+    render: Callable[..., str] = _render_value
+
+
+def _render_optional(value: Any) -> str:
+    """Render a field value that may be unset as summary group text."""
+    return "(none)" if value is None else str(value)
+
+
+def _render_prefix_type(value: str) -> str:
+    """Render a Prefix type value as its display label."""
+    return dict(PrefixTypeChoices.CHOICES).get(value, value)
+
+
+# Number of rows fetched from the database per round trip when streaming a table.
+TABLE_ITERATOR_CHUNK_SIZE = 2000
+
+PREFIX_TABLE_COLUMNS: Tuple[TableColumn, ...] = (
+    TableColumn("Prefix", ("network", "prefix_length"), _render_cidr),
+    TableColumn("Status", ("status__name",)),
+    TableColumn("Role", ("role__name",)),
+    TableColumn("Namespace", ("namespace__name",)),
+)
+
+# Models whose changes alter the rendering of PREFIX_TABLE_COLUMNS, or which Prefixes a filter lists: VRF
+# filters match through VRFPrefixAssignments, which can be changed without saving the Prefix.
+PREFIX_TABLE_MODELS = (Prefix, Status, Role, Namespace, VRF, VRFPrefixAssignment)
+
+PREFIX_SUMMARY_COLUMNS: Tuple[TableColumn, ...] = (
+    TableColumn("Status", ("status__name",)),
+    TableColumn("Role", ("role__name",), _render_optional),
+    TableColumn("Namespace", ("namespace__name",)),
+    TableColumn("Type", ("type",), _render_prefix_type),
+)
+
+PREFIX_LOOKUP_COLUMNS: Tuple[TableColumn, ...] = (
+    TableColumn("Namespace", ("namespace__name",)),
+    TableColumn("Prefix", ("network", "prefix_length"), _render_cidr),
+    TableColumn("Status", ("status__name",)),
+    TableColumn("Type", ("type",), _render_prefix_type),
+)
+
 
+def table_fields(columns: Sequence[TableColumn]) -> List[str]:
+    """Return the distinct ORM field paths needed to render the given columns, in column order."""
+    fields: List[str] = []
+    for column in columns:
+        for field in column.fields:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def iter_table_rows(
+    queryset: QuerySet,
+    columns: Sequence[TableColumn],
+    chunk_size: Optional[int] = None,
+) -> Iterator[List[str]]:
+    """Yield rendered table rows for a queryset using a single projected query.
+
+    Only the fields declared by the columns are selected, and related fields (``status__name``) are joined
+    into the same statement, so the number of queries does not grow with the number of rows. When
+    ``chunk_size`` is given, rows are streamed from the database that many at a time instead of being cached.
+    """
+    fields = table_fields(columns)
+    positions = [[fields.index(field) for field in column.fields] for column in columns]
+    values_list = queryset.values_list(*fields)
+    if chunk_size:
+        values_list = values_list.iterator(chunk_size=chunk_size)
+    for values in values_list:
+        yield [
+            column.render(*(values[index] for index in indexes)) for column, indexes in zip(columns, positions)
+        ]
+
+
+def _markdown_table_header(headers: Sequence[str]) -> str:
+    """Return the header and separator lines of a markdown table."""
     header_line = "| " + " | ".join(headers) + " |"
     separator_line = "| " + " | ".join(["---"] * len(headers)) + " |"
-    table_lines = [header_line, separator_line]
+    return f"{header_line}\n{separator_line}"
+
+
+def render_markdown_table(headers: Sequence[str], rows: Iterable[Sequence[str]]) -> str:
+    """Render headers and rows as a markdown table."""
+    table_lines = [_markdown_table_header(headers)]
     for row in rows:
         table_lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(table_lines)
+
+
+def iter_markdown_table_chunks(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[str]],
+    max_size: int,
+) -> Iterator[str]:
+    """Render headers and rows as a series of markdown tables of at most ``max_size`` characters each.
+
+    Every chunk repeats the table header so it renders as a standalone table. Rows are consumed lazily, so only
+    one chunk is held in memory at a time. A single row longer than ``max_size`` is sent in a chunk of its own.
+    """
+    header = _markdown_table_header(headers)
+    lines: List[str] = []
+    size = len(header)
+    chunk_count = 0
+    for row in rows:
+        line = "| " + " | ".join(row) + " |"
+        if lines and size + len(line) + 1 > max_size:
+            yield "\n".join([header, *lines])
+            chunk_count += 1
+            lines = []
+            size = len(header)
+        lines.append(line)
+        size += len(line) + 1
+    if lines or not chunk_count:
+        yield "\n".join([header, *lines])
+
+
+def prefix_table_key(dispatcher, prefixes: QuerySet[Prefix]) -> str:
+    """Return the cache key of the rendered table of a Prefix queryset, as sent to the dispatcher's chat platform.
+
+    The key includes the ``max_table_rows`` setting, so that tables rendered under a larger limit are not sent
+    once it is lowered.
+    """
+    return rendered_key(
+        "prefix-table",
+        queryset_fingerprint(prefixes),
+        message_budget(dispatcher),
+        settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["max_table_rows"],
+        models=PREFIX_TABLE_MODELS,
+    )
+
+
+def get_cached_prefix_table(dispatcher, prefixes: QuerySet[Prefix]) -> Optional[List[str]]:
+    """Return the messages of a Prefix table cached by ``send_prefix_table``, or None if it has to be rendered."""
+    return get_rendered("prefix-table", prefix_table_key(dispatcher, prefixes))
+
+
+def _render_cached(key: str, messages: Iterable[str]) -> List[str]:
+    """Render messages and cache them under a key."""
+    rendered = list(messages)
+    set_rendered(key, rendered)
+    return rendered
+
+
+def send_prefix_table(  # noqa: PLR0913
+    dispatcher,
+    prefixes: QuerySet[Prefix],
+    filter_type: str,
+    chunk_size: int = TABLE_ITERATOR_CHUNK_SIZE,
+    coalesce: bool = False,
+    rendered: Optional[Sequence[str]] = None,
+) -> None:
+    """Send a table of Prefix records.
+
+    Rows are streamed from the database ``chunk_size`` at a time and sent as one or more messages sized to fit
+    the chat platform, each repeating the table header. With ``coalesce``, the messages are rendered once for
+    identical concurrent requests, shared among them and cached until a Prefix changes, so it should only be used
+    for tables of bounded size. ``rendered`` messages, as returned by ``get_cached_prefix_table``, are sent as is.
+    """
+    dispatcher.send_markdown(f"**Showing prefixes filtered by '{filter_type}'**")
+
+    messages: Iterable[str] = rendered or ()
+    if rendered is None:
+        headers = [column.header for column in PREFIX_TABLE_COLUMNS]
+        rows = iter_table_rows(prefixes, PREFIX_TABLE_COLUMNS, chunk_size=chunk_size)
+        messages = iter_markdown_table_chunks(headers, rows, message_budget(dispatcher))
+        if coalesce:
+            key = prefix_table_key(dispatcher, prefixes)
+            messages = single_flight("prefix-table", partial(_render_cached, key, messages), key)
+    send_markdown_messages(dispatcher, messages)
+
+
+def send_export(
+    dispatcher,
+    queryset: QuerySet,
+    columns: Sequence[TableColumn],
+    export_format: str,
+    filename: str,
+) -> int:
+    """Upload the rows of a queryset as a single compressed CSV or JSON attachment, and return the number of rows.
+
+    Rows are rendered as they would be in a chat table, but streamed ``EXPORT_CHUNK_SIZE`` at a time into a
+    temporary file instead of being sent as messages, with a progress message every ``PROGRESS_INTERVAL`` seconds.
+    """
+    headers = [column.header for column in columns]
+    rows = iter_with_progress(
+        iter_table_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE), dispatcher, "_Exported {count} rows so far..._"
+    )
+    with export_file(rows, headers, export_format, filename) as (path, count):
+        dispatcher.send_image(path)
+    return count
+
+
+def send_prefix_utilization(dispatcher, prefixes: QuerySet[Prefix], filter_type: str) -> None:
+    """Send a table of the utilization of Prefix records, computed in bulk."""
+    dispatcher.send_markdown(f"**Showing prefix utilization filtered by '{filter_type}'**")
+
+    rows = (
+        [
+            usage.prefix,
+            _render_prefix_type(usage.type),
+            f"{usage.numerator}/{usage.denominator}",
+            f"{usage.percent:.1f}%",
+        ]
+        for usage in get_prefix_utilization(prefixes)
+    )
+    headers = ["Prefix", "Type", "Used", "Utilization"]
+    send_markdown_messages(dispatcher, iter_markdown_table_chunks(headers, rows, message_budget(dispatcher)))
+
+
+def send_prefix_lookup(dispatcher, prefixes: QuerySet[Prefix], matches: Dict[str, List[str]]) -> int:
+    """Send the most specific matched Prefix of each namespace, and return the number of Prefixes sent.
+
+    ``matches`` maps namespace IDs to the primary keys of candidate Prefixes, most specific last. Candidates that
+    are not part of ``prefixes``, such as Prefixes the user may not view, give way to the next most specific one.
+    """
+    depths = {pk: depth for candidates in matches.values() for depth, pk in enumerate(candidates)}
+    best: Dict[str, str] = {}
+    for row in prefixes.filter(pk__in=list(depths)).values_list("pk", "namespace_id"):
+        pk, namespace_id = map(str, row)
+        if namespace_id not in best or depths[pk] > depths[best[namespace_id]]:
+            best[namespace_id] = pk
+    if not best:
+        return 0
+
+    rows = iter_table_rows(
+        prefixes.filter(pk__in=list(best.values())).order_by("namespace__name"), PREFIX_LOOKUP_COLUMNS
+    )
+    headers = [column.header for column in PREFIX_LOOKUP_COLUMNS]
+    send_markdown_messages(dispatcher, iter_markdown_table_chunks(headers, rows, message_budget(dispatcher)))
+    return len(best)
+
+
+def send_bulk_lookup(dispatcher, prefixes: QuerySet[Prefix], addresses: Sequence[Any]) -> int:
+    """Send the most specific Prefix containing each address, per namespace, and return how many addresses matched.
+
+    Addresses are listed in the order given; addresses not contained in any of ``prefixes`` are listed once with
+    an empty namespace.
+    """
+    results = resolve_addresses(prefixes, addresses)
+
+    def rows() -> Iterator[List[str]]:
+        for address, matches in zip(addresses, results):
+            if not matches:
+                yield [str(address), "", "(none)"]
+            for namespace, prefix in sorted(matches.items()):
+                yield [str(address), namespace, prefix]
+
+    chunks = iter_markdown_table_chunks(["Address", "Namespace", "Prefix"], rows(), message_budget(dispatcher))
+    send_markdown_messages(dispatcher, chunks)
+    return sum(1 for matches in results if matches)
 
-    markdown = "\n".join(table_lines)
-    dispatcher.send_markdown(markdown)
+
+def send_available_subnets(dispatcher, subnets: Sequence[str]) -> None:
+    """Send a table of free subnets."""
+    rows = ([subnet] for subnet in subnets)
+    send_markdown_messages(dispatcher, iter_markdown_table_chunks(["Available subnet"], rows, message_budget(dispatcher)))
+
+
+def send_overlaps(dispatcher, overlaps: Iterable[Overlap]) -> int:
+    """Send a table of overlapping Prefixes as they are found, and return the number of findings."""
+    found = 0
+
+    def rows() -> Iterator[List[str]]:
+        nonlocal found
+        for overlap in overlaps:
+            found += 1
+            yield [
+                overlap.prefix.cidr,
+                overlap.prefix.namespace,
+                overlap.other.cidr,
+                overlap.other.namespace,
+                overlap.finding,
+            ]
+
+    headers = ["Prefix", "Namespace", "Overlapping prefix", "Namespace", "Finding"]
+    chunks = iter_markdown_table_chunks(headers, rows(), message_budget(dispatcher))
+    send_markdown_messages(dispatcher, (markdown for markdown in chunks if found))
+    return found
+
+
+def send_prefix_tree(dispatcher, roots: List[PrefixTreeNode], max_depth: int) -> None:
+    """Send Prefix trees down to ``max_depth`` levels as a table, with the number of children of each Prefix."""
+    rows = (
+        [guide + node.cidr, _render_prefix_type(node.type), node.status, str(node.child_count)]
+        for guide, node in iter_tree_lines(roots, max_depth)
+    )
+    headers = ["Prefix", "Type", "Status", "Children"]
+    send_markdown_messages(dispatcher, iter_markdown_table_chunks(headers, rows, message_budget(dispatcher)))
+
+
+def count_up_to(queryset: QuerySet, limit: int) -> int:
+    """Return the number of rows of a queryset, counting no further than ``limit``.
+
+    The count runs over a ``LIMIT`` subquery, so its cost is bounded by ``limit`` rather than by the table size.
+    """
+    return queryset[:limit].count()
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """Return the number of rows of a queryset, as estimated by the query planner on PostgreSQL.
+
+    Other database backends fall back to an exact ``COUNT(*)``.
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def summarize_prefixes(prefixes: QuerySet[Prefix], column: TableColumn) -> List[Tuple[str, int]]:
+    """Return the number of prefixes per distinct value of a column, largest groups first, in one query."""
+    groups = (
+        prefixes.order_by()
+        .values_list(*column.fields)
+        .annotate(count=Count("pk"))
+        .order_by("-count", *column.fields)
+    )
+    return [(column.render(*values[:-1]), values[-1]) for values in groups]
+
+
+def send_prefix_summary(dispatcher, prefixes: QuerySet[Prefix]) -> int:
+    """Send the number of Prefix records per status, role, namespace and type, and return the total.
+
+    Each breakdown is a single grouped query, so the cost does not depend on rendering individual prefixes.
+    """
+    total = 0
+    for column in PREFIX_SUMMARY_COLUMNS:
+        groups = summarize_prefixes(prefixes, column)
+        total = total or sum(count for _, count in groups)
+        rows = ([label, str(count)] for label, count in groups)
+        chunks = iter_markdown_table_chunks([column.header, "Prefixes"], rows, message_budget(dispatcher))
+        send_markdown_messages(dispatcher, chunks)
+    return total
 
 
 def prompt_for_prefix_filter_type(
@@ -48,6 +397,7 @@ def prompt_for_prefix_filter_type(
         ("VLAN", "vlan"),
         ("Tenant", "tenant"),
         ("RIR", "rir"),
+        ("VRF", "vrf"),
         ("Parent Prefix", "parent"),
         ("Type", "type"),
     ]
@@ -69,6 +419,7 @@ class Mock_Dispatcher:
         self.prompts: list[tuple[str, str, list[tuple[str, str]], int]] = []
         self.errors: list[str] = []
         self.warnings: list[str] = []
+        self.uploads: list[tuple[str, bytes]] = []
         self.captured = {}
 
     def send_markdown(self, markdown: str) -> None:
@@ -96,9 +447,19 @@ class Mock_Dispatcher:
     ) -> None:
         self.prompts.append((action_id, help_text, choices, offset))
 
+    def prompt_for_text(self, action_id: str, help_text: str, label: str, title: str = "") -> None:
+        self.prompts.append((action_id, help_text, [], 0))
+
     def send_error(self, message: str) -> None:
         self.errors.append(message)
 
+    def needs_permission_to_send_image(self) -> bool:
+        return False
+
+    def send_image(self, image_path: str) -> None:
+        with open(image_path, "rb") as upload:
+            self.uploads.append((os.path.basename(image_path), upload.read()))
+
     def send_warning(self, message: str) -> None:
         self.warnings.append(message)
 
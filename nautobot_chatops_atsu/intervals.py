@@ -0,0 +1,126 @@
+"""Integer interval arithmetic over IP address ranges.
+
+IP networks are handled as inclusive ``(first, last)`` integer ranges so that containment, coverage and overlap
+questions can be answered with sorting and binary search instead of one database query per network. NumPy is
+used for batched binary search when it is installed and the values fit in 64 bits (i.e. IPv4); otherwise the
+standard library ``bisect`` module is used.
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import netaddr
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Interval = Tuple[int, int]
+
+# Number of bits in an address, per IP version.
+ADDRESS_BITS = {4: 32, 6: 128}
+T = TypeVar("T")
+
+_INT64_MAX = 2**63 - 1
+
+
+def address_to_int(address: str) -> int:
+    """Return the integer value of an IPv4 or IPv6 address."""
+    return int(netaddr.IPAddress(address))
+
+
+def int_to_address(value: int, ip_version: int) -> str:
+    """Return the text form of an integer IPv4 or IPv6 address."""
+    return str(netaddr.IPAddress(value, version=ip_version))
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping or adjacent inclusive intervals into a sorted list of disjoint intervals."""
+    merged: List[Interval] = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def covered_size(merged: Iterable[Interval]) -> int:
+    """Return the number of integers covered by disjoint inclusive intervals."""
+    return sum(last - first + 1 for first, last in merged)
+
+
+class SortedIntegers:
+    """An immutable sorted set of integers supporting batched range counting and binary search."""
+
+    def __init__(self, values: Iterable[int]):
+        """Sort and de-duplicate the values, using a NumPy array when possible."""
+        self.values: Sequence[int] = sorted(set(values))
+        self.array = None
+        if np is not None and (not self.values or self.values[-1] <= _INT64_MAX):
+            self.array = np.array(self.values, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Return the number of distinct values."""
+        return len(self.values)
+
+    def searchsorted(self, targets: Sequence[int], side: str = "left") -> List[int]:
+        """Return the insertion index of each target, as ``numpy.searchsorted`` would."""
+        if self.array is not None and all(target <= _INT64_MAX for target in targets):
+            return np.searchsorted(self.array, np.array(targets, dtype=np.int64), side=side).tolist()
+        search = bisect_left if side == "left" else bisect_right
+        return [search(self.values, target) for target in targets]
+
+    def count_in_ranges(self, ranges: Sequence[Interval]) -> List[int]:
+        """Return how many values fall inside each inclusive range."""
+        lower = self.searchsorted([first for first, _ in ranges], side="left")
+        upper = self.searchsorted([last for _, last in ranges], side="right")
+        return [high - low for low, high in zip(lower, upper)]
+
+
+def flatten_nested(intervals: Iterable[Tuple[int, int, T]]) -> List[Tuple[int, int, T]]:
+    """Split nested intervals into sorted, disjoint segments, each labelled with its innermost interval.
+
+    Intervals must be laminar, as IP networks are: any two of them are either disjoint or one contains the other.
+    """
+    segments: List[Tuple[int, int, T]] = []
+    stack: List[Tuple[int, T]] = []
+    cursor = 0
+
+    def close_until(first: Optional[int]) -> None:
+        nonlocal cursor
+        while stack and (first is None or stack[-1][0] < first):
+            last, label = stack.pop()
+            if cursor <= last:
+                segments.append((cursor, last, label))
+                cursor = last + 1
+
+    for first, last, label in sorted(intervals, key=lambda interval: (interval[0], -interval[1])):
+        close_until(first)
+        if stack and cursor < first:
+            segments.append((cursor, first - 1, stack[-1][1]))
+        stack.append((last, label))
+        cursor = first
+    close_until(None)
+    return segments
+
+
+def iter_free_blocks(first: int, last: int, occupied: Iterable[Interval], size: int) -> Iterator[Interval]:
+    """Yield the aligned blocks of ``size`` integers within ``[first, last]`` that overlap no occupied interval.
+
+    ``occupied`` must be sorted by start, so the gaps are found in a single pass; overlapping intervals are allowed.
+    ``size`` must be a power of two, as for IP networks.
+    """
+    cursor = first
+    for occupied_first, occupied_last in chain(occupied, [(last + 1, last + 1)]):
+        gap_last = min(occupied_first - 1, last)
+        start = -(-cursor // size) * size
+        while start + size - 1 <= gap_last:
+            yield (start, start + size - 1)
+            start += size
+        cursor = max(cursor, occupied_last + 1)
+        if cursor > last:
+            return
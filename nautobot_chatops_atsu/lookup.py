@@ -0,0 +1,220 @@
+"""Longest-prefix-match lookup of IP addresses.
+
+Every Prefix is held in an in-process binary radix tree per namespace and IP version, so finding the Prefixes that
+contain an address walks at most 32 (IPv4) or 128 (IPv6) tree nodes per namespace without touching the database.
+
+Bulk lookups of many addresses within a filtered set of Prefixes load those Prefixes once instead, flatten them into
+sorted disjoint ranges and resolve every address with one batched binary search.
+
+The index records the Prefix cache version it was built for. Prefix save and delete signals patch the index of the
+process that made the change once the transaction commits, while changes made by other processes are detected by
+comparing versions and answered by rebuilding the index from a single query.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import netaddr
+from django.db import transaction
+from django.db.models.query import QuerySet
+from nautobot.ipam.models import Prefix
+
+from .cache import bump_model_version, get_model_versions
+from .intervals import ADDRESS_BITS, SortedIntegers, address_to_int, flatten_nested
+
+# A tree node is a list of [zero child, one child, primary key of the Prefix ending at this node].
+Node = list
+
+# Number of rows fetched per round trip while building the index.
+INDEX_CHUNK_SIZE = 5000
+
+
+class PrefixIndex:
+    """Radix trees of every Prefix, keyed by namespace and IP version."""
+
+    def __init__(self, version: Optional[int] = None):
+        """Create an empty index for the given Prefix cache version."""
+        self.version = version
+        self.trees: Dict[Tuple[str, int], Node] = {}
+        self.entries: Dict[str, Tuple[str, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed Prefixes."""
+        return len(self.entries)
+
+    def add(self, pk, namespace_id, ip_version: int, network: int, prefix_length: int) -> None:
+        """Add a Prefix to the index, replacing any previous entry for the same primary key."""
+        self.discard(pk)
+        node = self.trees.setdefault((str(namespace_id), ip_version), [None, None, None])
+        bits = ADDRESS_BITS[ip_version]
+        for shift in range(bits - 1, bits - 1 - prefix_length, -1):
+            bit = (network >> shift) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        node[2] = str(pk)
+        self.entries[str(pk)] = (str(namespace_id), ip_version, network, prefix_length)
+
+    def discard(self, pk) -> None:
+        """Remove a Prefix from the index, if present."""
+        entry = self.entries.pop(str(pk), None)
+        if entry is None:
+            return
+        namespace_id, ip_version, network, prefix_length = entry
+        node = self.trees[(namespace_id, ip_version)]
+        bits = ADDRESS_BITS[ip_version]
+        for shift in range(bits - 1, bits - 1 - prefix_length, -1):
+            node = node[(network >> shift) & 1]
+        # Emptied branches are left in place; they are dropped the next time the index is rebuilt.
+        node[2] = None
+
+    def lookup(self, address: int, ip_version: int) -> Dict[str, List[str]]:
+        """Return the primary keys of the Prefixes containing an address, per namespace, most specific last."""
+        bits = ADDRESS_BITS[ip_version]
+        matches = {}
+        for (namespace_id, tree_version), root in self.trees.items():
+            if tree_version != ip_version:
+                continue
+            found = []
+            node = root
+            shift = bits
+            while node is not None:
+                if node[2] is not None:
+                    found.append(node[2])
+                shift -= 1
+                if shift < 0:
+                    break
+                node = node[(address >> shift) & 1]
+            if found:
+                matches[namespace_id] = found
+        return matches
+
+
+def build_prefix_index(version: Optional[int] = None) -> PrefixIndex:
+    """Build an index of every Prefix from a single query."""
+    index = PrefixIndex(version)
+    rows = Prefix.objects.order_by().values_list("pk", "namespace_id", "ip_version", "network", "prefix_length")
+    for pk, namespace_id, ip_version, network, prefix_length in rows.iterator(chunk_size=INDEX_CHUNK_SIZE):
+        index.add(pk, namespace_id, ip_version, address_to_int(network), prefix_length)
+    return index
+
+
+def _prefix_version() -> int:
+    return get_model_versions([Prefix])[Prefix._meta.label_lower]
+
+
+class _ProcessIndex:
+    """The Prefix index of the current process, shared by its threads."""
+
+    def __init__(self):
+        self.index: Optional[PrefixIndex] = None
+        self.lock = threading.Lock()
+
+    def get(self) -> PrefixIndex:
+        version = _prefix_version()
+        index = self.index
+        if index is not None and index.version == version:
+            return index
+        with self.lock:
+            if self.index is None or self.index.version != version:
+                self.index = build_prefix_index(version)
+            return self.index
+
+    def patch(self, pk, entry: Optional[Tuple[str, int, int, int]], version: Optional[int]) -> None:
+        """Add (or, if ``entry`` is None, remove) a Prefix if the index was current just before the change."""
+        with self.lock:
+            if self.index is None:
+                return
+            if version is None or self.index.version != version - 1:
+                self.index = None
+                return
+            if entry is None:
+                self.index.discard(pk)
+            else:
+                self.index.add(pk, *entry)
+            self.index.version = version
+
+
+_process_index = _ProcessIndex()
+
+
+def get_prefix_index() -> PrefixIndex:
+    """Return the index of the current process, rebuilding it if Prefixes changed since it was built."""
+    return _process_index.get()
+
+
+def _commit_prefix_change(pk, entry: Optional[Tuple[str, int, int, int]]) -> None:
+    """Bump the Prefix cache version for a committed change, and patch the index of the current process with it."""
+    _process_index.patch(pk, entry, bump_model_version(Prefix))
+
+
+def patch_prefix_index(instance: Prefix, deleted: bool) -> None:
+    """Invalidate cached Prefix data and patch the index of the current process once the transaction commits.
+
+    The Prefix cache version is only bumped on commit, so that no process can rebuild cached data from the rows
+    before the change and store it under the new version. The index is only patched if it was current just before
+    the change; otherwise it is dropped and rebuilt on its next use.
+    """
+    entry = None
+    if not deleted:
+        entry = (
+            instance.namespace_id,
+            instance.ip_version,
+            address_to_int(str(instance.network)),
+            instance.prefix_length,
+        )
+    transaction.on_commit(partial(_commit_prefix_change, instance.pk, entry))
+
+
+def lookup_address(address: str) -> Dict[str, List[str]]:
+    """Return the primary keys of the Prefixes containing an address, per namespace, most specific last."""
+    ip_address = netaddr.IPAddress(address)
+    return get_prefix_index().lookup(int(ip_address), ip_address.version)
+
+
+def parse_addresses(text: str) -> Tuple[List[netaddr.IPAddress], List[str]]:
+    """Split pasted text on whitespace and commas, and return the valid IP addresses and the invalid tokens."""
+    addresses, invalid = [], []
+    for token in re.split(r"[\s,;]+", text.strip()):
+        if not token:
+            continue
+        try:
+            addresses.append(netaddr.IPAddress(token))
+        except (netaddr.AddrFormatError, ValueError):
+            invalid.append(token)
+    return addresses, invalid
+
+
+def resolve_addresses(prefixes: QuerySet[Prefix], addresses: Sequence[netaddr.IPAddress]) -> List[Dict[str, str]]:
+    """Return the most specific of the given Prefixes containing each address, as CIDRs keyed by namespace name.
+
+    The Prefixes are fetched in a single query and flattened into disjoint ranges per namespace and IP version, so
+    each group of addresses is resolved by one batched binary search over the range starts.
+    """
+    groups: Dict[Tuple[str, int], list] = defaultdict(list)
+    rows = prefixes.order_by().values_list("namespace__name", "ip_version", "network", "broadcast", "prefix_length")
+    for namespace, ip_version, network, broadcast, prefix_length in rows:
+        groups[(namespace, ip_version)].append(
+            (address_to_int(network), address_to_int(broadcast), f"{network}/{prefix_length}")
+        )
+
+    values: Dict[int, List[int]] = defaultdict(list)
+    positions: Dict[int, List[int]] = defaultdict(list)
+    for position, address in enumerate(addresses):
+        values[address.version].append(int(address))
+        positions[address.version].append(position)
+
+    results: List[Dict[str, str]] = [{} for _ in addresses]
+    for (namespace, ip_version), intervals in sorted(groups.items()):
+        if not values[ip_version]:
+            continue
+        segments = flatten_nested(intervals)
+        starts = SortedIntegers(first for first, _, _ in segments)
+        indexes = starts.searchsorted(values[ip_version], side="right")
+        for position, value, index in zip(positions[ip_version], values[ip_version], indexes):
+            if index and value <= segments[index - 1][1]:
+                results[position][namespace] = segments[index - 1][2]
+    return results
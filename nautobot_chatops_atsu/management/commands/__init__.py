@@ -0,0 +1 @@
+"""Management commands for nautobot_chatops_atsu."""
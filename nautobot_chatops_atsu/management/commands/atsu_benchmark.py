@@ -0,0 +1,67 @@
+"""Management command running the atsu benchmarks."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nautobot_chatops_atsu.benchmarks import BENCHMARKS, compare_to_baseline, result_to_dict
+
+
+class Command(BaseCommand):
+    """Run atsu benchmarks against the data in the database."""
+
+    help = (
+        "Run atsu benchmarks against the data in the database and report the time per call, optionally saving the "
+        "results as JSON and failing on regressions from a baseline saved earlier."
+    )
+
+    def add_arguments(self, parser):
+        """Add the benchmark names, sampling and baseline options."""
+        parser.add_argument(
+            "benchmarks", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})"
+        )
+        parser.add_argument("--sample-size", type=int, default=1000, help="Number of inputs per benchmark")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed used to sample inputs")
+        parser.add_argument("--output", help="Path of a JSON file to save the results to")
+        parser.add_argument("--baseline", help="Path of a JSON file of results to compare with")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2, help="Fraction by which timings and sizes may exceed the baseline"
+        )
+
+    def handle(self, *args, **options):
+        """Run the selected benchmarks, print one line per result, then save and check the results."""
+        names = options["benchmarks"] or list(BENCHMARKS)
+        unknown = sorted(set(names) - set(BENCHMARKS))
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+            if (baseline["sample_size"], baseline["seed"]) != (options["sample_size"], options["seed"]):
+                raise CommandError(
+                    f"Baseline was recorded with --sample-size {baseline['sample_size']} --seed {baseline['seed']}"
+                )
+
+        results = []
+        for name in names:
+            for result in BENCHMARKS[name](sample_size=options["sample_size"], seed=options["seed"]):
+                line = f"{result.name:<45} {result.calls:>8} calls {result.per_call * 1e6:>12.2f} us/call"
+                if result.queries is not None:
+                    line += (
+                        f" {result.queries:>6} queries {result.rows:>7} rows {result.bytes_sent:>10} bytes"
+                        f" {result.peak_memory / 2**20:>8.2f} MiB peak"
+                    )
+                self.stdout.write(line)
+                results.append(result_to_dict(result))
+
+        if options["output"]:
+            saved = {"sample_size": options["sample_size"], "seed": options["seed"], "results": results}
+            with open(options["output"], "w", encoding="utf-8") as output_file:
+                json.dump(saved, output_file, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}")
+        if baseline is not None:
+            regressions = compare_to_baseline(results, baseline["results"], options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions from baseline:\n" + "\n".join(regressions))
+            self.stdout.write(f"No regressions from {options['baseline']}")
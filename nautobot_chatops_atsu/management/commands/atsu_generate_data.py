@@ -0,0 +1,47 @@
+"""Management command generating synthetic IPAM data for performance testing."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nautobot_chatops_atsu.synthetic import DEFAULT_BATCH_SIZE, generate_ipam_data
+
+
+class Command(BaseCommand):
+    """Bulk-create a synthetic IPAM address plan."""
+
+    help = (
+        "Bulk-create namespaces of nested Prefixes, with VLANs, tenants, RIRs, statuses and roles, for performance "
+        "testing. The same seed always generates the same data."
+    )
+
+    def add_arguments(self, parser):
+        """Add the size, seed and naming options."""
+        parser.add_argument("--prefixes", type=int, default=10000, help="Number of Prefixes to create")
+        parser.add_argument("--namespaces", type=int, default=1, help="Number of namespaces to divide Prefixes between")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed from which all generated data follows")
+        parser.add_argument("--label", default="synthetic", help="Prefix of the names of the objects created")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Number of Prefixes per query")
+
+    def handle(self, *args, **options):
+        """Generate the data, reporting progress after each batch."""
+        if options["prefixes"] < 1 or options["namespaces"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--prefixes, --namespaces and --batch-size must be positive")
+        start = time.monotonic()
+
+        def progress(count):
+            self.stdout.write(f"{count:>10} / {options['prefixes']} Prefixes ({time.monotonic() - start:.1f}s)")
+
+        try:
+            created = generate_ipam_data(
+                options["prefixes"],
+                seed=options["seed"],
+                namespace_count=options["namespaces"],
+                label=options["label"],
+                batch_size=options["batch_size"],
+                progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {time.monotonic() - start:.1f}s"))
@@ -0,0 +1,181 @@
+"""Filter choice menus for atsu commands.
+
+Menus are fetched from the database one page at a time. Each page is a single ``LIMIT`` query over an ordered,
+indexed projection; once a page has been read, the sort key of its last row is remembered so the following page
+can be fetched by keyset (``WHERE (ordering) > (cursor)``) instead of an ever growing ``OFFSET``.
+
+Pages and cursors are cached per filter type (and per user, for users whose permissions hide some of the choices)
+and invalidated by the app's model change signals, so paging back and forth through a menu is served from the cache
+without touching the database.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Exists, Model, OuterRef, Q, QuerySet
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import RIR, VLAN, VRF, Namespace, Prefix, VRFPrefixAssignment
+from nautobot.tenancy.models import Tenant
+
+from .cache import get_or_compute, make_cache_key
+from .permissions import PERMISSION_MODELS, is_unrestricted, restrict
+
+Choices = List[Tuple[str, str]]
+
+# Slack displays at most 100 options per menu, one of which is used for the "Next..." entry.
+MENU_PAGE_SIZE = 99
+
+
+class ChoiceSource(NamedTuple):
+    """Where the menu choices of a filter type come from.
+
+    ``queryset`` returns the objects to choose from. For each of them ``fields`` are selected and passed to
+    ``label`` to render the menu text, while the menu value is the primary key. ``ordering`` must end with a
+    unique field so that it can be used as a keyset. ``models`` are the models whose changes invalidate the menu.
+    """
+
+    queryset: Callable[[], QuerySet]
+    fields: Tuple[str, ...]
+    ordering: Tuple[str, ...]
+    models: Tuple[Type[Model], ...]
+    label: Callable[..., str] = str
+
+
+def _prefix_statuses() -> QuerySet:
+    return Status.objects.get_for_model(Prefix)
+
+
+def _prefix_roles() -> QuerySet:
+    return Role.objects.filter(content_types=ContentType.objects.get_for_model(Prefix))
+
+
+def _with_prefixes(model: Type[Model]) -> Callable[[], QuerySet]:
+    """Return a queryset factory of the instances of a model that have at least one Prefix."""
+    return lambda: model.objects.filter(Exists(Prefix.objects.filter(**{model._meta.model_name: OuterRef("pk")})))
+
+
+def _prefix_vrfs() -> QuerySet:
+    return VRF.objects.filter(Exists(VRFPrefixAssignment.objects.filter(vrf=OuterRef("pk"))))
+
+
+def _parent_prefixes() -> QuerySet:
+    # An EXISTS semi-join returns each parent once, unlike filtering on the reverse `children` relation.
+    return Prefix.objects.filter(Exists(Prefix.objects.filter(parent=OuterRef("pk"))))
+
+
+def _allocation_parents() -> QuerySet:
+    # Empty containers are the usual place to allocate from, so they are offered along with every other parent.
+    return Prefix.objects.filter(
+        Q(type=PrefixTypeChoices.TYPE_CONTAINER) | Exists(Prefix.objects.filter(parent=OuterRef("pk")))
+    )
+
+
+def _render_cidr(network: str, prefix_length: int) -> str:
+    return f"{network}/{prefix_length}"
+
+
+PREFIX_FILTER_CHOICES: Dict[str, ChoiceSource] = {
+    "status": ChoiceSource(_prefix_statuses, ("name",), ("name", "pk"), (Status,)),
+    "role": ChoiceSource(_prefix_roles, ("name",), ("name", "pk"), (Role,)),
+    "namespace": ChoiceSource(Namespace.objects.all, ("name",), ("name", "pk"), (Namespace,)),
+    "vlan": ChoiceSource(_with_prefixes(VLAN), ("name",), ("name", "pk"), (VLAN, Prefix)),
+    "tenant": ChoiceSource(_with_prefixes(Tenant), ("name",), ("name", "pk"), (Tenant, Prefix)),
+    "rir": ChoiceSource(_with_prefixes(RIR), ("name",), ("name", "pk"), (RIR, Prefix)),
+    "vrf": ChoiceSource(_prefix_vrfs, ("name",), ("name", "pk"), (VRF, VRFPrefixAssignment)),
+    "parent": ChoiceSource(
+        _parent_prefixes,
+        ("network", "prefix_length"),
+        ("ip_version", "network", "prefix_length", "pk"),
+        (Prefix,),
+        _render_cidr,
+    ),
+}
+
+# Choices of the parent Prefix to allocate subnets from, which is not a filter type.
+ALLOCATION_PARENT_CHOICES = PREFIX_FILTER_CHOICES["parent"]._replace(queryset=_allocation_parents)
+
+STATIC_PREFIX_FILTER_CHOICES: Dict[str, Choices] = {
+    "type": [(label, value) for value, label in PrefixTypeChoices],
+}
+
+
+def _keyset_filter(ordering: Sequence[str], cursor: Sequence[Any]) -> Q:
+    """Return a filter matching the rows that sort strictly after ``cursor`` in ``ordering``."""
+    keyset = Q()
+    for index, field in enumerate(ordering):
+        condition = Q(**{f"{field}__gt": cursor[index]})
+        for previous_field, previous_value in zip(ordering[:index], cursor[:index]):
+            condition &= Q(**{previous_field: previous_value})
+        keyset |= condition
+    return keyset
+
+
+def _fetch_choice_page(menu: str, source: ChoiceSource, offset: int, timeout: int) -> Choices:
+    """Fetch one page of menu choices from the database, followed by a "Next..." entry if there are more.
+
+    ``menu`` identifies the menu in the cache keys of its page cursors.
+    """
+    fields = list(dict.fromkeys((*source.ordering, *source.fields)))
+    label_indexes = [fields.index(field) for field in source.fields]
+    ordering_indexes = [fields.index(field) for field in source.ordering]
+    pk_index = fields.index("pk")
+
+    queryset = source.queryset().order_by(*source.ordering).values_list(*fields)
+    cursor = cache.get(make_cache_key("cursor", "prefix", menu, offset, models=source.models)) if offset else None
+    if cursor is not None:
+        rows = list(queryset.filter(_keyset_filter(source.ordering, cursor))[: MENU_PAGE_SIZE + 1])
+    else:
+        rows = list(queryset[offset : offset + MENU_PAGE_SIZE + 1])
+
+    choices = [(source.label(*(row[i] for i in label_indexes)), str(row[pk_index])) for row in rows[:MENU_PAGE_SIZE]]
+    if len(rows) > MENU_PAGE_SIZE:
+        next_offset = offset + MENU_PAGE_SIZE
+        next_cursor = [rows[MENU_PAGE_SIZE - 1][i] for i in ordering_indexes]
+        cache.set(make_cache_key("cursor", "prefix", menu, next_offset, models=source.models), next_cursor, timeout)
+        choices.append(("Next...", f"menu_offset-{next_offset}"))
+    return choices
+
+
+def get_prefix_filter_choices(filter_type: str, offset: int = 0, user=None) -> Optional[Choices]:
+    """Return one (cached) page of menu choices for a Prefix filter type, or None if the filter type is unknown.
+
+    The page holds at most ``MENU_PAGE_SIZE`` choices starting at ``offset``, followed by a ``("Next...",
+    "menu_offset-<n>")`` entry when more choices are available. If ``user`` is given, only the objects the user may
+    view are offered; pages are shared by every user who may view all of them, and cached per user otherwise.
+    """
+    if filter_type in STATIC_PREFIX_FILTER_CHOICES:
+        return STATIC_PREFIX_FILTER_CHOICES[filter_type]
+    if filter_type not in PREFIX_FILTER_CHOICES:
+        return None
+    return _get_menu_choices(filter_type, PREFIX_FILTER_CHOICES[filter_type], offset, user)
+
+
+def get_allocation_parent_choices(offset: int = 0, user=None) -> Choices:
+    """Return one (cached) page of menu choices of parent Prefixes to allocate from, including empty containers.
+
+    Pages are fetched, cached and restricted to ``user`` as by ``get_prefix_filter_choices()``.
+    """
+    return _get_menu_choices("allocation-parent", ALLOCATION_PARENT_CHOICES, offset, user)
+
+
+def _get_menu_choices(menu: str, source: ChoiceSource, offset: int, user) -> Choices:
+    """Return one (cached) page of the choices of a menu, restricted to the objects ``user`` may view."""
+    if not is_unrestricted(user, source.queryset().model):
+        unrestricted = source.queryset
+        source = source._replace(
+            queryset=lambda: restrict(unrestricted(), user), models=source.models + PERMISSION_MODELS
+        )
+        menu = f"{menu}:user-{user.pk}"
+    timeout = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["menu_cache_timeout"]
+    return get_or_compute(
+        "choices",
+        lambda: _fetch_choice_page(menu, source, offset, timeout),
+        "prefix",
+        menu,
+        offset,
+        models=source.models,
+        timeout=timeout,
+    )
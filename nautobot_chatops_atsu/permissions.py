@@ -0,0 +1,70 @@
+"""Permission restriction of atsu querysets.
+
+``RestrictedQuerySet.restrict()`` loads the user's ObjectPermissions from the database on the first call for each
+user instance, and chat commands get a fresh user instance every time, so every command paid for those queries.
+Here the constraints granted to each user are kept in the versioned cache instead, invalidated by the app's signal
+handlers whenever an ObjectPermission, its assignments or a user's groups change, and compiled into the same
+filter ``restrict()`` would apply.
+"""
+
+from typing import Any, Dict, List, Type
+
+from django.contrib.auth.models import Group
+from django.db.models import Model
+from django.db.models.query import QuerySet
+from nautobot.core.authentication import ObjectPermissionBackend
+from nautobot.core.utils.permissions import permission_is_exempt, qs_filter_from_constraints
+from nautobot.users.models import ObjectPermission
+
+from .cache import get_or_compute
+
+# Models whose changes invalidate cached permissions. Changes to the users, groups or object types of an
+# ObjectPermission, or to the groups of a user, bump at least one of them through the m2m_changed handler.
+PERMISSION_MODELS = (ObjectPermission, Group)
+
+# Seconds for which the permissions of a user are cached, bounding how long a revoked permission could still be
+# granted if an invalidation were ever missed.
+PERMISSION_CACHE_TIMEOUT = 60
+
+
+def _permission_name(model: Type[Model], action: str) -> str:
+    return f"{model._meta.app_label}.{action}_{model._meta.model_name}"
+
+
+def get_object_permissions(user) -> Dict[str, List[Any]]:
+    """Return the constraints of each permission granted to a user by ObjectPermissions, from the cache.
+
+    The result is also attached to the user, as ``ObjectPermissionBackend`` would, so that permission checks made
+    elsewhere for the same user instance do not query the database either.
+    """
+    if not user.is_active or user.is_anonymous:
+        return {}
+    if not hasattr(user, "_object_perm_cache"):
+        user._object_perm_cache = get_or_compute(
+            "permissions",
+            lambda: dict(ObjectPermissionBackend().get_object_permissions(user)),
+            user.pk,
+            models=PERMISSION_MODELS,
+            timeout=PERMISSION_CACHE_TIMEOUT,
+        )
+    return user._object_perm_cache
+
+
+def is_unrestricted(user, model: Type[Model], action: str = "view") -> bool:
+    """Return True if the user may perform an action on every instance of a model."""
+    permission = _permission_name(model, action)
+    if user is None or user.is_superuser or permission_is_exempt(permission):
+        return True
+    constraints = get_object_permissions(user).get(permission)
+    return constraints is not None and not all(constraints)
+
+
+def restrict(queryset: QuerySet, user, action: str = "view") -> QuerySet:
+    """Filter a queryset to the objects on which a user has been granted an action, like ``RestrictedQuerySet``."""
+    permission = _permission_name(queryset.model, action)
+    if user.is_superuser or permission_is_exempt(permission):
+        return queryset
+    permissions = get_object_permissions(user)
+    if not user.is_authenticated or permission not in permissions:
+        return queryset.none()
+    return queryset.filter(qs_filter_from_constraints(permissions[permission], {"$user": user}))
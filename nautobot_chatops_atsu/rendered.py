@@ -0,0 +1,64 @@
+"""Caching of rendered command output.
+
+Bounded tables are rendered once and their messages cached, compressed, until the data they were rendered from
+changes: the cache key embeds the version counters of those models (see ``cache.py``), so repeating a command
+between changes costs cache reads only and no SQL at all. Entries expire after the ``render_cache_timeout``
+setting; Redis evicts the least recently used ones first when it runs out of memory if configured with an
+``allkeys-lru`` (or ``volatile-lru``) ``maxmemory-policy``.
+
+Hits and misses are counted per output name, so the effectiveness of the cache can be checked in production.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+
+from .cache import CACHE_KEY_PREFIX, make_cache_key
+
+RENDER_STATS = ("hits", "misses")
+
+
+def _stats_key(name: str, stat: str) -> str:
+    """Return the cache key holding a hit or miss counter of an output."""
+    return f"{CACHE_KEY_PREFIX}:rendered-stats:{name}:{stat}"
+
+
+def _count(name: str, stat: str) -> None:
+    """Increment a hit or miss counter of an output."""
+    key = _stats_key(name, stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # a concurrent first count may be lost, which is fine for statistics
+        cache.add(key, 1, timeout=None)
+
+
+def rendered_key(name: str, *parts: Any, models: Iterable[Type[Model]] = ()) -> str:
+    """Return the cache key of an output rendered from the given models."""
+    return make_cache_key("rendered", name, *parts, models=models)
+
+
+def get_rendered(name: str, key: str) -> Optional[List[str]]:
+    """Return the cached messages of an output, or None (counted as a miss) if they are not cached."""
+    payload = cache.get(key)
+    if payload is None:
+        _count(name, "misses")
+        return None
+    _count(name, "hits")
+    return json.loads(zlib.decompress(payload))
+
+
+def set_rendered(key: str, messages: List[str]) -> None:
+    """Cache the messages of an output for the ``render_cache_timeout`` setting."""
+    timeout = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["render_cache_timeout"]
+    cache.set(key, zlib.compress(json.dumps(messages).encode()), timeout)
+
+
+def get_render_stats(name: str) -> Dict[str, int]:
+    """Return the numbers of cache hits and misses of an output."""
+    counts = cache.get_many([_stats_key(name, stat) for stat in RENDER_STATS])
+    return {stat: counts.get(_stats_key(name, stat), 0) for stat in RENDER_STATS}
@@ -0,0 +1,66 @@
+"""Signal handlers for nautobot_chatops_atsu."""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import RIR, VLAN, VRF, Namespace, Prefix, VRFPrefixAssignment
+from nautobot.tenancy.models import Tenant
+from nautobot.users.models import ObjectPermission
+
+from .cache import bump_model_version
+from .lookup import patch_prefix_index
+
+# Models whose changes invalidate cached atsu data.
+CACHED_MODELS = (Prefix, Status, Role, Namespace, VLAN, Tenant, RIR, VRF, VRFPrefixAssignment, ObjectPermission, Group)
+
+
+def bump_on_commit(*models) -> None:
+    """Bump the cache versions of models once the current transaction commits, or at once outside of one.
+
+    Bumping before the commit would let another process rebuild cached data from the rows before the change, and
+    store it under the new version, where it would be served until the next change.
+    """
+
+    def bump():
+        for model in models:
+            bump_model_version(model)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_model_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate cached data computed from a model after one of its instances is saved or deleted."""
+    bump_on_commit(sender)
+
+
+def invalidate_prefix_cache(sender, instance, signal, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate cached Prefix data and patch the in-process lookup index once the change is committed."""
+    patch_prefix_index(instance, signal is post_delete)
+
+
+def invalidate_relation_cache(sender, instance, model, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate cached data when the objects related through a many-to-many field are changed."""
+    bump_on_commit(sender, type(instance), model)
+
+
+def connect_signals():
+    """Connect the cache invalidation handlers of the app."""
+    for model in CACHED_MODELS:
+        handler = invalidate_prefix_cache if model is Prefix else invalidate_model_cache
+        post_save.connect(handler, sender=model, dispatch_uid=f"atsu_post_save_{model._meta.label}")
+        post_delete.connect(handler, sender=model, dispatch_uid=f"atsu_post_delete_{model._meta.label}")
+    relations = (
+        Status.content_types,
+        Role.content_types,
+        VRF.prefixes,
+        ObjectPermission.object_types,
+        ObjectPermission.users,
+        ObjectPermission.groups,
+        get_user_model().groups,
+    )
+    for through in (relation.through for relation in relations):
+        m2m_changed.connect(
+            invalidate_relation_cache, sender=through, dispatch_uid=f"atsu_m2m_changed_{through._meta.label}"
+        )
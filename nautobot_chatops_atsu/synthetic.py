@@ -0,0 +1,219 @@
+"""Synthetic IPAM data for performance testing.
+
+``generate_ipam_data()`` creates a realistic address plan at the scale of a large deployment, which the development
+environment otherwise lacks. Each namespace holds /8 containers assigned to RIRs, divided into /16 containers for
+tenants, divided into /24 networks with roles, VLANs and VRFs, some of which are split into /26 pools. Prefixes are
+generated lazily and saved with ``bulk_create()`` in batches, with their parents set directly rather than computed
+on save, so that a million Prefixes take minutes.
+
+Generated data depends only on the seed, and primary keys on the seed and label: regenerating data with the same
+seed and label in another database creates the same objects, with the same primary keys.
+Run it with ``nautobot-server atsu_generate_data``, or ``invoke generate-data``.
+"""
+
+import random
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import RIR, VLAN, VRF, Namespace, Prefix, VRFPrefixAssignment
+from nautobot.tenancy.models import Tenant
+
+from .cache import bump_model_version
+from .intervals import int_to_address
+
+# Statuses of generated Prefixes and VLANs, with their relative weights.
+STATUS_WEIGHTS = {"Active": 85, "Reserved": 10, "Deprecated": 5}
+
+# Roles of generated /24 networks and VLANs.
+ROLE_NAMES = ("Data", "Voice", "Management", "Guest", "Storage", "Transit")
+
+# RIRs of the generated /8 containers, the first of which holds the private 10.0.0.0/8.
+RIR_NAMES = ("RFC 1918", "ARIN", "RIPE NCC", "APNIC", "LACNIC", "AFRINIC")
+
+# First octet of the /8 containers of each namespace, in the order they are used.
+FIRST_OCTETS = (10, *range(11, 127), *range(128, 224))
+
+# Range of the number of /24 networks in each /16 container.
+NETWORKS_PER_CONTAINER = (16, 256)
+
+# Share of /24 networks split into four /26 pools, of them assigned a VLAN, of them assigned the VRF of their
+# namespace, and of them not assigned their tenant.
+POOL_SHARE = 0.25
+VLAN_SHARE = 0.5
+VRF_SHARE = 0.1
+UNASSIGNED_SHARE = 0.2
+
+# Number of generated Prefixes per generated VLAN and tenant.
+PREFIXES_PER_VLAN = 100
+PREFIXES_PER_TENANT = 1000
+
+# Number of Prefixes saved per query.
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    """Return a random version 4 UUID drawn from ``rng``, so that primary keys are reproducible."""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _related_objects(
+    model, names: Sequence[str], content_types: Sequence[ContentType] = (), defaults: Optional[Dict[str, Any]] = None
+) -> List:
+    """Return objects of ``model`` by name, creating any missing, usable for ``content_types`` if given.
+
+    ``defaults`` maps names to the field values of the objects created with them; existing objects are not changed.
+    """
+    objects = []
+    for name in names:
+        obj, _ = model.objects.get_or_create(name=name, defaults=(defaults or {}).get(name))
+        if content_types:
+            obj.content_types.add(*content_types)
+        objects.append(obj)
+    return objects
+
+
+def _iter_prefixes(  # noqa: PLR0913
+    rng: random.Random,
+    id_rng: random.Random,
+    namespace: Namespace,
+    vrf: VRF,
+    count: int,
+    related: Dict[str, list],
+) -> Iterator[Tuple[Prefix, Optional[VRFPrefixAssignment]]]:
+    """Yield ``count`` Prefixes of an address plan in ``namespace``, each after its parent.
+
+    Each Prefix is yielded with its assignment to ``vrf``, if it has one, so that everything drawn from ``rng`` and
+    ``id_rng`` is drawn in the same order however the Prefixes are batched.
+    """
+    statuses, roles, rirs, tenants, vlans = (related[key] for key in ("statuses", "roles", "rirs", "tenants", "vlans"))
+    status_weights = list(STATUS_WEIGHTS.values())
+
+    def prefix(address: int, length: int, prefix_type: str, parent: Optional[Prefix], **kwargs) -> Prefix:
+        return Prefix(
+            id=_uuid(id_rng),
+            prefix=f"{int_to_address(address, 4)}/{length}",
+            namespace=namespace,
+            type=prefix_type,
+            status=rng.choices(statuses, status_weights)[0],
+            parent=parent,
+            **kwargs,
+        )
+
+    remaining = count
+    for index, first_octet in enumerate(FIRST_OCTETS):
+        block_address = first_octet << 24
+        block = prefix(block_address, 8, PrefixTypeChoices.TYPE_CONTAINER, None, rir=rirs[index % len(rirs)])
+        yield block, None
+        remaining -= 1
+        for second_octet in range(256):
+            if remaining <= 0:
+                return
+            tenant = rng.choice(tenants)
+            container_address = block_address + (second_octet << 16)
+            container = prefix(container_address, 16, PrefixTypeChoices.TYPE_CONTAINER, block, tenant=tenant)
+            yield container, None
+            remaining -= 1
+            for third_octet in range(rng.randint(*NETWORKS_PER_CONTAINER)):
+                if remaining <= 0:
+                    return
+                network_address = container_address + (third_octet << 8)
+                network = prefix(
+                    network_address,
+                    24,
+                    PrefixTypeChoices.TYPE_NETWORK,
+                    container,
+                    tenant=None if rng.random() < UNASSIGNED_SHARE else tenant,
+                    role=rng.choice(roles),
+                    vlan=rng.choice(vlans) if rng.random() < VLAN_SHARE else None,
+                )
+                in_vrf = rng.random() < VRF_SHARE
+                yield network, VRFPrefixAssignment(id=_uuid(id_rng), vrf=vrf, prefix=network) if in_vrf else None
+                remaining -= 1
+                if rng.random() < POOL_SHARE:
+                    for pool in range(min(4, remaining)):
+                        yield prefix(network_address + (pool << 6), 26, PrefixTypeChoices.TYPE_POOL, network), None
+                        remaining -= 1
+        if remaining <= 0:
+            return
+    raise ValueError(f"Cannot fit {count} Prefixes in a namespace")
+
+
+def generate_ipam_data(  # noqa: PLR0913
+    prefix_count: int,
+    seed: int = 0,
+    namespace_count: int = 1,
+    label: str = "synthetic",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """Create ``prefix_count`` Prefixes spread over ``namespace_count`` new namespaces, with related objects.
+
+    Namespaces, VRFs, tenants and VLANs are named after ``label``, which must not have been used before. Statuses,
+    roles and RIRs are shared with other data, and created if missing; existing ones are left unchanged. Everything
+    is created in one transaction, and the cache versions of the generated models are bumped afterwards, as the
+    signals skipped by ``bulk_create()`` would.
+
+    Args:
+        prefix_count (int): number of Prefixes to create
+        seed (int): random seed, from which all generated data follows
+        namespace_count (int): number of namespaces to divide the Prefixes between
+        label (str): prefix of the names of the namespaces, VRFs, tenants and VLANs created
+        batch_size (int): number of Prefixes saved per query
+        progress (callable): called with the number of Prefixes created so far after each batch
+
+    Returns:
+        dict: the number of objects created, by model name
+
+    Raises:
+        ValueError: if namespaces named after ``label`` already exist
+    """
+    if Namespace.objects.filter(name__startswith=f"{label}-").exists():
+        raise ValueError(f"Namespaces named {label}-* already exist, choose another label")
+    rng = random.Random(seed)  # noqa: S311
+    id_rng = random.Random(f"{seed}:{label}")  # noqa: S311
+    content_types = list(ContentType.objects.get_for_models(Prefix, VLAN).values())
+    created = {"namespaces": namespace_count, "vrfs": namespace_count, "prefixes": 0}
+
+    with transaction.atomic():
+        related = {
+            "statuses": _related_objects(Status, list(STATUS_WEIGHTS), content_types),
+            "roles": _related_objects(Role, ROLE_NAMES, content_types),
+            "rirs": _related_objects(RIR, RIR_NAMES, defaults={RIR_NAMES[0]: {"is_private": True}}),
+        }
+        related["tenants"] = Tenant.objects.bulk_create(
+            Tenant(id=_uuid(id_rng), name=f"{label}-tenant-{index:04}")
+            for index in range(max(prefix_count // PREFIXES_PER_TENANT, 1))
+        )
+        related["vlans"] = VLAN.objects.bulk_create(
+            VLAN(
+                id=_uuid(id_rng),
+                vid=index % 4094 + 1,
+                name=f"{label}-vlan-{index:05}",
+                status=related["statuses"][0],
+                role=rng.choice(related["roles"]),
+                tenant=rng.choice(related["tenants"]),
+            )
+            for index in range(max(prefix_count // PREFIXES_PER_VLAN, 1))
+        )
+        created.update(tenants=len(related["tenants"]), vlans=len(related["vlans"]))
+
+        for index in range(namespace_count):
+            namespace = Namespace.objects.create(id=_uuid(id_rng), name=f"{label}-{index:02}")
+            vrf = VRF.objects.create(id=_uuid(id_rng), name=f"{label}-vrf-{index:02}", namespace=namespace)
+            count = prefix_count // namespace_count + (index < prefix_count % namespace_count)
+            prefixes = _iter_prefixes(rng, id_rng, namespace, vrf, count, related)
+            while batch := list(islice(prefixes, batch_size)):
+                Prefix.objects.bulk_create(prefix for prefix, _ in batch)
+                VRFPrefixAssignment.objects.bulk_create(assignment for _, assignment in batch if assignment)
+                created["prefixes"] += len(batch)
+                if progress:
+                    progress(created["prefixes"])
+
+    for model in (Prefix, RIR, Tenant, VLAN, VRFPrefixAssignment):
+        bump_model_version(model)
+    return created
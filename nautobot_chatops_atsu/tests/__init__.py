@@ -1 +1,16 @@
 """Unit tests for nautobot_chatops_atsu app."""
+
+from django.test import TestCase
+
+
+class CommittedTestDataTestCase(TestCase):
+    """TestCase running the on-commit callbacks of ``setUpTestData()``, as if its data had been committed.
+
+    Cache versions are only bumped once a change is committed, which never happens within a TestCase. Without this,
+    data cached by an earlier test class could be served instead of the test data of a later one.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            super().setUpClass()
@@ -0,0 +1,86 @@
+"""Unit tests for nautobot_chatops_atsu available subnet search."""
+
+from io import StringIO
+
+import netaddr
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from nautobot.extras.models import Status
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.allocation import get_available_subnets
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import available_subnets
+
+User = get_user_model()
+
+
+class AvailableSubnetsTest(CommittedTestDataTestCase):
+    """Test finding free subnets within a parent Prefix."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-allocation-test", is_superuser=True)
+        namespace = Namespace.objects.create(name="Atsu Allocation Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        cls.parent = Prefix.objects.create(prefix="10.100.0.0/16", namespace=namespace, status=status)
+        for prefix in ("10.100.0.0/24", "10.100.1.0/25", "10.100.1.128/26", "10.100.4.0/22", "10.100.2.16/28"):
+            Prefix.objects.create(prefix=prefix, namespace=namespace, status=status)
+        cls.parent.refresh_from_db()
+        cls.container = Prefix.objects.create(
+            prefix="10.101.0.0/16", namespace=namespace, status=status, type=PrefixTypeChoices.TYPE_CONTAINER
+        )
+
+    def test_matches_get_available_prefixes(self):
+        """Verify the free subnets match the free space reported by Nautobot, from a single query."""
+        free = self.parent.get_available_prefixes()
+        for prefix_length in (17, 24, 26, 28):
+            with self.assertNumQueries(1):
+                subnets = get_available_subnets(self.parent, prefix_length, 1000)
+            expected = [
+                str(subnet)
+                for cidr in free.iter_cidrs()
+                if cidr.prefixlen <= prefix_length
+                for subnet in cidr.subnet(prefix_length)
+            ]
+            self.assertEqual(subnets, sorted(expected, key=netaddr.IPNetwork)[:1000], prefix_length)
+
+    def test_count(self):
+        """Verify at most the requested number of subnets are returned, lowest first."""
+        self.assertEqual(get_available_subnets(self.parent, 24, 2), ["10.100.3.0/24", "10.100.8.0/24"])
+
+    def test_invalid_prefix_length(self):
+        """Verify prefix lengths shorter than the parent's are rejected."""
+        with self.assertRaises(ValueError):
+            get_available_subnets(self.parent, 8, 1)
+
+    def test_command(self):
+        """Verify the available-subnets subcommand prompts for its parameters and lists the subnets."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        self.assertFalse(available_subnets(dispatcher, str(self.parent.pk)))
+        self.assertEqual(dispatcher.prompts[-1][0], f"atsu available-subnets {self.parent.pk}")
+        result = available_subnets(dispatcher, str(self.parent.pk), "/26", "3")
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertEqual(
+            dispatcher.sent_markdowns[-1].splitlines()[2:],
+            ["| 10.100.1.192/26 |", "| 10.100.2.64/26 |", "| 10.100.2.128/26 |"],
+        )
+
+    def test_parent_menu(self):
+        """Verify the parent menu offers empty containers as well as Prefixes with children, but not leaves."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        self.assertFalse(available_subnets(dispatcher))
+        choices = dispatcher.prompts[-1][2]
+        self.assertIn(("10.100.0.0/16", str(self.parent.pk)), choices)
+        self.assertIn(("10.101.0.0/16", str(self.container.pk)), choices)
+        self.assertNotIn("10.100.0.0/24", [label for label, _ in choices])
+
+    def test_benchmark(self):
+        """Verify the available subnets benchmark reports both implementations."""
+        out = StringIO()
+        call_command("atsu_benchmark", "available-subnets", "--sample-size", "100", stdout=out)
+        self.assertIn("available-subnets: sweep", out.getvalue())
+        self.assertIn("available-subnets: get_available_prefixes", out.getvalue())
@@ -0,0 +1,65 @@
+"""Unit tests for nautobot_chatops_atsu API client."""
+
+import uuid
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.test import TestCase
+
+from nautobot_chatops_atsu import atsu
+from nautobot_chatops_atsu.api_stub import StubAPIServer
+from nautobot_chatops_atsu.atsu import NautobotChatopsAtsu, get_atsu_client
+
+
+class NautobotChatopsAtsuTest(TestCase):
+    """Test the client of the API behind atsu against a local stand-in server."""
+
+    def setUp(self):
+        # ETags are cached per URL, so each test serves a path of its own
+        self.path = f"/prefixes/{uuid.uuid4()}/"
+        self.server = StubAPIServer({self.path: {"results": [{"prefix": "10.0.0.0/8"}]}})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.client = NautobotChatopsAtsu(self.server.url, timeout=5)
+
+    def test_connections_kept_alive(self):
+        """Verify requests reuse one pooled connection."""
+        for _ in range(5):
+            self.assertEqual(self.client.get_json(self.path), {"results": [{"prefix": "10.0.0.0/8"}]})
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_etag_revalidation(self):
+        """Verify unchanged documents are revalidated rather than downloaded again, and changes are fetched."""
+        self.client.get_json(self.path)
+        self.assertEqual(self.client.get_json(self.path), {"results": [{"prefix": "10.0.0.0/8"}]})
+        self.assertEqual(self.server.not_modified, 1)
+
+        self.server.documents[self.path] = {"results": []}
+        self.assertEqual(self.client.get_json(self.path), {"results": []})
+        self.assertEqual(self.server.not_modified, 1)
+
+    @mock.patch.object(atsu.time, "sleep")
+    def test_retries(self, sleep):
+        """Verify retryable failures are retried after a backoff honoring Retry-After, up to the retry limit."""
+        self.server.fail_next(503, count=2, retry_after="2")
+        self.assertEqual(self.client.get_json(self.path), {"results": [{"prefix": "10.0.0.0/8"}]})
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [2.0, 2.0])
+
+        self.server.fail_next(502, count=4)
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_json(self.path)
+        self.assertEqual(self.server.requests, 3 + 4)
+
+        self.server.fail_next(404)
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_json(self.path)
+        self.assertEqual(self.server.requests, 3 + 4 + 1)
+
+    def test_shared_client(self):
+        """Verify one client is shared per process, and none is created without an API URL."""
+        self.assertIsNone(get_atsu_client())
+        with mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"api_url": self.server.url}):
+            self.assertIs(get_atsu_client(), get_atsu_client())
+            self.assertEqual(get_atsu_client().base_url, self.server.url)
@@ -0,0 +1,107 @@
+"""Unit tests for nautobot_chatops_atsu overlap detection."""
+
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.audit import find_overlaps, iter_overlaps
+from nautobot_chatops_atsu.benchmarks import synthetic_prefix_rows
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import audit_overlaps
+
+User = get_user_model()
+
+
+class OverlapAuditTest(CommittedTestDataTestCase):
+    """Test overlap detection against Prefixes in the database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-audit-test", is_superuser=True)
+        cls.namespaces = [Namespace.objects.create(name=f"Atsu Audit {index}") for index in range(2)]
+        status = Status.objects.get_for_model(Prefix).first()
+        for namespace, prefix, prefix_type in (
+            (0, "10.110.0.0/16", "container"),
+            (0, "10.110.1.0/24", "network"),
+            (0, "10.110.1.0/26", "network"),
+            (0, "10.110.1.64/26", "pool"),
+            (1, "10.110.1.0/24", "network"),
+            (1, "10.110.2.0/24", "network"),
+            (1, "10.111.0.0/16", "network"),
+        ):
+            Prefix.objects.create(prefix=prefix, namespace=cls.namespaces[namespace], status=status, type=prefix_type)
+
+    def _findings(self, across_namespaces):
+        prefixes = Prefix.objects.filter(namespace__in=self.namespaces)
+        with self.assertNumQueries(1):
+            overlaps = list(find_overlaps(prefixes, across_namespaces))
+        return {(o.prefix.cidr, o.prefix.namespace, o.other.cidr, o.other.namespace, o.finding) for o in overlaps}
+
+    def test_within_namespace(self):
+        """Verify only nesting not allowed by the Prefix types is reported within a namespace."""
+        self.assertEqual(
+            self._findings(across_namespaces=False),
+            {("10.110.1.0/26", "Atsu Audit 0", "10.110.1.0/24", "Atsu Audit 0", "Network nested in a network")},
+        )
+
+    def test_across_namespaces(self):
+        """Verify duplicates and containment across namespaces are reported."""
+        findings = self._findings(across_namespaces=True)
+        self.assertIn(
+            ("10.110.1.0/24", "Atsu Audit 1", "10.110.1.0/24", "Atsu Audit 0", "Duplicate in another namespace"),
+            findings,
+        )
+        self.assertIn(
+            (
+                "10.110.2.0/24",
+                "Atsu Audit 1",
+                "10.110.0.0/16",
+                "Atsu Audit 0",
+                "Overlaps a prefix in another namespace",
+            ),
+            findings,
+        )
+        self.assertNotIn("10.111.0.0/16", {finding[0] for finding in findings})
+
+    def test_sweep_matches_pairwise(self):
+        """Verify the sweep reports each Prefix's closest container in another namespace, as a pairwise search."""
+        rows = sorted(
+            synthetic_prefix_rows(300, seed=1), key=lambda row: (row.ip_version, row.first, row.prefix_length)
+        )
+        found = {
+            (overlap.prefix, overlap.other.prefix_length)
+            for overlap in iter_overlaps(rows)
+            if overlap.other.namespace != overlap.prefix.namespace
+        }
+        expected = set()
+        for index, row in enumerate(rows):
+            containers = [
+                other
+                for other in rows[:index]
+                if other.namespace != row.namespace and other.first <= row.first and row.last <= other.last
+            ]
+            if containers:
+                expected.add((row, max(other.prefix_length for other in containers)))
+        self.assertEqual(found, expected)
+
+    def test_command(self):
+        """Verify the audit-overlaps subcommand streams the findings."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        result = audit_overlaps(dispatcher, "namespace", str(self.namespaces[0].pk))
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertIn("| 10.110.1.0/26 | Atsu Audit 0 | 10.110.1.0/24 |", dispatcher.sent_markdowns[-2])
+        self.assertEqual(dispatcher.sent_markdowns[-1], "**1 overlapping prefixes found**")
+
+    @mock.patch("nautobot_chatops_atsu.benchmarks.SYNTHETIC_PREFIX_COUNT", 1000)
+    def test_benchmark(self):
+        """Verify the audit-overlaps benchmark reports both implementations."""
+        out = StringIO()
+        call_command("atsu_benchmark", "audit-overlaps", "--sample-size", "50", stdout=out)
+        self.assertIn("audit-overlaps: sort-sweep (1000 prefixes)", out.getvalue())
+        self.assertIn("audit-overlaps: pairwise (50 prefixes)", out.getvalue())
@@ -0,0 +1,61 @@
+"""Unit tests for nautobot_chatops_atsu command benchmarks and baselines."""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from nautobot.ipam.models import Prefix
+
+from nautobot_chatops_atsu.benchmarks import COMMAND_BENCHMARK_FILTERS, compare_to_baseline
+
+
+class CompareToBaselineTest(TestCase):
+    """Test detecting regressions from a baseline."""
+
+    baseline = [{"name": "get-prefixes", "per_call": 1.0, "queries": 5, "rows": 10, "bytes_sent": 1000}]
+
+    def test_within_tolerance(self):
+        """Verify results no worse than the tolerance allows, or without a baseline, pass."""
+        results = [
+            {"name": "get-prefixes", "per_call": 1.1, "queries": 4, "rows": 10, "bytes_sent": 900},
+            {"name": "new", "per_call": 100.0},
+        ]
+        self.assertEqual(compare_to_baseline(results, self.baseline, 0.2), [])
+
+    def test_regressions(self):
+        """Verify slower timings, extra queries and different rows are each reported."""
+        results = [{"name": "get-prefixes", "per_call": 1.5, "queries": 6, "rows": 9, "bytes_sent": 1000}]
+        regressions = compare_to_baseline(results, self.baseline, 0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any("per_call" in regression for regression in regressions))
+        self.assertTrue(any("queries" in regression for regression in regressions))
+        self.assertTrue(any("rows" in regression for regression in regressions))
+
+
+class CommandBenchmarkTest(TestCase):
+    """Test the commands benchmark and its baseline options."""
+
+    def test_commands_benchmark(self):
+        """Verify every filter type is measured, the seeded data is rolled back, and a baseline run passes."""
+        prefix_count = Prefix.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            out = StringIO()
+            call_command("atsu_benchmark", "commands", "--sample-size", "300", "--output", path, stdout=out)
+            with open(path, encoding="utf-8") as results_file:
+                results = json.load(results_file)["results"]
+
+            self.assertEqual(len(results), len(COMMAND_BENCHMARK_FILTERS))
+            self.assertTrue(all(result["queries"] > 0 and result["bytes_sent"] > 0 for result in results))
+            self.assertTrue(all(result["rows"] > 0 for result in results))
+            self.assertEqual(Prefix.objects.count(), prefix_count)
+
+            options = ["--sample-size", "300", "--baseline", path, "--tolerance", "100"]
+            call_command("atsu_benchmark", "commands", *options, stdout=out)
+            self.assertIn("No regressions", out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command("atsu_benchmark", "commands", "--sample-size", "30", "--baseline", path, stdout=out)
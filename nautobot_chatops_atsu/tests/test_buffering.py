@@ -0,0 +1,105 @@
+"""Unit tests for nautobot_chatops_atsu output buffering."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.background import iter_with_progress
+from nautobot_chatops_atsu.buffering import MARKDOWN_SEPARATOR, BufferedDispatcher, handle_buffered_subcommands
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+
+User = get_user_model()
+
+
+class _RecordingDispatcher(Mock_Dispatcher):
+    """Mock dispatcher recording its instances and the order of the calls sent to the chat platform."""
+
+    instances = []
+
+    def __init__(self, context=None):
+        super().__init__(context=context or {})
+        self.calls = []
+        self.instances.append(self)
+
+    def send_markdown(self, markdown):
+        self.calls.append(("markdown", markdown))
+        super().send_markdown(markdown)
+
+    def send_blocks(self, blocks):
+        self.calls.append(("blocks", blocks))
+        super().send_blocks(blocks)
+
+    def send_error(self, message):
+        self.calls.append(("error", message))
+        super().send_error(message)
+
+
+class BufferedDispatcherTest(TestCase):
+    """Test merging of consecutive messages."""
+
+    def setUp(self):
+        self.dispatcher = _RecordingDispatcher()
+        self.buffered = BufferedDispatcher(self.dispatcher)
+
+    def test_merges_consecutive_messages(self):
+        """Verify consecutive markdown messages and blocks are merged, in order, when flushed."""
+        self.buffered.send_markdown("echo")
+        self.buffered.send_blocks([{"header": 1}])
+        self.buffered.send_blocks([{"header": 2}])
+        self.buffered.send_markdown("**title**")
+        self.buffered.send_markdown("| table |")
+        self.assertEqual(self.dispatcher.calls[:1], [("markdown", "echo")])
+        self.buffered.flush()
+        self.assertEqual(
+            self.dispatcher.calls,
+            [("markdown", "echo"), ("blocks", [{"header": 1}, {"header": 2}]), ("markdown", "**title**\n\n| table |")],
+        )
+
+    def test_size_bounded(self):
+        """Verify merged messages stay within the platform message size."""
+        half = "x" * ((self.buffered.max_size - len(MARKDOWN_SEPARATOR)) // 2)
+        for _ in range(3):
+            self.buffered.send_markdown(half)
+        self.buffered.flush()
+        self.assertEqual(len(self.dispatcher.sent_markdowns), 2)
+        self.assertTrue(all(len(markdown) <= self.buffered.max_size for markdown in self.dispatcher.sent_markdowns))
+
+    def test_sending_methods_flush(self):
+        """Verify other sends, and progress messages, go out after the output buffered before them."""
+        self.buffered.send_markdown("before")
+        self.buffered.send_error("failed")
+        self.assertEqual(self.dispatcher.calls, [("markdown", "before"), ("error", "failed")])
+        self.assertEqual(self.buffered.platform_slug, "mock")
+
+        list(iter_with_progress(range(2), self.buffered, "{count} done", interval=0))
+        self.assertEqual(self.dispatcher.sent_markdowns[-1], "1 done")
+
+
+class HandleBufferedSubcommandsTest(CommittedTestDataTestCase):
+    """Test running commands with buffered output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-buffering-test", is_superuser=True)
+        cls.namespace = Namespace.objects.create(name="Atsu Buffering Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        Prefix.objects.create(prefix="10.92.0.0/24", namespace=cls.namespace, status=status)
+
+    def test_get_prefixes(self):
+        """Verify the get-prefixes response takes fewer platform API calls, and is all sent once the command ends."""
+        _RecordingDispatcher.instances.clear()
+        result = handle_buffered_subcommands(
+            "atsu",
+            "get-prefixes",
+            params=["namespace", str(self.namespace.pk)],
+            dispatcher_class=_RecordingDispatcher,
+            context={"user": self.user, "channel_id": self.id()},
+        )
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        (dispatcher,) = _RecordingDispatcher.instances
+        # echo, header blocks, then the title and table together, rather than four separate messages
+        self.assertEqual([kind for kind, _ in dispatcher.calls], ["markdown", "blocks", "markdown"])
+        self.assertIn("| 10.92.0.0/24 |", dispatcher.sent_markdowns[-1])
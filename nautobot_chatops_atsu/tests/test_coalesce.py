@@ -0,0 +1,93 @@
+"""Unit tests for nautobot_chatops_atsu single-flight coalescing."""
+
+import threading
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+
+from nautobot_chatops_atsu.coalesce import queryset_fingerprint, single_flight
+from nautobot_chatops_atsu.filters import filter_prefixes
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import get_prefixes
+
+User = get_user_model()
+
+
+class SingleFlightTest(TestCase):
+    """Test sharing one computation among identical concurrent calls."""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Verify calls arriving while a computation is in flight wait for its result."""
+        name = f"test-{uuid.uuid4()}"
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+            return ["rendered"]
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(single_flight(name, compute)))
+        first.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=lambda: results.append(single_flight(name, compute))) for _ in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        release.set()
+        for thread in [first, *waiters]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [["rendered"]] * 4)
+
+    def test_failed_computation_is_not_shared(self):
+        """Verify a failed computation releases its lock so that the next call computes again."""
+        name = f"test-{uuid.uuid4()}"
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            single_flight(name, fail)
+        self.assertEqual(single_flight(name, lambda: 42, wait=0), 42)
+
+    def test_fingerprint_ignores_filter_order(self):
+        """Verify the same filters in any order identify the same query."""
+        status, namespace = str(uuid.uuid4()), str(uuid.uuid4())
+        self.assertEqual(
+            queryset_fingerprint(filter_prefixes(Prefix.objects.all(), [("status", status), ("namespace", namespace)])),
+            queryset_fingerprint(filter_prefixes(Prefix.objects.all(), [("namespace", namespace), ("status", status)])),
+        )
+
+
+class CoalescedTableTest(CommittedTestDataTestCase):
+    """Test sharing rendered get-prefixes tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-coalesce-test", is_superuser=True)
+        cls.namespace = Namespace.objects.create(name="Atsu Coalesce Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        for index in range(3):
+            Prefix.objects.create(prefix=f"10.90.{index}.0/24", namespace=cls.namespace, status=status)
+
+    def test_identical_requests_share_table(self):
+        """Verify an identical request reuses the rendered table, and a Prefix change renders it again."""
+        first = Mock_Dispatcher({"user": self.user})
+        get_prefixes(first, "namespace", str(self.namespace.pk))
+        second = Mock_Dispatcher({"user": self.user})
+        with self.assertNumQueries(0):
+            get_prefixes(second, "namespace", str(self.namespace.pk))
+        self.assertEqual(first.sent_markdowns[1:], second.sent_markdowns[1:])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Prefix.objects.filter(network="10.90.2.0").delete()
+        third = Mock_Dispatcher({"user": self.user})
+        get_prefixes(third, "namespace", str(self.namespace.pk))
+        self.assertNotIn("10.90.2.0/24", third.sent_markdowns[-1])
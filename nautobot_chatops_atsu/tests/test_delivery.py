@@ -0,0 +1,105 @@
+"""Unit tests for nautobot_chatops_atsu concurrent message delivery."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+
+from nautobot_chatops_atsu.buffering import message_size_limit
+from nautobot_chatops_atsu.delivery import retry_after, send_concurrently
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher, send_prefix_table
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+
+
+class RateLimited(Exception):
+    """Error raised by the stub chat server when it rate limits a message, as the platform clients do."""
+
+    def __init__(self, retry_after_seconds):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(status_code=429, headers={"Retry-After": retry_after_seconds})
+
+
+class StubChatServer(Mock_Dispatcher):
+    """Mock dispatcher that takes ``latency`` seconds per message, and may rate limit every message once at first."""
+
+    def __init__(self, latency=0.05, rate_limit=True):
+        super().__init__({"platform_slug": "slack"})
+        self.latency = latency
+        self.rate_limited = set() if rate_limit else None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send_markdown(self, markdown):
+        with self.lock:
+            if self.rate_limited is not None and markdown not in self.rate_limited:
+                self.rate_limited.add(markdown)
+                raise RateLimited("0")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            super().send_markdown(markdown)
+
+
+class SendConcurrentlyTest(TestCase):
+    """Test sending messages concurrently."""
+
+    def test_concurrent_delivery(self):
+        """Verify every message is sent once, labelled, within the concurrency, despite rate limiting."""
+        server = StubChatServer()
+        start = time.monotonic()
+        count = send_concurrently(server.send_markdown, (f"message {number}" for number in range(1, 13)), 4)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(count, 12)
+        self.assertEqual(
+            sorted(server.sent_markdowns), sorted(f"_Part {number}_\nmessage {number}" for number in range(1, 13))
+        )
+        self.assertLessEqual(server.max_in_flight, 4)
+        self.assertLess(elapsed, 12 * server.latency)
+
+    def test_errors_raised(self):
+        """Verify errors other than rate limiting are raised."""
+
+        def send(message):
+            raise ValueError(message)
+
+        with self.assertRaises(ValueError):
+            send_concurrently(send, ["a", "b", "c"], 2)
+
+    def test_retry_after(self):
+        """Verify the Retry-After delay is only read from rate limiting errors."""
+        self.assertEqual(retry_after(RateLimited("2")), 2.0)
+        self.assertEqual(retry_after(RateLimited("soon")), 1.0)
+        self.assertIsNone(retry_after(ValueError()))
+
+
+class SendPrefixTableTest(CommittedTestDataTestCase):
+    """Test sending Prefix tables concurrently."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.namespace = Namespace.objects.create(name="Atsu Delivery Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        for index in range(200):
+            Prefix.objects.create(prefix=f"10.93.{index}.0/24", namespace=cls.namespace, status=status)
+
+    def test_labelled_chunks(self):
+        """Verify a table split over several messages is sent in labelled parts that fit the platform."""
+        server = StubChatServer(latency=0, rate_limit=False)
+        with mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"send_concurrency": 4}):
+            send_prefix_table(server, Prefix.objects.filter(namespace=self.namespace), "namespace")
+
+        parts = [markdown for markdown in server.sent_markdowns if markdown.startswith("_Part ")]
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(len(parts), len(server.sent_markdowns) - 1)
+        self.assertTrue(all(len(markdown) <= message_size_limit(server) for markdown in parts))
+        rows = {line for markdown in parts for line in markdown.splitlines()[3:]}
+        self.assertEqual(len(rows), 200)
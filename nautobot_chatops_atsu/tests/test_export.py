@@ -0,0 +1,78 @@
+"""Unit tests for nautobot_chatops_atsu result exports."""
+
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.export import parse_export_option
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import get_prefixes
+
+User = get_user_model()
+
+
+class ParseExportOptionTest(TestCase):
+    """Test parsing of the --export option."""
+
+    def test_parse(self):
+        """Verify the option is accepted as one or two arguments, anywhere among the others."""
+        self.assertEqual(parse_export_option(["namespace", "--export", "CSV", "x"]), ("csv", ["namespace", "x"]))
+        self.assertEqual(parse_export_option(["--export=json", None]), ("json", [None]))
+        self.assertEqual(parse_export_option(["table"]), (None, ["table"]))
+        with self.assertRaises(ValueError):
+            parse_export_option(["--export", "xml"])
+        with self.assertRaises(ValueError):
+            parse_export_option(["--export"])
+
+
+class ExportPrefixesTest(CommittedTestDataTestCase):
+    """Test exporting get-prefixes results as file attachments."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-export-test", is_superuser=True)
+        cls.namespace = Namespace.objects.create(name="Atsu Export Test")
+        cls.status = Status.objects.get_for_model(Prefix).first()
+        for index in range(5):
+            Prefix.objects.create(prefix=f"10.80.{index}.0/24", namespace=cls.namespace, status=cls.status)
+
+    def setUp(self):
+        self.dispatcher = Mock_Dispatcher({"user": self.user, "channel_id": self.id()})
+
+    def test_export_csv(self):
+        """Verify every matching Prefix is uploaded as one compressed CSV attachment instead of a table."""
+        result = get_prefixes(self.dispatcher, "namespace", str(self.namespace.pk), "--export", "csv")
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        [(filename, content)] = self.dispatcher.uploads
+        self.assertTrue(filename.startswith("prefixes_") and filename.endswith(".csv.gz"))
+        rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(rows[0], ["Prefix", "Status", "Role", "Namespace"])
+        self.assertEqual(rows[1], ["10.80.0.0/24", self.status.name, "", self.namespace.name])
+        self.assertEqual(len(rows), 1 + 5)
+        self.assertTrue(self.dispatcher.sent_markdowns[-1].startswith("**Exported 5 prefixes"))
+
+    def test_export_json(self):
+        """Verify compound filters are exported as a JSON array of objects keyed by column."""
+        get_prefixes(self.dispatcher, f"namespace={self.namespace.pk}", "--export=json")
+        rows = json.loads(gzip.decompress(self.dispatcher.uploads[0][1]))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4]["Prefix"], "10.80.4.0/24")
+
+    def test_export_prompt(self):
+        """Verify prompts for a missing filter value keep the export option, and unknown formats are rejected."""
+        self.assertFalse(get_prefixes(self.dispatcher, "namespace", None, "--export", "csv"))
+        self.assertEqual(self.dispatcher.prompts[-1][0], "atsu get-prefixes --export csv namespace")
+        result = get_prefixes(self.dispatcher, "--export", "csv", "namespace", str(self.namespace.pk))
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertEqual(len(self.dispatcher.uploads), 1)
+
+        result = get_prefixes(self.dispatcher, "all", None, "--export=xml")
+        self.assertEqual(result[0], CommandStatusChoices.STATUS_FAILED)
@@ -0,0 +1,78 @@
+"""Unit tests for nautobot_chatops_atsu helpers."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import Namespace, Prefix
+
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher, iter_markdown_table_chunks, send_prefix_table
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+
+
+class SendPrefixTableTest(CommittedTestDataTestCase):
+    """Test rendering of Prefix tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.namespace = Namespace.objects.create(name="Atsu Test")
+        cls.status = Status.objects.get_for_model(Prefix).first()
+        cls.role = Role.objects.create(name="Atsu Role")
+        cls.role.content_types.add(ContentType.objects.get_for_model(Prefix))
+
+    def _create_prefixes(self, count, second_octet):
+        for index in range(count):
+            Prefix.objects.create(
+                prefix=f"10.{second_octet}.{index}.0/24",
+                namespace=self.namespace,
+                status=self.status,
+                role=self.role if index % 2 else None,
+            )
+
+    def _send_table(self, **kwargs):
+        dispatcher = Mock_Dispatcher()
+        send_prefix_table(dispatcher, Prefix.objects.filter(namespace=self.namespace), "namespace", **kwargs)
+        return dispatcher
+
+    def test_table_contents(self):
+        """Verify every column is rendered, including prefixes without a role."""
+        self._create_prefixes(2, 0)
+        dispatcher = self._send_table()
+        table = dispatcher.sent_markdowns[-1].splitlines()
+        self.assertEqual(table[0], "| Prefix | Status | Role | Namespace |")
+        self.assertIn(f"| 10.0.0.0/24 | {self.status.name} |  | Atsu Test |", table)
+        self.assertIn(f"| 10.0.1.0/24 | {self.status.name} | Atsu Role | Atsu Test |", table)
+
+    def test_constant_query_count(self):
+        """Verify the number of queries does not grow with the number of rows."""
+        self._create_prefixes(3, 1)
+        with self.assertNumQueries(1):
+            self._send_table()
+        self._create_prefixes(30, 2)
+        with self.assertNumQueries(1):
+            dispatcher = self._send_table()
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 33)
+
+    def test_streamed_chunks(self):
+        """Verify rows are streamed in small batches without changing the rendered table."""
+        self._create_prefixes(12, 3)
+        with self.assertNumQueries(1):
+            dispatcher = self._send_table(chunk_size=5)
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 12)
+
+
+class MarkdownTableChunksTest(TestCase):
+    """Test splitting of markdown tables into platform sized messages."""
+
+    def test_chunks_repeat_header_and_fit_size(self):
+        """Verify every chunk carries the header and no chunk exceeds the size limit."""
+        rows = ([f"row-{index}", "x" * 10] for index in range(100))
+        chunks = list(iter_markdown_table_chunks(["Name", "Value"], rows, max_size=200))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 200)
+            self.assertTrue(chunk.startswith("| Name | Value |\n| --- | --- |\n"))
+        self.assertEqual(sum(len(chunk.splitlines()) - 2 for chunk in chunks), 100)
+
+    def test_empty_table(self):
+        """Verify an empty table still renders its header."""
+        self.assertEqual(list(iter_markdown_table_chunks(["Name"], [], max_size=200)), ["| Name |\n| --- |"])
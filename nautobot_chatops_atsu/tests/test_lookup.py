@@ -0,0 +1,135 @@
+"""Unit tests for nautobot_chatops_atsu longest-prefix-match lookup."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from nautobot.extras.models import Status
+from nautobot.ipam.models import VRF, Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu import lookup
+from nautobot_chatops_atsu.benchmarks import _orm_lookup
+from nautobot_chatops_atsu.cache import bump_model_version
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.lookup import parse_addresses, resolve_addresses
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import bulk_lookup
+from nautobot_chatops_atsu.worker import lookup as lookup_command
+
+User = get_user_model()
+
+
+class PrefixLookupTest(CommittedTestDataTestCase):
+    """Test longest-prefix-match lookups against the equivalent database query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-lookup-test", is_superuser=True)
+        cls.namespaces = [Namespace.objects.create(name=f"Atsu Lookup {index}") for index in range(2)]
+        cls.status = Status.objects.get_for_model(Prefix).first()
+        for prefix in ("10.80.0.0/16", "10.80.1.0/24", "10.80.1.128/25", "10.80.1.129/32", "2001:db8:80::/48"):
+            Prefix.objects.create(prefix=prefix, namespace=cls.namespaces[0], status=cls.status)
+        Prefix.objects.create(prefix="10.80.0.0/20", namespace=cls.namespaces[1], status=cls.status)
+
+    def test_matches_orm(self):
+        """Verify index lookups match net_contains_or_equals queries and need no queries once built."""
+        addresses = ("10.80.1.129", "10.80.1.130", "10.80.1.1", "10.80.200.1", "10.81.0.1", "2001:db8:80::1", "::1")
+        lookup.get_prefix_index()
+        with self.assertNumQueries(0):
+            results = {address: lookup.lookup_address(address) for address in addresses}
+        for address in addresses:
+            self.assertEqual(results[address], _orm_lookup(address), address)
+
+    def test_patched_on_commit(self):
+        """Verify committed Prefix changes patch the index instead of rebuilding it."""
+        index = lookup.get_prefix_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            prefix = Prefix.objects.create(prefix="10.80.1.0/26", namespace=self.namespaces[0], status=self.status)
+        with self.assertNumQueries(0):
+            self.assertIs(lookup.get_prefix_index(), index)
+            self.assertEqual(lookup.lookup_address("10.80.1.1")[str(self.namespaces[0].pk)][-1], str(prefix.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            prefix.delete()
+        self.assertIs(lookup.get_prefix_index(), index)
+        self.assertEqual(lookup.lookup_address("10.80.1.1"), _orm_lookup("10.80.1.1"))
+
+    def test_rebuilt_on_change_elsewhere(self):
+        """Verify the index is rebuilt when Prefixes changed without a patch being applied, as in another process."""
+        index = lookup.get_prefix_index()
+        prefix = Prefix.objects.create(prefix="10.80.2.0/24", namespace=self.namespaces[1], status=self.status)
+        # the change is not committed yet, so the index still answers from before it
+        self.assertIs(lookup.get_prefix_index(), index)
+        bump_model_version(Prefix)
+        self.assertIn(str(prefix.pk), lookup.lookup_address("10.80.2.1")[str(self.namespaces[1].pk)])
+
+    def test_command(self):
+        """Verify the lookup subcommand reports the most specific prefix of each namespace."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        self.assertEqual(lookup_command(dispatcher, "10.80.1.200"), CommandStatusChoices.STATUS_SUCCEEDED)
+        table = dispatcher.sent_markdowns[-1].splitlines()
+        self.assertEqual(table[0], "| Namespace | Prefix | Status | Type |")
+        self.assertIn(f"| Atsu Lookup 0 | 10.80.1.128/25 | {self.status.name} | Network |", table)
+        self.assertIn(f"| Atsu Lookup 1 | 10.80.0.0/20 | {self.status.name} | Network |", table)
+
+    def test_command_invalid_address(self):
+        """Verify invalid addresses are reported as a failure."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        result = lookup_command(dispatcher, "10.80.1")
+        self.assertEqual(result[0], CommandStatusChoices.STATUS_FAILED)
+
+    def test_benchmark(self):
+        """Verify the lookup benchmark reports the index and ORM implementations."""
+        out = StringIO()
+        call_command("atsu_benchmark", "lookup", "--sample-size", "5", stdout=out)
+        self.assertIn("lookup: radix index", out.getvalue())
+        self.assertIn("lookup: ORM net_contains_or_equals", out.getvalue())
+
+    def test_bulk_benchmark(self):
+        """Verify the bulk lookup benchmark reports the sorted range and ORM implementations."""
+        out = StringIO()
+        call_command("atsu_benchmark", "bulk-lookup", "--sample-size", "5", stdout=out)
+        self.assertIn("bulk-lookup: sorted ranges", out.getvalue())
+
+
+class BulkLookupTest(CommittedTestDataTestCase):
+    """Test bulk lookups of many addresses within filtered Prefixes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-bulk-lookup-test", is_superuser=True)
+        cls.namespaces = [Namespace.objects.create(name=f"Atsu Bulk {index}") for index in range(2)]
+        status = Status.objects.get_for_model(Prefix).first()
+        for prefix in ("10.90.0.0/16", "10.90.1.0/24", "10.90.1.128/25", "10.90.2.0/24", "2001:db8:90::/48"):
+            Prefix.objects.create(prefix=prefix, namespace=cls.namespaces[0], status=status)
+        cls.other = Prefix.objects.create(prefix="10.90.1.0/24", namespace=cls.namespaces[1], status=status)
+        cls.vrf = VRF.objects.create(name="Atsu Bulk VRF", namespace=cls.namespaces[1])
+        cls.vrf.prefixes.add(cls.other)
+
+    def test_matches_orm(self):
+        """Verify every address resolves to the most specific containing Prefix, from a single query."""
+        addresses, invalid = parse_addresses("10.90.1.200, 10.90.1.5\n10.90.3.1 10.91.0.1;2001:db8:90::1 bogus")
+        self.assertEqual(invalid, ["bogus"])
+        prefixes = Prefix.objects.filter(namespace__in=self.namespaces)
+        with self.assertNumQueries(1):
+            results = resolve_addresses(prefixes, addresses)
+        names = {str(namespace.pk): namespace.name for namespace in self.namespaces}
+        cidrs = {str(prefix.pk): prefix.cidr_str for prefix in prefixes}
+        for address, result in zip(addresses, results):
+            expected = {names[ns]: cidrs[pks[-1]] for ns, pks in _orm_lookup(str(address)).items() if ns in names}
+            self.assertEqual(result, expected, address)
+
+    def test_command_scoped_by_vrf(self):
+        """Verify the bulk-lookup subcommand only considers Prefixes matched by the filter."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        result = bulk_lookup(dispatcher, "vrf", str(self.vrf.pk), "10.90.1.200 10.90.2.1")
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        table = dispatcher.sent_markdowns[-2].splitlines()
+        self.assertEqual(table[2:], ["| 10.90.1.200 | Atsu Bulk 1 | 10.90.1.0/24 |", "| 10.90.2.1 |  | (none) |"])
+        self.assertEqual(dispatcher.sent_markdowns[-1], "**1 of 2 addresses matched a prefix**")
+
+    def test_command_prompts_for_addresses(self):
+        """Verify the subcommand asks for the addresses once the filter is known."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        self.assertFalse(bulk_lookup(dispatcher, "all"))
+        self.assertEqual(dispatcher.prompts[-1][0], "atsu bulk-lookup all all")
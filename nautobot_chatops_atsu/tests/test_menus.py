@@ -0,0 +1,68 @@
+"""Unit tests for nautobot_chatops_atsu filter menus."""
+
+from unittest import mock
+
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+
+from nautobot_chatops_atsu.menus import get_prefix_filter_choices
+
+
+class PrefixFilterChoicesTest(TestCase):
+    """Test caching of Prefix filter choices."""
+
+    def test_choices_are_cached(self):
+        """Verify repeated menu lookups are served without database queries."""
+        choices = get_prefix_filter_choices("namespace")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_prefix_filter_choices("namespace"), choices)
+
+    def test_choices_invalidated_on_change(self):
+        """Verify committing the save or deletion of a choice model refreshes the cached choices."""
+        get_prefix_filter_choices("namespace")
+        with self.captureOnCommitCallbacks(execute=True):
+            namespace = Namespace.objects.create(name="Atsu Menu Test")
+        self.assertIn(("Atsu Menu Test", str(namespace.pk)), get_prefix_filter_choices("namespace"))
+        with self.captureOnCommitCallbacks(execute=True):
+            namespace.delete()
+        self.assertNotIn(("Atsu Menu Test", str(namespace.pk)), get_prefix_filter_choices("namespace"))
+
+    def test_unknown_filter_type(self):
+        """Verify unknown filter types have no choices."""
+        self.assertIsNone(get_prefix_filter_choices("bogus"))
+
+    @mock.patch("nautobot_chatops_atsu.menus.MENU_PAGE_SIZE", 2)
+    def test_choices_paged(self):
+        """Verify menus are fetched one page at a time and walk every choice exactly once."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(5):
+                Namespace.objects.create(name=f"Atsu Page {index}")
+        expected = [(ns.name, str(ns.pk)) for ns in Namespace.objects.order_by("name", "pk")]
+        collected = []
+        offset = 0
+        while True:
+            with self.assertNumQueries(1):
+                page = get_prefix_filter_choices("namespace", offset=offset)
+            if page[-1][0] != "Next...":
+                collected.extend(page)
+                break
+            self.assertEqual(len(page), 3)
+            collected.extend(page[:-1])
+            offset = int(page[-1][1].replace("menu_offset-", ""))
+        self.assertEqual(collected, expected)
+
+    def test_parent_choices_distinct(self):
+        """Verify a parent with several children is offered once."""
+        status = Status.objects.get_for_model(Prefix).first()
+        namespace = Namespace.objects.create(name="Atsu Parent Test")
+        parent = Prefix.objects.create(prefix="10.99.0.0/16", namespace=namespace, status=status)
+        Prefix.objects.create(prefix="10.99.1.0/24", namespace=namespace, status=status)
+        Prefix.objects.create(prefix="10.99.2.0/24", namespace=namespace, status=status)
+        choices = get_prefix_filter_choices("parent")
+        self.assertEqual(choices.count(("10.99.0.0/16", str(parent.pk))), 1)
+
+    def test_type_choices(self):
+        """Verify Prefix type choices are offered without a query."""
+        with self.assertNumQueries(0):
+            self.assertIn(("Container", "container"), get_prefix_filter_choices("type"))
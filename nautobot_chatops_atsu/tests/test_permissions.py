@@ -0,0 +1,78 @@
+"""Unit tests for nautobot_chatops_atsu permission restriction."""
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot.users.models import ObjectPermission
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.menus import get_prefix_filter_choices
+from nautobot_chatops_atsu.permissions import restrict
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import get_prefixes
+
+User = get_user_model()
+
+
+class RestrictTest(CommittedTestDataTestCase):
+    """Test restriction of querysets with cached permissions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.namespace = Namespace.objects.create(name="Atsu Permission Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        cls.visible = Prefix.objects.create(prefix="10.70.0.0/16", namespace=cls.namespace, status=status)
+        Prefix.objects.create(prefix="10.70.1.0/24", namespace=cls.namespace, status=status)
+        cls.hidden = Prefix.objects.create(prefix="10.71.0.0/16", namespace=cls.namespace, status=status)
+        Prefix.objects.create(prefix="10.71.1.0/24", namespace=cls.namespace, status=status)
+
+        cls.user = User.objects.create(username="atsu-permission-test")
+        # 10.70.0.0/16 and every /24 are visible, so 10.71.1.0/24 is visible while its parent is not
+        cls.permission = ObjectPermission.objects.create(
+            name="Atsu view 10.70/16",
+            actions=["view"],
+            constraints=[{"network__net_contained_or_equal": "10.70.0.0/16"}, {"prefix_length": 24}],
+        )
+        cls.permission.object_types.set([ContentType.objects.get_for_model(Prefix)])
+        cls.permission.users.add(cls.user)
+
+    def fresh_user(self):
+        """Return a new instance of the test user, as each chat command gets."""
+        return User.objects.get(pk=self.user.pk)
+
+    def test_matches_restricted_queryset(self):
+        """Verify the same Prefixes are visible as with RestrictedQuerySet.restrict()."""
+        user = self.fresh_user()
+        self.assertQuerySetEqual(
+            restrict(Prefix.objects.all(), user).order_by("network"),
+            Prefix.objects.restrict(self.fresh_user(), "view").order_by("network"),
+        )
+        self.assertFalse(restrict(Namespace.objects.all(), user).exists())
+
+    def test_permissions_cached(self):
+        """Verify the permissions of a user are loaded from the database once, and reloaded when they change."""
+        restrict(Prefix.objects.all(), self.fresh_user())
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            restrict(Prefix.objects.all(), user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.permission.users.remove(self.user)
+        self.assertFalse(restrict(Prefix.objects.all(), self.fresh_user()).exists())
+
+    def test_parent_filter_restricted(self):
+        """Verify a parent the user may not view matches none of its visible children, and is not offered."""
+        dispatcher = Mock_Dispatcher({"user": self.fresh_user()})
+        result = get_prefixes(dispatcher, "parent", str(self.hidden.pk))
+        self.assertEqual(result[0], CommandStatusChoices.STATUS_FAILED)
+
+        dispatcher = Mock_Dispatcher({"user": self.fresh_user()})
+        self.assertEqual(get_prefixes(dispatcher, "parent", "10.71.0.0/16")[0], CommandStatusChoices.STATUS_FAILED)
+        self.assertEqual(dispatcher.errors, ['parent "10.71.0.0/16" not found'])
+
+        choices = get_prefix_filter_choices("parent", user=self.fresh_user())
+        self.assertIn(("10.70.0.0/16", str(self.visible.pk)), choices)
+        self.assertNotIn(("10.71.0.0/16", str(self.hidden.pk)), choices)
+        self.assertIn(("10.71.0.0/16", str(self.hidden.pk)), get_prefix_filter_choices("parent"))
@@ -0,0 +1,73 @@
+"""Unit tests for nautobot_chatops_atsu rendered output caching."""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from nautobot.extras.models import Status
+from nautobot.ipam.models import VRF, Namespace, Prefix, VRFPrefixAssignment
+
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.rendered import get_render_stats, get_rendered, set_rendered
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import get_prefixes
+
+User = get_user_model()
+
+
+class RenderedTest(TestCase):
+    """Test caching of rendered output."""
+
+    def test_roundtrip_compressed(self):
+        """Verify messages are stored compressed, and read back with hits and misses counted."""
+        name = f"test-{uuid.uuid4()}"
+        messages = ["| Prefix |\n| --- |" + "\n| 10.0.0.0/24 |" * 200]
+        self.assertIsNone(get_rendered(name, name))
+        set_rendered(name, messages)
+        self.assertLess(len(cache.get(name)), len(messages[0]) // 10)
+        self.assertEqual(get_rendered(name, name), messages)
+        self.assertEqual(get_render_stats(name), {"hits": 1, "misses": 1})
+
+
+class CachedPrefixTableTest(CommittedTestDataTestCase):
+    """Test caching of get-prefixes tables until the data they show changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-rendered-test", is_superuser=True)
+        cls.namespace = Namespace.objects.create(name="Atsu Rendered Test")
+        cls.status = Status.objects.create(name="Atsu Rendered")
+        cls.status.content_types.add(*Status.objects.get_for_model(Prefix).first().content_types.all())
+        Prefix.objects.create(prefix="10.91.0.0/24", namespace=cls.namespace, status=cls.status)
+
+    def test_related_change_invalidates(self):
+        """Verify renaming the Status of listed Prefixes renders their table again."""
+        first = Mock_Dispatcher({"user": self.user})
+        get_prefixes(first, "namespace", str(self.namespace.pk))
+        with self.assertNumQueries(0):
+            get_prefixes(Mock_Dispatcher({"user": self.user}), "namespace", str(self.namespace.pk))
+
+        self.status.name = "Atsu Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.save()
+        second = Mock_Dispatcher({"user": self.user})
+        get_prefixes(second, "namespace", str(self.namespace.pk))
+        self.assertIn("Atsu Renamed", second.sent_markdowns[-1])
+
+    def test_vrf_assignment_invalidates(self):
+        """Verify assigning a listed Prefix to a VRF directly lists it in the VRF table."""
+        with self.captureOnCommitCallbacks(execute=True):
+            vrf = VRF.objects.create(name="Atsu Rendered VRF", namespace=self.namespace)
+            other = Prefix.objects.create(prefix="10.91.1.0/24", namespace=self.namespace, status=self.status)
+            VRFPrefixAssignment.objects.create(vrf=vrf, prefix=other)
+        first = Mock_Dispatcher({"user": self.user})
+        get_prefixes(first, "vrf", str(vrf.pk))
+        self.assertIn("10.91.1.0/24", first.sent_markdowns[-1])
+        self.assertNotIn("10.91.0.0/24", first.sent_markdowns[-1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VRFPrefixAssignment.objects.create(vrf=vrf, prefix=Prefix.objects.get(network="10.91.0.0"))
+        second = Mock_Dispatcher({"user": self.user})
+        get_prefixes(second, "vrf", str(vrf.pk))
+        self.assertIn("10.91.0.0/24", second.sent_markdowns[-1])
@@ -0,0 +1,83 @@
+"""Unit tests for nautobot_chatops_atsu synthetic IPAM data."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import RIR, VLAN, Prefix, VRFPrefixAssignment
+
+from nautobot_chatops_atsu.cache import get_model_versions
+from nautobot_chatops_atsu.synthetic import RIR_NAMES, generate_ipam_data
+
+
+class GenerateIPAMDataTest(TestCase):
+    """Test generating synthetic IPAM data."""
+
+    def test_hierarchy(self):
+        """Verify the requested Prefixes are created in every namespace, nested under their parents."""
+        versions = get_model_versions([Prefix, RIR, VRFPrefixAssignment])
+        created = generate_ipam_data(2000, seed=1, namespace_count=2, label="atsu-test", batch_size=300)
+
+        prefixes = Prefix.objects.filter(namespace__name__startswith="atsu-test-")
+        self.assertEqual(created["prefixes"], 2000)
+        self.assertEqual(prefixes.count(), 2000)
+        self.assertEqual(prefixes.values("namespace").distinct().count(), 2)
+        self.assertEqual(VLAN.objects.filter(name__startswith="atsu-test-").count(), created["vlans"])
+        self.assertFalse(prefixes.filter(parent__isnull=True).exclude(prefix_length=8).exists())
+        for prefix in prefixes.filter(type=PrefixTypeChoices.TYPE_POOL).select_related("parent")[:20]:
+            self.assertEqual(prefix.parent.prefix_length, 24)
+            self.assertIn(prefix.prefix, prefix.parent.prefix)
+        self.assertTrue(VRFPrefixAssignment.objects.filter(prefix__in=prefixes).exists())
+        self.assertTrue(RIR.objects.get(name=RIR_NAMES[0]).is_private)
+        new_versions = get_model_versions([Prefix, RIR, VRFPrefixAssignment])
+        self.assertTrue(all(new_versions[label] != version for label, version in versions.items()))
+
+    def test_existing_rir_unchanged(self):
+        """Verify an RIR that already exists is used as it is."""
+        RIR.objects.create(name=RIR_NAMES[0], is_private=False)
+        generate_ipam_data(100, label="atsu-rir")
+        self.assertFalse(RIR.objects.get(name=RIR_NAMES[0]).is_private)
+
+    def test_deterministic(self):
+        """Verify the same seed generates the same Prefixes, and a label cannot be reused."""
+        generate_ipam_data(500, seed=7, label="atsu-first")
+        generate_ipam_data(500, seed=7, label="atsu-second")
+        first, second = (
+            list(
+                Prefix.objects.filter(namespace__name__startswith=label)
+                .order_by("network", "prefix_length")
+                .values_list("network", "prefix_length", "type", "status__name", "role__name", "vlan__vid")
+            )
+            for label in ("atsu-first-", "atsu-second-")
+        )
+        self.assertEqual(first, second)
+        with self.assertRaises(CommandError):
+            call_command("atsu_generate_data", "--prefixes", "10", "--label", "atsu-first", stdout=StringIO())
+
+    def test_batch_size_independent(self):
+        """Verify the same seed and label generate the same objects, primary keys included, in any batch size."""
+        generated = []
+        for batch_size in (7, 500):
+            with transaction.atomic():
+                generate_ipam_data(500, seed=3, label="atsu-batch", batch_size=batch_size)
+                prefixes = Prefix.objects.filter(namespace__name__startswith="atsu-batch-")
+                generated.append(
+                    (
+                        list(
+                            prefixes.order_by("pk").values_list(
+                                "pk", "network", "prefix_length", "type", "parent_id", "status__name", "vlan__vid"
+                            )
+                        ),
+                        list(
+                            VRFPrefixAssignment.objects.filter(prefix__in=prefixes)
+                            .order_by("pk")
+                            .values_list("pk", "vrf_id", "prefix_id")
+                        ),
+                    )
+                )
+                transaction.set_rollback(True)
+        self.assertTrue(generated[0][1])
+        self.assertEqual(generated[0], generated[1])
@@ -0,0 +1,102 @@
+"""Unit tests for nautobot_chatops_atsu Prefix trees."""
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Namespace, Prefix
+from nautobot_chatops.choices import CommandStatusChoices
+
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.tree import build_prefix_tree, iter_tree_lines
+from nautobot_chatops_atsu.worker import prefix_tree
+
+User = get_user_model()
+
+
+class PrefixTreeTest(CommittedTestDataTestCase):
+    """Test building Prefix trees from a single query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-tree-test", is_superuser=True)
+        namespace = Namespace.objects.create(name="Atsu Tree Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        for prefix in (
+            "10.120.0.0/16",
+            "10.120.0.0/20",
+            "10.120.1.0/24",
+            "10.120.1.0/26",
+            "10.120.2.0/24",
+            "10.120.16.0/20",
+            "10.121.0.0/24",
+        ):
+            Prefix.objects.create(prefix=prefix, namespace=namespace, status=status)
+        cls.parent = Prefix.objects.select_related("status").get(prefix="10.120.0.0/16", namespace=namespace)
+
+    def test_matches_children(self):
+        """Verify the tree matches the Prefix hierarchy maintained by Nautobot, from a single query."""
+        with self.assertNumQueries(1):
+            root, truncated = build_prefix_tree(self.parent, Prefix.objects.all())
+        self.assertFalse(truncated)
+        self.assertEqual(root.cidr, self.parent.cidr_str)
+        built = {node.cidr: [child.cidr for child in node.children] for _, node in iter_tree_lines([root])}
+        expected = {
+            prefix.cidr_str: [child.cidr_str for child in prefix.children.order_by("network", "prefix_length")]
+            for prefix in self.parent.descendants(include_self=True)
+        }
+        self.assertEqual(built, expected)
+
+    def test_lines(self):
+        """Verify nodes are drawn depth first with tree guides, down to the requested depth."""
+        root, _ = build_prefix_tree(self.parent, Prefix.objects.all())
+        self.assertEqual(
+            [guide + node.cidr for guide, node in iter_tree_lines([root], max_depth=2)],
+            [
+                "10.120.0.0/16",
+                "├─ 10.120.0.0/20",
+                "│ ├─ 10.120.1.0/24",
+                "│ └─ 10.120.2.0/24",
+                "└─ 10.120.16.0/20",
+            ],
+        )
+
+    def test_bounded(self):
+        """Verify Prefixes below the depth are only counted, and no more Prefixes than the limit are read."""
+        with self.assertNumQueries(1):
+            root, truncated = build_prefix_tree(self.parent, Prefix.objects.all(), max_depth=1)
+        self.assertFalse(truncated)
+        self.assertEqual(root.child_count, 2)
+        self.assertEqual(
+            [(child.cidr, child.child_count, child.children) for child in root.children],
+            [
+                ("10.120.0.0/20", 2, []),
+                ("10.120.16.0/20", 0, []),
+            ],
+        )
+
+        root, truncated = build_prefix_tree(self.parent, Prefix.objects.all(), limit=3)
+        self.assertTrue(truncated)
+        self.assertEqual(
+            [node.cidr for _, node in iter_tree_lines([root])],
+            [
+                "10.120.0.0/16",
+                "10.120.0.0/20",
+                "10.120.1.0/24",
+                "10.120.1.0/26",
+            ],
+        )
+
+    def test_command(self):
+        """Verify the prefix-tree subcommand sends the tree with child counts."""
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        self.assertEqual(prefix_tree(dispatcher, str(self.parent.pk), "1"), CommandStatusChoices.STATUS_SUCCEEDED)
+        table = dispatcher.sent_markdowns[-1].splitlines()
+        self.assertEqual(table[0], "| Prefix | Type | Status | Children |")
+        self.assertEqual([row.split(" | ")[-1] for row in table[2:]], ["2 |", "2 |", "0 |"])
+
+        with mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"max_table_rows": 2}):
+            prefix_tree(dispatcher, str(self.parent.pk), "1")
+        self.assertIn("Only the first 2 prefixes", dispatcher.sent_markdowns[-1])
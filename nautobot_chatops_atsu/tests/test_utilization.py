@@ -0,0 +1,36 @@
+"""Unit tests for nautobot_chatops_atsu bulk Prefix utilization."""
+
+from nautobot.extras.models import Status
+from nautobot.ipam.models import IPAddress, Namespace, Prefix
+
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.utilization import get_prefix_utilization
+
+
+class PrefixUtilizationTest(CommittedTestDataTestCase):
+    """Test bulk Prefix utilization against Prefix.get_utilization()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.namespace = Namespace.objects.create(name="Atsu Utilization Test")
+        status = Status.objects.get_for_model(Prefix).first()
+        ip_status = Status.objects.get_for_model(IPAddress).first()
+        for prefix, prefix_type in (
+            ("10.70.0.0/16", "container"),
+            ("10.70.1.0/24", "network"),
+            ("10.70.1.64/26", "pool"),
+            ("10.70.2.0/24", "network"),
+            ("10.70.3.0/30", "network"),
+            ("2001:db8:70::/64", "network"),
+        ):
+            Prefix.objects.create(prefix=prefix, namespace=cls.namespace, status=status, type=prefix_type)
+        for address in ("10.70.1.1", "10.70.1.70", "10.70.1.200", "10.70.2.0", "10.70.3.1", "2001:db8:70::1"):
+            IPAddress.objects.create(address=f"{address}/24", namespace=cls.namespace, status=ip_status)
+
+    def test_matches_get_utilization(self):
+        """Verify bulk results match the per-Prefix model method."""
+        prefixes = Prefix.objects.filter(namespace=self.namespace)
+        expected = {prefix.cidr_str: tuple(prefix.get_utilization()) for prefix in prefixes}
+        with self.assertNumQueries(3):
+            results = get_prefix_utilization(prefixes)
+        self.assertEqual({usage.prefix: (usage.numerator, usage.denominator) for usage in results}, expected)
@@ -0,0 +1,260 @@
+"""Unit tests for nautobot_chatops_atsu worker commands."""
+
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nautobot.core.celery import app
+from nautobot.extras.models import Status
+from nautobot.ipam.models import VLAN, Namespace, Prefix
+from nautobot.tenancy.models import Tenant
+from nautobot_chatops.choices import CommandStatusChoices
+from nautobot_chatops.models import CommandLog
+
+from nautobot_chatops_atsu.background import iter_with_progress, run_in_background
+from nautobot_chatops_atsu.conversation import get_conversation
+from nautobot_chatops_atsu.filters import MAX_CANDIDATES, resolve_filter_value, resolve_filters
+from nautobot_chatops_atsu.helpers import Mock_Dispatcher
+from nautobot_chatops_atsu.tests import CommittedTestDataTestCase
+from nautobot_chatops_atsu.worker import get_prefixes, prefix_summary, prefix_utilization
+
+User = get_user_model()
+
+
+class GetPrefixesTest(CommittedTestDataTestCase):
+    """Test the get-prefixes subcommand."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="atsu-worker-test", is_superuser=True)
+        cls.namespace = Namespace.objects.create(name="Atsu Worker Test")
+        cls.status = Status.objects.get_for_model(Prefix).first()
+        for index in range(5):
+            Prefix.objects.create(prefix=f"10.50.{index}.0/24", namespace=cls.namespace, status=cls.status)
+
+    def setUp(self):
+        # conversation state outlives the test transaction, so each test talks in a channel of its own
+        self.context = {"user": self.user, "channel_id": self.id()}
+        self.dispatcher = Mock_Dispatcher(self.context)
+
+    def test_table(self):
+        """Verify matching prefixes are listed in a table."""
+        result = get_prefixes(self.dispatcher, "namespace", str(self.namespace.pk))
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertIn("| 10.50.4.0/24 |", self.dispatcher.sent_markdowns[-1])
+
+    def test_no_prefixes(self):
+        """Verify an empty result is reported as a failure."""
+        result = get_prefixes(self.dispatcher, "type", "pool")
+        self.assertEqual(result[0], CommandStatusChoices.STATUS_FAILED)
+        self.assertEqual(len(self.dispatcher.errors), 1)
+
+    def test_prompt_for_filter_value(self):
+        """Verify a filter type without a value prompts for one."""
+        self.assertFalse(get_prefixes(self.dispatcher, "namespace"))
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, "atsu get-prefixes namespace")
+        self.assertIn((self.namespace.name, str(self.namespace.pk)), choices)
+
+    def test_utilization(self):
+        """Verify the prefix-utilization subcommand reports each matching prefix."""
+        result = prefix_utilization(self.dispatcher, "namespace", str(self.namespace.pk))
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertIn("| 10.50.0.0/24 | Network | 0/254 | 0.0% |", self.dispatcher.sent_markdowns[-1])
+
+    def test_compound_filters(self):
+        """Verify repeated type=value filters are combined into one query, matching any value of the same type."""
+        tenant = Tenant.objects.create(name="Atsu Worker Tenant")
+        Prefix.objects.filter(network__in=["10.50.1.0", "10.50.2.0"]).update(tenant=tenant)
+        Prefix.objects.filter(network="10.50.2.0").update(type="container")
+        filters = (f"namespace={self.namespace.pk}", f"tenant={tenant.pk}", f"status={self.status.pk}")
+        result = get_prefixes(self.dispatcher, *filters)
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        rows = self.dispatcher.sent_markdowns[-1].splitlines()[2:]
+        self.assertEqual([row.split(" | ")[0] for row in rows], ["| 10.50.1.0/24", "| 10.50.2.0/24"])
+
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        get_prefixes(dispatcher, *filters, "type=network")
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 1)
+
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        get_prefixes(dispatcher, f"tenant={tenant.pk}", "type=network", "type=container")
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 2)
+
+    def test_compound_filters_invalid(self):
+        """Verify unknown filter types and malformed values are reported without querying Prefixes."""
+        self.assertEqual(get_prefixes(self.dispatcher, "bogus=1")[0], CommandStatusChoices.STATUS_FAILED)
+        self.assertEqual(get_prefixes(self.dispatcher, "tenant=bogus")[0], CommandStatusChoices.STATUS_FAILED)
+        self.assertEqual(self.dispatcher.errors, ["bogus not supported", 'tenant "bogus" not found'])
+
+    def test_filter_by_name(self):
+        """Verify names, VLAN IDs and CIDRs are resolved with one indexed query each, without a menu round trip."""
+        vlan = VLAN.objects.create(vid=3001, name="atsu-worker-vlan", status=self.status)
+        Prefix.objects.filter(network="10.50.3.0").update(vlan=vlan)
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_filter_value("namespace", self.namespace.name), str(self.namespace.pk))
+        self.assertEqual(resolve_filter_value("namespace", "atsu worker"), str(self.namespace.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_filter_value("vlan", "3001"), str(vlan.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = Prefix.objects.create(prefix="10.50.0.0/16", namespace=self.namespace, status=self.status)
+        self.assertEqual(resolve_filter_value("parent", "10.50.0.0/16"), str(parent.pk))
+        self.assertEqual(resolve_filter_value("type", "Container"), "container")
+
+        result = get_prefixes(self.dispatcher, "namespace", self.namespace.name)
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertEqual(self.dispatcher.prompts, [])
+        self.assertEqual(len(self.dispatcher.sent_markdowns[-1].splitlines()), 2 + 6)
+
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        get_prefixes(dispatcher, "namespace=Atsu Worker Test", "vlan=3001")
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 1)
+
+    def test_ambiguous_filter_value(self):
+        """Verify a name matching several objects is answered with a menu of the candidates."""
+        tenants = [Tenant.objects.create(name=f"Atsu Ambiguous {index}") for index in range(2)]
+        self.assertFalse(get_prefixes(self.dispatcher, "tenant", "atsu ambiguous"))
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, "atsu get-prefixes tenant")
+        self.assertEqual(choices, [(tenant.name, str(tenant.pk)) for tenant in tenants])
+
+        self.assertFalse(get_prefixes(self.dispatcher, f"namespace={self.namespace.pk}", "tenant=Atsu Ambiguous"))
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, f"atsu get-prefixes namespace={self.namespace.pk}")
+        self.assertEqual(choices[0], (tenants[0].name, f"tenant={tenants[0].pk}"))
+
+    def test_ambiguous_filter_value_truncated(self):
+        """Verify at most MAX_CANDIDATES candidates are offered, telling the user when more match."""
+        for index in range(MAX_CANDIDATES + 1):
+            Tenant.objects.create(name=f"Atsu Many {index:02}")
+        self.assertFalse(get_prefixes(self.dispatcher, "tenant", "Atsu Many"))
+        _, help_text, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(len(choices), MAX_CANDIDATES)
+        self.assertIn(f"showing the first {MAX_CANDIDATES}", help_text)
+
+    def test_conversation_state(self):
+        """Verify filter values resolved by one step are reused by the next step in the same channel only."""
+        tenant = Tenant.objects.create(name="Atsu Conversation Tenant")
+        get_prefixes(self.dispatcher, "tenant", "Atsu Conversation")
+        with self.assertNumQueries(0):
+            resolved = get_conversation(Mock_Dispatcher(self.context)).state["resolved"]
+            self.assertEqual(resolve_filters([("tenant", "Atsu Conversation")], resolved), [("tenant", str(tenant.pk))])
+        other_channel = Mock_Dispatcher({"user": self.user, "channel_id": f"{self.id()}-other"})
+        self.assertEqual(get_conversation(other_channel).state, {})
+
+    @mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"max_table_rows": 3})
+    def test_compound_filters_summary(self):
+        """Verify oversized compound results offer the full table with the same filters."""
+        get_prefixes(self.dispatcher, f"namespace={self.namespace.pk}", f"status={self.status.pk}")
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, f"atsu get-prefixes namespace={self.namespace.pk} status={self.status.pk}")
+
+        dispatcher = Mock_Dispatcher({"user": self.user})
+        get_prefixes(dispatcher, f"namespace={self.namespace.pk}", f"status={self.status.pk}", choices[0][1])
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 5)
+
+    @mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"max_table_rows": 3})
+    def test_summary_for_oversized_result(self):
+        """Verify results above max_table_rows are summarized with an offer to show the full table."""
+        result = get_prefixes(self.dispatcher, "namespace", str(self.namespace.pk))
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        self.assertIn(f"| {self.status.name} | 5 |", "\n".join(self.dispatcher.sent_markdowns))
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, f"atsu get-prefixes namespace {self.namespace.pk}")
+        self.assertEqual(
+            choices,
+            [("Show the full table", "table"), ("Export as CSV", "--export=csv"), ("Export as JSON", "--export=json")],
+        )
+
+        dispatcher = Mock_Dispatcher(self.context)
+        with CaptureQueriesContext(connection) as queries:
+            get_prefixes(dispatcher, "namespace", str(self.namespace.pk), "table")
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + 5)
+        # the previous step found matches, so the full table is sent without checking for any again
+        self.assertFalse([query for query in queries.captured_queries if 'SELECT 1 AS "a"' in query["sql"]])
+
+    @mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"max_table_rows": 3})
+    def test_summary_for_all(self):
+        """Verify an oversized unfiltered result offers the full table without repeating "all" as a value."""
+        # table statistics not yet updated estimate fewer rows than were just counted
+        with mock.patch("nautobot_chatops_atsu.worker.estimate_count", return_value=0):
+            get_prefixes(self.dispatcher, "all")
+        self.assertIn("About 4 prefixes match", "\n".join(self.dispatcher.sent_markdowns))
+        action_id, _, choices, _ = self.dispatcher.prompts[-1]
+        self.assertEqual(action_id, "atsu get-prefixes all")
+
+        dispatcher = Mock_Dispatcher(self.context)
+        get_prefixes(dispatcher, "all", choices[0][1])
+        self.assertEqual(len(dispatcher.sent_markdowns[-1].splitlines()), 2 + Prefix.objects.count())
+
+    def test_background_task_registered(self):
+        """Verify a worker registers the background task on startup, without importing the app's modules itself."""
+        script = (
+            "import sys, nautobot; nautobot.setup(sys.argv[1]); from nautobot.core.celery import app; "
+            "sys.exit(sys.argv[2] not in app.tasks)"
+        )
+        config_path = sys.modules[settings.SETTINGS_MODULE].__file__
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script, config_path, run_in_background.name], capture_output=True, check=False
+        )
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+
+    @mock.patch.dict(settings.PLUGINS_CONFIG["nautobot_chatops_atsu"], {"background_threshold": 0})
+    def test_background(self):
+        """Verify large complete listings are enqueued, then logged with their final status once run."""
+        # run the task as a worker would when it is enqueued, rather than calling it directly
+        self.addCleanup(setattr, app.conf, "task_always_eager", app.conf.task_always_eager)
+        app.conf.task_always_eager = True
+        with mock.patch.object(run_in_background, "apply_async", wraps=run_in_background.apply_async) as apply_async:
+            self.assertFalse(get_prefixes(self.dispatcher, "namespace", str(self.namespace.pk), "table"))
+        self.assertIn("in the background", self.dispatcher.sent_markdowns[-1])
+        args = apply_async.call_args.kwargs["args"]
+        self.assertEqual(apply_async.call_args.kwargs["queue"], "default")
+        self.assertEqual(args[:2], ("get-prefixes", ["namespace", str(self.namespace.pk), "table"]))
+
+        log = CommandLog.objects.get(command="atsu", subcommand="get-prefixes", nautobot_user=self.user)
+        self.assertEqual(log.status, CommandStatusChoices.STATUS_SUCCEEDED)
+
+        # summaries stay inline, as they are aggregated by the database
+        with mock.patch.object(run_in_background, "apply_async") as apply_async:
+            get_prefixes(self.dispatcher, "namespace", str(self.namespace.pk))
+        apply_async.assert_not_called()
+
+    def test_progress(self):
+        """Verify progress messages report the number of items yielded so far."""
+        items = list(iter_with_progress(range(3), self.dispatcher, "{count} done", interval=0))
+        self.assertEqual(items, [0, 1, 2])
+        self.assertEqual(self.dispatcher.sent_markdowns, ["0 done", "1 done", "2 done"])
+
+
+class PrefixSummaryTest(CommittedTestDataTestCase):
+    """Test the prefix-summary subcommand."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.namespace = Namespace.objects.create(name="Atsu Summary Test")
+        cls.status = Status.objects.get_for_model(Prefix).first()
+        for index in range(3):
+            Prefix.objects.create(prefix=f"10.60.{index}.0/24", namespace=cls.namespace, status=cls.status)
+        Prefix.objects.create(prefix="10.61.0.0/16", namespace=cls.namespace, status=cls.status, type="container")
+
+    def test_summary_counts(self):
+        """Verify grouped counts are computed with one query per dimension."""
+        dispatcher = Mock_Dispatcher({"user": User.objects.create(username="atsu-summary", is_superuser=True)})
+        with self.assertNumQueries(4):
+            result = prefix_summary(dispatcher)
+        self.assertEqual(result, CommandStatusChoices.STATUS_SUCCEEDED)
+        markdown = "\n".join(dispatcher.sent_markdowns)
+        self.assertIn("| Atsu Summary Test | 4 |", markdown)
+        self.assertIn("| Container | 1 |", markdown)
+        self.assertIn("| (none) | 4 |", markdown)
+
+    def test_summary_restricted(self):
+        """Verify users without permission to view Prefixes get empty counts."""
+        dispatcher = Mock_Dispatcher({"user": User.objects.create(username="atsu-summary-restricted")})
+        prefix_summary(dispatcher)
+        self.assertEqual(dispatcher.sent_markdowns[-1], "**0 prefixes in total**")
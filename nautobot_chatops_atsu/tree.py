@@ -0,0 +1,97 @@
+"""Prefix hierarchy trees.
+
+A Prefix's descendants are read in a single query ordered by network and prefix length, in which every Prefix
+directly follows its ancestors. The nesting is then assembled with a stack holding the chain of Prefixes that
+contain the current row, instead of walking ``children`` with one query per node or per level. The query reads no
+more Prefixes than fit in a table, so that the top of a tree holding millions of Prefixes costs no more than a
+small one, and Prefixes below the levels shown are only counted as children of their parents.
+"""
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db.models.query import QuerySet
+from nautobot.ipam.models import Prefix
+
+from .intervals import address_to_int
+
+
+class PrefixTreeNode(NamedTuple):
+    """A Prefix, the number of Prefixes nested directly within it, and those of them that are shown."""
+
+    cidr: str
+    type: str
+    status: str
+    child_count: int
+    children: List["PrefixTreeNode"]
+
+
+def build_prefix_tree(
+    parent: Prefix, prefixes: QuerySet[Prefix], max_depth: Optional[int] = None, limit: Optional[int] = None
+) -> Tuple[PrefixTreeNode, bool]:
+    """Return the Prefixes of a queryset within ``parent`` as a tree rooted at ``parent``, from a single query.
+
+    At most ``limit`` descendants are read, in network order, and those more than ``max_depth`` levels below
+    ``parent`` are left out of the tree. Prefixes that are not part of the queryset (such as those the user may not
+    view) are skipped, leaving the Prefixes within them nested in their closest ancestor that is.
+
+    Returns:
+        tuple: the root node of ``parent`` and whether the tree was cut short by ``limit``
+    """
+    rows = (
+        prefixes.filter(
+            namespace_id=parent.namespace_id,
+            ip_version=parent.ip_version,
+            network__gte=parent.network,
+            broadcast__lte=parent.broadcast,
+            prefix_length__gt=parent.prefix_length,
+        )
+        .order_by("network", "prefix_length")
+        .values_list("network", "broadcast", "prefix_length", "type", "status__name")
+    )
+    rows = list(rows if limit is None else rows[: limit + 1])
+    truncated = limit is not None and len(rows) > limit
+    root = PrefixTreeNode(parent.cidr_str, parent.type, parent.status.name, 0, [])
+    # Each entry holds an open ancestor of the current row: its node, the last address it contains, its depth, the
+    # number of Prefixes directly within it so far, and whether it is shown.
+    stack = [[root, address_to_int(parent.broadcast), 0, 0, True]]
+
+    def close() -> PrefixTreeNode:
+        # A Prefix is closed before any of its later siblings is read, so a shown one is its parent's last child.
+        node, _, _, child_count, shown = stack.pop()
+        node = node._replace(child_count=child_count)
+        if shown and stack:
+            stack[-1][0].children[-1] = node
+        return node
+
+    for network, broadcast, prefix_length, prefix_type, status in rows[:limit]:
+        first = address_to_int(network)
+        while stack[-1][1] < first:
+            close()
+        ancestor = stack[-1]
+        ancestor[3] += 1
+        depth = ancestor[2] + 1
+        node = PrefixTreeNode(f"{network}/{prefix_length}", prefix_type, status, 0, [])
+        shown = max_depth is None or depth <= max_depth
+        if shown:
+            ancestor[0].children.append(node)
+        stack.append([node, address_to_int(broadcast), depth, 0, shown])
+    while len(stack) > 1:
+        close()
+    return close(), truncated
+
+
+def iter_tree_lines(
+    roots: List[PrefixTreeNode], max_depth: Optional[int] = None
+) -> Iterator[Tuple[str, PrefixTreeNode]]:
+    """Yield each node down to ``max_depth`` levels below the roots, with the tree guide to draw before it."""
+    # Each entry holds the guide of the node's ancestors, the node, its depth and whether it is its parent's last.
+    pending = [("", root, 0, True) for root in reversed(roots)]
+    while pending:
+        indent, node, depth, last = pending.pop()
+        yield (indent + ("└─ " if last else "├─ ") if depth else ""), node
+        if max_depth is not None and depth >= max_depth:
+            continue
+        child_indent = indent + ("\u2003 " if last else "│ ") if depth else ""
+        pending.extend(
+            (child_indent, child, depth + 1, index == 0) for index, child in enumerate(reversed(node.children))
+        )
@@ -0,0 +1,120 @@
+"""Bulk Prefix utilization.
+
+``Prefix.get_utilization()`` issues one or more queries per Prefix. The functions here compute the same figures
+for any number of Prefixes from three queries: the Prefixes themselves, their child Prefixes and the IP addresses
+within their ranges. Coverage is then computed with sorted interval merging and batched binary search.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from nautobot.ipam.choices import PrefixTypeChoices
+from nautobot.ipam.models import IPAddress, Prefix
+
+from .intervals import Interval, SortedIntegers, address_to_int, covered_size, int_to_address, merge_intervals
+
+
+class PrefixUtilization(NamedTuple):
+    """Utilization of a single Prefix, as ``numerator`` used addresses out of ``denominator``."""
+
+    prefix: str
+    type: str
+    numerator: int
+    denominator: int
+
+    @property
+    def percent(self) -> float:
+        """Return the utilization as a percentage."""
+        return 100.0 * self.numerator / self.denominator if self.denominator else 0.0
+
+
+def _in_intervals(merged: List[Interval], value: int) -> bool:
+    """Return True if a value falls inside one of the sorted, disjoint intervals."""
+    index = bisect_right(merged, (value, float("inf"))) - 1
+    return index >= 0 and merged[index][0] <= value <= merged[index][1]
+
+
+def _fetch_hosts(groups: Dict[Tuple[str, int], List[int]], spans: List[Interval]) -> Dict[Tuple[str, int], List[int]]:
+    """Fetch the IP addresses within the given Prefixes in one query, grouped by namespace and IP version.
+
+    Each group of Prefixes is bounded by a single range, from its lowest network to its highest broadcast.
+    """
+    hosts: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+    if not groups:
+        return hosts
+    ip_filter = Q()
+    for (namespace_id, ip_version), indexes in groups.items():
+        ip_filter |= Q(
+            parent__namespace_id=namespace_id,
+            ip_version=ip_version,
+            host__gte=int_to_address(min(spans[index][0] for index in indexes), ip_version),
+            host__lte=int_to_address(max(spans[index][1] for index in indexes), ip_version),
+        )
+    addresses = IPAddress.objects.filter(ip_filter).order_by()
+    for namespace_id, ip_version, host in addresses.values_list("parent__namespace_id", "ip_version", "host"):
+        hosts[(namespace_id, ip_version)].append(address_to_int(host))
+    return hosts
+
+
+def get_prefix_utilization(prefixes: QuerySet[Prefix]) -> List[PrefixUtilization]:
+    """Return the utilization of every Prefix of a queryset, matching ``Prefix.get_utilization()``.
+
+    Child Prefixes count as fully used, except within pools. IP addresses count as used, except within
+    containers, and are only counted once when they also fall within a child Prefix.
+    """
+    targets = list(
+        prefixes.values_list("pk", "network", "broadcast", "prefix_length", "ip_version", "namespace_id", "type")
+    )
+    if not targets:
+        return []
+
+    children: Dict[str, List[Interval]] = defaultdict(list)
+    child_prefixes = Prefix.objects.filter(parent__in=prefixes.order_by().values("pk")).order_by()
+    for parent_id, network, broadcast in child_prefixes.values_list("parent_id", "network", "broadcast"):
+        children[parent_id].append((address_to_int(network), address_to_int(broadcast)))
+
+    spans = [(address_to_int(network), address_to_int(broadcast)) for _, network, broadcast, *_ in targets]
+    groups: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+    for index, (_, _, _, _, ip_version, namespace_id, prefix_type) in enumerate(targets):
+        if prefix_type != PrefixTypeChoices.TYPE_CONTAINER:
+            groups[(namespace_id, ip_version)].append(index)
+
+    hosts = _fetch_hosts(groups, spans)
+
+    merged_children = [
+        [] if prefix_type == PrefixTypeChoices.TYPE_POOL else merge_intervals(children.get(pk, ()))
+        for pk, *_, prefix_type in targets
+    ]
+    ip_counts = [0] * len(targets)
+    ip_points: Dict[int, SortedIntegers] = {}
+    for key, indexes in groups.items():
+        points = SortedIntegers(hosts.get(key, ()))
+        if not points:
+            continue
+        for index, count in zip(indexes, points.count_in_ranges([spans[index] for index in indexes])):
+            ip_counts[index] = count
+            ip_points[index] = points
+        # IP addresses inside child Prefixes are already counted by the child's coverage.
+        inner = [(index, interval) for index in indexes for interval in merged_children[index]]
+        for (index, _), count in zip(inner, points.count_in_ranges([interval for _, interval in inner])):
+            ip_counts[index] -= count
+
+    results = []
+    for index, (_, network, _, prefix_length, ip_version, _, prefix_type) in enumerate(targets):
+        first, last = spans[index]
+        numerator = covered_size(merged_children[index]) + ip_counts[index]
+        denominator = last - first + 1
+        # Like Prefix.get_utilization(), IPv4 networks exclude their network and broadcast addresses unless used.
+        if denominator > 2 and prefix_type == PrefixTypeChoices.TYPE_NETWORK and ip_version == 4:  # noqa: PLR2004
+            points = ip_points.get(index)
+            if not any(
+                _in_intervals(merged_children[index], value)
+                or (points is not None and points.count_in_ranges([(value, value)])[0])
+                for value in (first, last)
+            ):
+                denominator -= 2
+        results.append(PrefixUtilization(f"{network}/{prefix_length}", prefix_type, numerator, denominator))
+    return results
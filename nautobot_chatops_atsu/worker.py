@@ -1,24 +1,23 @@
 """Worker functions implementing Nautobot "atsu" command and subcommands."""
 
-from typing import Union
+import shlex
+from typing import Optional, Tuple, Union
 
+import netaddr
 from django.conf import settings
-from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db.models import Count
+from django.db.models.query import QuerySet
 from django.utils.text import slugify
 from nautobot.circuits.models import Circuit, CircuitTermination, CircuitType, Provider
 from nautobot.dcim.models import Cable, Device, DeviceType, Location, LocationType, Manufacturer, Rack
 from nautobot.dcim.models.device_components import FrontPort, Interface, RearPort
 from nautobot.extras.choices import JobResultStatusChoices
 from nautobot.extras.jobs import get_job
-from nautobot.extras.models import Job, JobResult, Role, Status
-from nautobot.ipam.choices import PrefixTypeChoices
-from nautobot.ipam.models import Namespace, Prefix, VLAN, VLANGroup, RIR
-from nautobot.tenancy.models import Tenant
+from nautobot.extras.models import Job, JobResult
+from nautobot.ipam.models import Prefix, VLANGroup
 
 from nautobot_chatops.choices import CommandStatusChoices
-from nautobot_chatops.workers import handle_subcommands, subcommand_of
+from nautobot_chatops.workers import subcommand_of
 from nautobot_chatops.workers.helper_functions import (
     add_asterisk,
     menu_item_check,
@@ -30,9 +29,40 @@ from nautobot_chatops.workers.helper_functions import (
     prompt_for_vlan_filter_type,
 ) # pylint: disable=too-many-return-statements,too-many-branches
 
-from nautobot_chatops.workers import subcommand_of, handle_subcommands
-from .atsu import NautobotChatopsAtsu
-from .helpers import prompt_for_prefix_filter_type, send_prefix_table
+from nautobot_chatops.workers import subcommand_of
+from .allocation import DEFAULT_SUBNET_COUNT, MAX_SUBNET_COUNT, get_available_subnets
+from .audit import find_overlaps
+from .background import offload_command
+from .buffering import handle_buffered_subcommands
+from .conversation import get_conversation
+from .export import EXPORT_FORMATS, EXPORT_OPTION, export_filename, parse_export_option
+from .filters import (
+    AmbiguousFilterValue,
+    filter_prefixes,
+    format_filters,
+    parse_filter_args,
+    resolve_filters,
+)
+from .helpers import (
+    PREFIX_TABLE_COLUMNS,
+    count_up_to,
+    estimate_count,
+    get_cached_prefix_table,
+    prompt_for_prefix_filter_type,
+    send_available_subnets,
+    send_bulk_lookup,
+    send_export,
+    send_overlaps,
+    send_prefix_lookup,
+    send_prefix_summary,
+    send_prefix_tree,
+    send_prefix_table,
+    send_prefix_utilization,
+)
+from .lookup import lookup_address, parse_addresses
+from .menus import get_allocation_parent_choices, get_prefix_filter_choices
+from .permissions import restrict
+from .tree import build_prefix_tree
 
 
 EXAMPLE_VAR = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"].get("example_var")
@@ -40,152 +70,576 @@ EXAMPLE_VAR = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"].get("example_var"
 
 def atsu(subcommand, **kwargs):
     """Interact with atsu app."""
-    return handle_subcommands("atsu", subcommand, **kwargs)
+    return handle_buffered_subcommands("atsu", subcommand, **kwargs)
+
+
+def _send_prefixes(dispatcher, prefixes, params, rerun_args, output=None) -> Union[tuple, CommandStatusChoices]:
+    """Send the Prefixes matched by a filter, falling back to a summary when there are too many to list.
+
+    ``params`` describe the filter in the response header and messages, and ``rerun_args`` are the command
+    arguments that repeat the query, to which "table" is appended to show the full table.
+    """
+    description = " ".join(value for _, value in params)
+    conversation = get_conversation(dispatcher)
+    # the previous step already found matches if it offered the full table for the same query
+    offered = output == "table" and conversation.state.pop("full_table", None) == rerun_args
+    # a table rendered since the Prefixes last changed is sent without querying them at all
+    rendered = get_cached_prefix_table(dispatcher, prefixes) if output != "table" else None
+    if not offered and rendered is None and not prefixes.exists():
+        dispatcher.send_error(f"No prefixes found for {description}")
+        return (CommandStatusChoices.STATUS_FAILED, f"No prefixes for \"{description}\" found")
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "get-prefixes",
+            params,
+            "Prefixes list",
+            nautobot_logo(dispatcher),
+        )
+    )
+
+    max_rows = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["max_table_rows"]
+    if output != "table" and rendered is None and count_up_to(prefixes, max_rows + 1) > max_rows:
+        # the estimate comes from table statistics, which may lag behind the count that was just checked
+        estimate = max(estimate_count(prefixes), max_rows + 1)
+        dispatcher.send_markdown(
+            f"**About {estimate} prefixes match '{description}', which is too many to list. "
+            "Showing a summary instead.**"
+        )
+        send_prefix_summary(dispatcher, prefixes)
+        dispatcher.prompt_from_menu(
+            f"atsu get-prefixes {rerun_args}",
+            f"More than {max_rows} prefixes matched",
+            [
+                ("Show the full table", "table"),
+                *((f"Export as {name.upper()}", f"{EXPORT_OPTION}={name}") for name in EXPORT_FORMATS),
+            ],
+        )
+        conversation.state["full_table"] = rerun_args
+        conversation.save()
+        return CommandStatusChoices.STATUS_SUCCEEDED
+
+    conversation.save()
+    # at most max_table_rows unless the full table was asked for, so identical concurrent requests can share it
+    send_prefix_table(dispatcher, prefixes, description, coalesce=output != "table", rendered=rendered)
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+def _export_prefixes(dispatcher, prefixes, params, rerun_args, export_format) -> Union[bool, tuple, CommandStatusChoices]:
+    """Upload every Prefix matched by a filter as a compressed file attachment.
+
+    ``rerun_args`` are the command arguments that repeat the export, once the user allows uploads if the chat
+    platform requires it.
+    """
+    description = " ".join(value for _, value in params)
+    if not prefixes.exists():
+        dispatcher.send_error(f"No prefixes found for {description}")
+        return (CommandStatusChoices.STATUS_FAILED, f"No prefixes for \"{description}\" found")
+
+    filename = export_filename("prefixes", export_format)
+    if dispatcher.needs_permission_to_send_image():
+        dispatcher.ask_permission_to_send_image(filename, f"atsu get-prefixes {rerun_args}")
+        return False
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "get-prefixes",
+            [*params, ("Export", export_format)],
+            "Prefixes export",
+            nautobot_logo(dispatcher),
+        )
+    )
+    count = send_export(dispatcher, prefixes, PREFIX_TABLE_COLUMNS, export_format, filename)
+    dispatcher.send_markdown(f"**Exported {count} prefixes matching '{description}'**")
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+def _prompt_for_prefix_filter(dispatcher, subcommand, filter_type=None, filter_value=None) -> Union[bool, tuple]:
+    """Prompt the user for the Prefix filter type, or for the filter value, whichever was not provided."""
+    if not filter_type:
+        prompt_for_prefix_filter_type(f"atsu {subcommand}", "Select a prefix filter", dispatcher)
+        return False
+
+    # choices are fetched one page at a time, so the menu offset is applied here rather than by the dispatcher
+    filter_type = filter_type.lower()
+    choices = get_prefix_filter_choices(filter_type, offset=menu_offset_value(filter_value), user=dispatcher.user)
+    if choices is None:
+        dispatcher.send_error(f"I don't know how to filter by {filter_type}")
+        return (CommandStatusChoices.STATUS_FAILED, f"Unknown filter type \"{filter_type}\"")
+
+    if not choices:
+        dispatcher.send_error(f"No choices found for filter type {filter_type}")
+        return (CommandStatusChoices.STATUS_FAILED, f"No choices for \"{filter_type}\"")
+
+    dispatcher.prompt_from_menu(
+        f"atsu {subcommand} {filter_type}",
+        f"Select a {filter_type}",
+        choices,
+    )
+    return False
+
+
+def _needs_prefix_filter_prompt(filter_type, filter_value) -> bool:
+    """Return True if the filter type, or a filter value required by the filter type, was not provided."""
+    return not filter_type or (menu_item_check(filter_value) and filter_type.lower() != "all")
+
+
+def _prompt_for_candidates(dispatcher, action_id, error, value_format="{pk}") -> bool:
+    """Prompt the user to pick one of the objects matched by an ambiguous filter value."""
+    help_text = f"Several {error.filter_type} match \"{error.value}\", select one"
+    if error.truncated:
+        help_text = (
+            f"More than {len(error.candidates)} {error.filter_type} match \"{error.value}\", showing the first "
+            f"{len(error.candidates)}: select one, or refine the value"
+        )
+    dispatcher.prompt_from_menu(
+        action_id,
+        help_text,
+        [(label, value_format.format(type=error.filter_type, pk=pk)) for label, pk in error.candidates],
+    )
+    return False
+
+
+def _apply_prefix_filters(
+    dispatcher, subcommand, filters, compound=False, args=()
+) -> Tuple[Optional[QuerySet], Union[bool, tuple, None]]:
+    """Return the Prefixes the user may view that match every filter, as a single query.
+
+    Human readable filter values are resolved first. If one matches several objects, the user is prompted to pick
+    one, re-running the subcommand with the other filters (as `type=value` arguments if ``compound``) and ``args``.
+
+    Returns:
+        tuple: (prefixes, None) on success, or (None, result) where result is the command result to return
+    """
+    conversation = get_conversation(dispatcher)
+    try:
+        filters = resolve_filters(filters, conversation.setdefault("resolved", {}), dispatcher.user)
+        return filter_prefixes(restrict(Prefix.objects.all(), dispatcher.user), filters), None
+    except AmbiguousFilterValue as error:
+        if compound:
+            others = [item for item in filters if item != (error.filter_type, error.value)]
+            action_id = " ".join(filter(None, ["atsu", subcommand, format_filters(others), *map(shlex.quote, args)]))
+            return None, _prompt_for_candidates(dispatcher, action_id, error, "{type}={pk}")
+        return None, _prompt_for_candidates(dispatcher, f"atsu {subcommand} {error.filter_type}", error)
+    except ValueError as error:
+        dispatcher.send_error(str(error))
+        return None, (CommandStatusChoices.STATUS_FAILED, str(error))
+    finally:
+        conversation.save()
+
+
+def _filter_prefixes(dispatcher, subcommand, filter_type, filter_value) -> Tuple[Optional[QuerySet], Union[bool, tuple, None]]:
+    """Return the Prefixes matched by a filter type and value.
+
+    Returns:
+        tuple: (prefixes, None) on success, or (None, result) where result is the command result to return
+    """
+    filters = [] if filter_type == "all" else [(filter_type, filter_value)]
+    return _apply_prefix_filters(dispatcher, subcommand, filters)
+
+
+def _get_parent_prefix(dispatcher, subcommand, parent) -> Tuple[Optional[Prefix], Union[bool, tuple, None]]:
+    """Return the parent Prefix identified by a primary key or CIDR, if the user may view it.
+
+    Returns:
+        tuple: (prefix, None) on success, or (None, result) where result is the command result to return
+    """
+    conversation = get_conversation(dispatcher)
+    try:
+        resolved = conversation.setdefault("resolved", {})
+        [(_, parent_pk)] = resolve_filters([("parent", parent)], resolved, dispatcher.user)
+        parent_prefix = restrict(Prefix.objects.all(), dispatcher.user).get(pk=parent_pk)
+    except AmbiguousFilterValue as error:
+        return None, _prompt_for_candidates(dispatcher, f"atsu {subcommand}", error)
+    except (Prefix.DoesNotExist, ValidationError, ValueError):
+        dispatcher.send_error(f"Prefix {parent} not found")
+        return None, (CommandStatusChoices.STATUS_FAILED, f"Prefix \"{parent}\" not found")
+    finally:
+        conversation.save()
+    return parent_prefix, None
 
 
 # pylint: disable=too-many-statements
 @subcommand_of("atsu")
-def get_prefixes(dispatcher, filter_type=None, filter_value=None) -> Union[bool, CommandStatusChoices]:
+def get_prefixes(
+    dispatcher, filter_type=None, filter_value=None, output=None, *filters
+) -> Union[bool, CommandStatusChoices]:
     """Return a filtered list of Prefixes based on filter type and filter value.
 
+    Filters may also be given as any number of `type=value` arguments, such as `status=active tenant=acme`, which
+    are combined into a single query. Prefixes must match every filter type, and any of the values given for the
+    same filter type. Values may be primary keys or names (VLAN IDs and CIDRs for the vlan and parent filters);
+    names matching several objects are answered with a menu of the candidates.
+
     Args:
         dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
         filter_type (Optional[str]): Category to filter by (e.g. "status", "role", "namespace", "all")
-        filter_value (Optional[str]): Selected filter value or menu offset when prompting
+        filter_value (Optional[str]): Selected filter value, name or menu offset when prompting
+        output (Optional[str]): "table" to list every matching Prefix even when there are more than `max_table_rows`
+        filters (str): Further `type=value` filters, or `--export csv` / `--export json` to upload every matching
+            Prefix as a compressed file attachment instead
+
+    Complete listings (`table` or `--export`) estimated to exceed the `background_threshold` setting are run as a
+    background task instead, which posts the result when it is ready.
 
     Returns:
-        bool: False if awaiting user input (prompting from menu)
+        bool: False if awaiting user input (prompting from menu) or running in the background
         CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
     """
     dispatcher.send_markdown(f"Command /atsu get-prefixes received with filter type '{filter_type}' and filter value '{filter_value}'")
 
-    # create an instance of NautobotChatopsAtsu to suppress pylint
-    NautobotChatopsAtsu()
+    arguments = (filter_type, filter_value, output, *filters)
+    try:
+        export_format, args = parse_export_option(arguments)
+    except ValueError as error:
+        dispatcher.send_error(str(error))
+        return (CommandStatusChoices.STATUS_FAILED, str(error))
+    filter_type, filter_value, output, *filters = (*args, None, None, None)
+    # prompts re-run the command with the export option, wherever it ends up among the arguments
+    subcommand = f"get-prefixes {EXPORT_OPTION} {export_format}" if export_format else "get-prefixes"
 
-    content_type = ContentType.objects.get_for_model(Prefix)
+    compound_filters, remaining = parse_filter_args((filter_type, filter_value, output, *filters))
+    if compound_filters:
+        prefixes, failure = _apply_prefix_filters(dispatcher, subcommand, compound_filters, True, remaining)
+        rerun_args = format_filters(compound_filters)
+        params = [(f"Filter {index}", f"{name}={value}") for index, (name, value) in enumerate(compound_filters, 1)]
+        output = next(iter(remaining), None)
+    else:
+        if _needs_prefix_filter_prompt(filter_type, filter_value):
+            return _prompt_for_prefix_filter(dispatcher, subcommand, filter_type, filter_value)
 
-    if not filter_type:
-        prompt_for_prefix_filter_type("nautobot get-prefixes", "Select a prefix filter", dispatcher)
+        # normalize filter type
+        filter_type = filter_type.lower()
+        if filter_type == "all":
+            # "all" takes no filter value, so the argument after it is the output
+            filter_value, output = None, output or filter_value
+
+        prefixes, failure = _filter_prefixes(dispatcher, subcommand, filter_type, filter_value)
+        params = [("Filter type", filter_type)]
+        if filter_value:
+            params.append(("Filter value 1", filter_value))
+        rerun_args = f"{filter_type} {shlex.quote(filter_value)}" if filter_value else filter_type
+
+    if prefixes is None:
+        return failure
+
+    # only complete listings can be large; summaries are aggregated by the database
+    if (export_format or output == "table") and offload_command(
+        dispatcher, "get-prefixes", arguments, estimate_count(prefixes)
+    ):
         return False
-    
-    # normalize filter type
+
+    if export_format:
+        rerun_args = f"{rerun_args} {EXPORT_OPTION} {export_format}"
+        return _export_prefixes(dispatcher, prefixes, params, rerun_args, export_format)
+    return _send_prefixes(dispatcher, prefixes, params, rerun_args, output=output)
+
+
+@subcommand_of("atsu")
+def prefix_summary(dispatcher) -> CommandStatusChoices:
+    """Return the number of Prefixes per status, role, namespace and type.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+
+    Returns:
+        CommandStatusChoices: STATUS_SUCCEEDED on completion
+    """
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "prefix-summary",
+            [],
+            "Prefix summary",
+            nautobot_logo(dispatcher),
+        )
+    )
+    total = send_prefix_summary(dispatcher, restrict(Prefix.objects.all(), dispatcher.user))
+    dispatcher.send_markdown(f"**{total} prefixes in total**")
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+@subcommand_of("atsu")
+def prefix_utilization(dispatcher, filter_type=None, filter_value=None) -> Union[bool, CommandStatusChoices]:
+    """Return the utilization of Prefixes based on filter type and filter value.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        filter_type (Optional[str]): Category to filter by, as for get-prefixes
+        filter_value (Optional[str]): Selected filter value, name or menu offset when prompting
+
+    Returns:
+        bool: False if awaiting user input (prompting from menu)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if _needs_prefix_filter_prompt(filter_type, filter_value):
+        return _prompt_for_prefix_filter(dispatcher, "prefix-utilization", filter_type, filter_value)
+
     filter_type = filter_type.lower()
+    prefixes, failure = _filter_prefixes(dispatcher, "prefix-utilization", filter_type, filter_value)
+    if prefixes is None:
+        return failure
 
-    # prompt for menu choices if value if it was not provided
-    if menu_item_check(filter_value):
-        choices = []
-        if filter_type == "all":
-            prefixes = Prefix.objects.restrict(dispatcher.user, "view")
-            dispatcher.send_blocks(
-                dispatcher.command_response_header(
-                    "nautobot",
-                    "get-prefixes",
-                    [("Filter type", filter_type)],
-                    "Prefixes list",
-                    nautobot_logo(dispatcher),
-                )
-            )
-            send_prefix_table(dispatcher, prefixes, filter_type)
-            return CommandStatusChoices.STATUS_SUCCEEDED
-        elif filter_type == "status":
-            choices = [(s.name, str(s.pk)) for s in Status.objects.get_for_model(Prefix)]
-        elif filter_type == "role":
-            choices = [(r.name, str(r.pk)) for r in Role.objects.filter(content_types=content_type)]
-        elif filter_type == "namespace":
-            choices = [(ns.name, str(ns.pk)) for ns in Namespace.objects.all()]
-        elif filter_type == "vlan":
-            choices = [
-                (v.name, str(v.pk))
-                for v in VLAN.objects.annotate(Count("prefixes")).filter(prefixes__count__gt=0)
-            ]
-        elif filter_type == "tenant":
-            choices = [
-                (t.name, str(t.pk))
-                for t in Tenant.objects.annotate(Count("prefixes")).filter(prefixes__count__gt=0)
-            ]
-        elif filter_type == "rir":
-            choices = [(r.name, str(r.pk)) for r in RIR.objects.annotate(Count("prefixes")).filter(prefixes__count__gt=0)]
-        elif filter_type == "parent":
-            choices = [(p.cidr_str, str(p.pk)) for p in Prefix.objects.filter(children__isnull=False)]
-        elif filter_type == "type":
-            choices = [
-                (opt.label, opt.value) for opt in PrefixTypeChoices
-            ]
-        else:
-            dispatcher.send_error(f"I don't know how to filter by {filter_type}")
-            return (CommandStatusChoices.STATUS_FAILED, f"Unknown filter type \"{filter_type}\"")
+    if not prefixes.exists():
+        dispatcher.send_error(f"No prefixes found for {filter_type} {filter_value}")
+        return (CommandStatusChoices.STATUS_FAILED, f"No prefixes for \"{filter_type}\" \"{filter_value}\" found")
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "prefix-utilization",
+            [("Filter type", filter_type), ("Filter value 1", filter_value)],
+            "Prefix utilization",
+            nautobot_logo(dispatcher),
+        )
+    )
+    send_prefix_utilization(dispatcher, prefixes, filter_type)
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+@subcommand_of("atsu")
+def lookup(dispatcher, address=None) -> Union[bool, CommandStatusChoices]:
+    """Return the most specific Prefix containing an IP address in each namespace.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        address (Optional[str]): IPv4 or IPv6 address to look up
+
+    Returns:
+        bool: False if awaiting user input (prompting for the address)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if not address:
+        dispatcher.prompt_for_text("atsu lookup", "Enter an IP address to look up", "IP address")
+        return False
+
+    try:
+        matches = lookup_address(address)
+    except (netaddr.AddrFormatError, ValueError):
+        dispatcher.send_error(f"{address} is not a valid IP address")
+        return (CommandStatusChoices.STATUS_FAILED, f"Invalid IP address \"{address}\"")
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "lookup",
+            [("IP address", address)],
+            "Prefix lookup",
+            nautobot_logo(dispatcher),
+        )
+    )
+    if not send_prefix_lookup(dispatcher, restrict(Prefix.objects.all(), dispatcher.user), matches):
+        dispatcher.send_warning(f"No prefix contains {address}")
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+@subcommand_of("atsu")
+def bulk_lookup(dispatcher, filter_type=None, filter_value=None, addresses=None) -> Union[bool, CommandStatusChoices]:
+    """Return the most specific Prefix containing each of many IP addresses, within Prefixes matched by a filter.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        filter_type (Optional[str]): Category to filter by, as for get-prefixes
+        filter_value (Optional[str]): Selected filter value, name or menu offset when prompting
+        addresses (Optional[str]): IP addresses separated by whitespace or commas
+
+    Returns:
+        bool: False if awaiting user input (prompting from menu or for the addresses)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if _needs_prefix_filter_prompt(filter_type, filter_value):
+        return _prompt_for_prefix_filter(dispatcher, "bulk-lookup", filter_type, filter_value)
+
+    filter_type = filter_type.lower()
+    # resolved before prompting for addresses, so that an ambiguous filter value does not discard them
+    prefixes, failure = _filter_prefixes(dispatcher, "bulk-lookup", filter_type, filter_value)
+    if prefixes is None:
+        return failure
+
+    if not addresses:
+        dispatcher.prompt_for_text(
+            f"atsu bulk-lookup {filter_type} {shlex.quote(filter_value or filter_type)}",
+            "Paste the IP addresses to look up, separated by spaces, commas or new lines",
+            "IP addresses",
+        )
+        return False
+
+    parsed, invalid = parse_addresses(addresses)
+    if invalid:
+        dispatcher.send_warning(f"Skipping {len(invalid)} invalid address(es): {', '.join(invalid[:20])}")
+    if not parsed:
+        dispatcher.send_error("No valid IP addresses were given")
+        return (CommandStatusChoices.STATUS_FAILED, "No valid IP addresses")
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "bulk-lookup",
+            [("Filter type", filter_type), ("Filter value 1", filter_value), ("Addresses", str(len(parsed)))],
+            "Bulk prefix lookup",
+            nautobot_logo(dispatcher),
+        )
+    )
+    matched = send_bulk_lookup(dispatcher, prefixes, parsed)
+    dispatcher.send_markdown(f"**{matched} of {len(parsed)} addresses matched a prefix**")
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+def _parse_subnet_request(prefix_length, count) -> Tuple[int, int]:
+    """Return the prefix length (with or without a leading "/") and count of an available-subnets request as integers."""
+    try:
+        length, count = int(prefix_length.lstrip("/")), int(count) if count else DEFAULT_SUBNET_COUNT
+    except ValueError as error:
+        raise ValueError("Prefix length and count must be whole numbers") from error
+    if not 1 <= count <= MAX_SUBNET_COUNT:
+        raise ValueError(f"Count must be between 1 and {MAX_SUBNET_COUNT}")
+    return length, count
+
+
+@subcommand_of("atsu")
+def available_subnets(dispatcher, parent=None, prefix_length=None, count=None) -> Union[bool, CommandStatusChoices]:
+    """Return the first free subnets of a given length within a parent Prefix.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        parent (Optional[str]): Parent Prefix primary key or CIDR, or menu offset when prompting
+        prefix_length (Optional[str]): Prefix length of the subnets to find
+        count (Optional[str]): Maximum number of subnets to list
 
+    Returns:
+        bool: False if awaiting user input (prompting from menu or for the prefix length)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if menu_item_check(parent):
+        choices = get_allocation_parent_choices(offset=menu_offset_value(parent), user=dispatcher.user)
         if not choices:
-            dispatcher.send_error(f"No choices found for filter type {filter_type}")
-            return (CommandStatusChoices.STATUS_FAILED, f"No choices for \"{filter_type}\"")
+            dispatcher.send_error("No parent prefixes found")
+            return (CommandStatusChoices.STATUS_FAILED, "No parent prefixes")
+        dispatcher.prompt_from_menu("atsu available-subnets", "Select a parent prefix", choices)
+        return False
 
-        dispatcher.prompt_from_menu(
-            f"nautobot get-prefixes {filter_type}",
-            f"Select a {filter_type}",
-            choices,
-            offset=menu_offset_value(filter_value),
+    parent_prefix, failure = _get_parent_prefix(dispatcher, "available-subnets", parent)
+    if parent_prefix is None:
+        return failure
+
+    if not prefix_length:
+        dispatcher.prompt_for_text(
+            f"atsu available-subnets {parent_prefix.pk}",
+            f"Enter the prefix length of the subnets to find in {parent_prefix.cidr_str}",
+            "Prefix length",
         )
         return False
 
-    if filter_type == "status":
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(status__pk=filter_value)
-    elif filter_type == "role":
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(role__pk=filter_value)
-    elif filter_type == "namespace":
-        try:
-            ns = Namespace.objects.get(pk=filter_value)
-        except Namespace.DoesNotExist:
-            dispatcher.send_error(f"Namespace {filter_value} not found")
-            return (CommandStatusChoices.STATUS_FAILED, f"Namespace \"{filter_value}\" not found")
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(namespace=ns)
-    elif filter_type == "vlan":
-        try:
-            vlan = VLAN.objects.get(pk=filter_value)
-        except VLAN.DoesNotExist:
-            dispatcher.send_error(f"VLAN {filter_value} not found")
-            return (CommandStatusChoices.STATUS_FAILED, f"VLAN \"{filter_value}\" not found")
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(vlan=vlan)
-    elif filter_type == "tenant":
-        try:
-            tenant = Tenant.objects.get(pk=filter_value)
-        except Tenant.DoesNotExist:
-            dispatcher.send_error(f"Tenant {filter_value} not found")
-            return (CommandStatusChoices.STATUS_FAILED, f"Tenant \"{filter_value}\" not found")
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(tenant=tenant)
-    elif filter_type == "rir":
-        try:
-            rir = RIR.objects.get(pk=filter_value)
-        except RIR.DoesNotExist:
-            dispatcher.send_error(f"RIR {filter_value} not found")
-            return (CommandStatusChoices.STATUS_FAILED, f"RIR \"{filter_value}\" not found")
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(rir=rir)
-    elif filter_type == "parent":
-        try:
-            parent = Prefix.objects.get(pk=filter_value)
-        except Prefix.DoesNotExist:
-            dispatcher.send_error(f"Prefix {filter_value} not found")
-            return (CommandStatusChoices.STATUS_FAILED, f"Prefix \"{filter_value}\" not found")
-        prefixes = Prefix.objects.filter(parent=parent)
-    elif filter_type == "type":
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view").filter(type=filter_value)
-    elif filter_type == "all":
-        prefixes = Prefix.objects.restrict(dispatcher.user, "view")
+    try:
+        length, count = _parse_subnet_request(prefix_length, count)
+        subnets = get_available_subnets(parent_prefix, length, count)
+    except ValueError as error:
+        dispatcher.send_error(str(error))
+        return (CommandStatusChoices.STATUS_FAILED, str(error))
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "available-subnets",
+            [("Parent", parent_prefix.cidr_str), ("Prefix length", str(length)), ("Count", str(count))],
+            "Available subnets",
+            nautobot_logo(dispatcher),
+        )
+    )
+    if subnets:
+        send_available_subnets(dispatcher, subnets)
     else:
-        dispatcher.send_error(f"{filter_type} not supported")
-        return (CommandStatusChoices.STATUS_FAILED, f"\"{filter_type}\" not supported")
+        dispatcher.send_warning(f"No free /{length} subnets in {parent_prefix.cidr_str}")
+    return CommandStatusChoices.STATUS_SUCCEEDED
 
-    if not prefixes:
-        dispatcher.send_error(f"No prefixes found for {filter_type} {filter_value}")
-        return (CommandStatusChoices.STATUS_FAILED, f"No prefixes for \"{filter_type}\" \"{filter_value}\" found")
+
+@subcommand_of("atsu")
+def audit_overlaps(dispatcher, filter_type=None, filter_value=None) -> Union[bool, CommandStatusChoices]:
+    """Return the overlapping and duplicate Prefixes among those matched by a filter type and value.
+
+    Prefixes filtered by namespace are checked for nesting that their types do not allow; any other filter also
+    reports Prefixes that overlap or duplicate a Prefix in another namespace.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        filter_type (Optional[str]): Category to filter by, as for get-prefixes
+        filter_value (Optional[str]): Selected filter value, name or menu offset when prompting
+
+    Returns:
+        bool: False if awaiting user input (prompting from menu)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if _needs_prefix_filter_prompt(filter_type, filter_value):
+        return _prompt_for_prefix_filter(dispatcher, "audit-overlaps", filter_type, filter_value)
+
+    filter_type = filter_type.lower()
+    prefixes, failure = _filter_prefixes(dispatcher, "audit-overlaps", filter_type, filter_value)
+    if prefixes is None:
+        return failure
 
     dispatcher.send_blocks(
         dispatcher.command_response_header(
-            "nautobot",
-            "get-prefixes",
+            "atsu",
+            "audit-overlaps",
             [("Filter type", filter_type), ("Filter value 1", filter_value)],
-            "Prefixes list",
+            "Prefix overlap audit",
+            nautobot_logo(dispatcher),
+        )
+    )
+    found = send_overlaps(dispatcher, find_overlaps(prefixes, across_namespaces=filter_type != "namespace"))
+    dispatcher.send_markdown(f"**{found} overlapping prefixes found**" if found else "**No overlapping prefixes found**")
+    return CommandStatusChoices.STATUS_SUCCEEDED
+
+
+@subcommand_of("atsu")
+def prefix_tree(dispatcher, parent=None, depth=None) -> Union[bool, CommandStatusChoices]:
+    """Return the hierarchy of Prefixes within a parent Prefix.
+
+    Args:
+        dispatcher (Dispatcher): ChatOps dispatcher instance, for sending prompts and responses
+        parent (Optional[str]): Parent Prefix primary key or CIDR, or menu offset when prompting
+        depth (Optional[str]): Number of levels to show below the parent, defaulting to the `tree_depth` setting
+
+    Returns:
+        bool: False if awaiting user input (prompting from menu)
+        CommandStatusChoices: STATUS_SUCCEEDED or STATUS_FAILED on completion
+    """
+    if menu_item_check(parent):
+        choices = get_prefix_filter_choices("parent", offset=menu_offset_value(parent), user=dispatcher.user)
+        if not choices:
+            dispatcher.send_error("No parent prefixes found")
+            return (CommandStatusChoices.STATUS_FAILED, "No parent prefixes")
+        dispatcher.prompt_from_menu("atsu prefix-tree", "Select a parent prefix", choices)
+        return False
+
+    parent_prefix, failure = _get_parent_prefix(dispatcher, "prefix-tree", parent)
+    if parent_prefix is None:
+        return failure
+
+    try:
+        max_depth = int(depth) if depth else settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["tree_depth"]
+    except ValueError:
+        dispatcher.send_error(f"Depth must be a whole number, not {depth}")
+        return (CommandStatusChoices.STATUS_FAILED, f"Invalid depth \"{depth}\"")
+
+    dispatcher.send_blocks(
+        dispatcher.command_response_header(
+            "atsu",
+            "prefix-tree",
+            [("Parent", parent_prefix.cidr_str), ("Depth", str(max_depth))],
+            "Prefix tree",
             nautobot_logo(dispatcher),
         )
     )
-    send_prefix_table(dispatcher, prefixes, filter_type)
+    prefixes = restrict(Prefix.objects.all(), dispatcher.user)
+    max_rows = settings.PLUGINS_CONFIG["nautobot_chatops_atsu"]["max_table_rows"]
+    root, truncated = build_prefix_tree(parent_prefix, prefixes, max_depth, limit=max_rows)
+    send_prefix_tree(dispatcher, [root], max_depth)
+    if truncated:
+        dispatcher.send_markdown(
+            f"**Only the first {max_rows} prefixes of the tree are shown. "
+            "Choose a smaller depth or a more specific parent to see the rest.**"
+        )
     return CommandStatusChoices.STATUS_SUCCEEDED
@@ -853,6 +853,54 @@ def unittest_coverage(context):
     run_command(context, command)
 
 
+@task(
+    help={
+        "benchmark": "Benchmark to run, repeatable (default: all benchmarks)",
+        "sample_size": "Number of inputs per benchmark, or of Prefixes seeded for commands. (default: 1000)",
+        "seed": "Random seed used to sample inputs and seed data. (default: 0)",
+        "output": "Path of a JSON file to save the results to",
+        "baseline": "Path of a JSON file of results to compare with, failing on regressions",
+        "tolerance": "Fraction by which timings and sizes may exceed the baseline. (default: 0.2)",
+    },
+    iterable=["benchmark"],
+)
+def benchmark(  # noqa: PLR0913
+    context,
+    benchmark=None,
+    sample_size=1000,
+    seed=0,
+    output="",
+    baseline="",
+    tolerance=0.2,
+):
+    """Run the atsu benchmarks, optionally saving the results and checking them against a baseline."""
+    command = f"nautobot-server atsu_benchmark {' '.join(benchmark or [])} --sample-size {sample_size} --seed {seed}"
+    if output:
+        command += f" --output '{output}'"
+    if baseline:
+        command += f" --baseline '{baseline}' --tolerance {tolerance}"
+
+    run_command(context, command)
+
+
+@task(
+    help={
+        "prefixes": "Number of Prefixes to create. (default: 10000)",
+        "namespaces": "Number of namespaces to divide the Prefixes between. (default: 1)",
+        "seed": "Random seed from which all generated data follows. (default: 0)",
+        "label": "Prefix of the names of the objects created. (default: synthetic)",
+    }
+)
+def generate_data(context, prefixes=10000, namespaces=1, seed=0, label="synthetic"):
+    """Bulk-create synthetic IPAM data for performance testing."""
+    command = (
+        f"nautobot-server atsu_generate_data --prefixes {prefixes} --namespaces {namespaces} --seed {seed}"
+        f" --label '{label}'"
+    )
+
+    run_command(context, command)
+
+
 @task(
     help={
         "failfast": "fail as soon as a single test fails don't run the entire test suite. (default: False)",